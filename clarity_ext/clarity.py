@@ -1,7 +1,10 @@
 from genologics.lims import Lims
 from genologics.config import BASEURI, USERNAME, PASSWORD
 from genologics.entities import Process
+from genologics.constants import nsmap
+from urlparse import urljoin
 import requests
+import threading
 
 
 class ClaritySession(object):
@@ -10,21 +13,125 @@ class ClaritySession(object):
 
     :param api: A proxy for the REST API, looking like Lims from the genologics package.
     :param current_step_id: The step we're currently in.
+    :param check_version: Set to False if the API version has already been checked for this server.
     """
-    def __init__(self, api, current_step_id):
+    def __init__(self, api, current_step_id, check_version=True):
         self.api = api
-        api.check_version()
+        if check_version:
+            api.check_version()
         self.current_step_id = current_step_id
         self.current_step = Process(self.api, id=current_step_id)
 
     @staticmethod
-    def create(current_step_id):
-        return ClaritySession(Lims(BASEURI, USERNAME, PASSWORD), current_step_id)
+    def create(current_step_id, request_session=None):
+        return session_factory.create(current_step_id, request_session)
 
-    def get(self, endpoint):
+    def get(self, endpoint, **kwargs):
         """
         Executes a GET via the REST interface. One should rather use the api attribute instead.
         The endpoint is the part after /api/<version>/ in the API URI.
+
+        Keyword arguments are passed on to requests, e.g. stream=True to read the body in chunks.
+        """
+        url = self.api.get_uri(endpoint)
+        return self.api.request_session.get(url, auth=(self.api.username, self.api.password), **kwargs)
+
+
+class PooledLims(Lims):
+    """
+    A Lims that sends all requests through a requests session that is shared with other instances,
+    so connections to the server are kept alive between steps.
+
+    The genologics package only uses its session for GET requests, so the other verbs are overridden here.
+    """
+    XML_HEADERS = {'content-type': 'application/xml', 'accept': 'application/xml'}
+
+    def __init__(self, baseuri, username, password, request_session, version=Lims.VERSION):
+        # Lims.__init__ is not called, since it creates a requests session of its own for every instance
+        self.baseuri = baseuri.rstrip('/') + '/'
+        self.username = username
+        self.password = password
+        self.VERSION = version
+        self.cache = dict()
+        self.request_session = request_session
+
+    def check_version(self):
+        uri = urljoin(self.baseuri, 'api')
+        r = self.request_session.get(uri, auth=(self.username, self.password))
+        root = self.parse_response(r)
+        assert nsmap('ver:versions') == root.tag
+        for node in root.findall('version'):
+            if node.attrib['major'] == self.VERSION:
+                return
+        raise ValueError('version mismatch')
+
+    def put(self, uri, data, params=dict()):
+        r = self.request_session.put(uri, data=data, params=params, auth=(self.username, self.password),
+                                     headers=self.XML_HEADERS)
+        return self.parse_response(r)
+
+    def post(self, uri, data, params=dict()):
+        r = self.request_session.post(uri, data=data, params=params, auth=(self.username, self.password),
+                                      headers=self.XML_HEADERS)
+        return self.parse_response(r, accept_status_codes=[200, 201, 202])
+
+    def delete(self, uri, params=dict()):
+        r = self.request_session.delete(uri, params=params, auth=(self.username, self.password),
+                                        headers=self.XML_HEADERS)
+        return self.validate_response(r, accept_status_codes=[204])
+
+
+class ClaritySessionFactory(object):
+    """
+    Creates `ClaritySession`s that share one keep-alive connection pool per server and user.
+
+    The API version of each server is only checked the first time a session is created for it.
+    Each session still gets its own `Lims` object, so entities cached by one run are never seen by another.
+
+    Thread safe, so one factory can be used by all extension runs in a process.
+    """
+
+    POOL_SIZE = 20
+
+    def __init__(self, baseuri=BASEURI, username=USERNAME, password=PASSWORD):
+        self.baseuri = baseuri
+        self.username = username
+        self.password = password
+        self._request_sessions = dict()
+        self._checked_versions = set()
+        self._lock = threading.Lock()
+
+    def create(self, current_step_id, request_session=None):
+        """
+        Creates a session for the step.
+
+        :param request_session: A requests session to use instead of the pooled one, e.g. one that caches responses.
         """
-        url = "{}/api/v2/{}".format(BASEURI, endpoint)
-        return requests.get(url, auth=(USERNAME, PASSWORD))
+        api = PooledLims(self.baseuri, self.username, self.password,
+                         request_session or self.request_session())
+        with self._lock:
+            check_version = api.baseuri not in self._checked_versions
+        if check_version:
+            api.check_version()
+            with self._lock:
+                self._checked_versions.add(api.baseuri)
+        return ClaritySession(api, current_step_id, check_version=False)
+
+    def request_session(self):
+        """Returns the pooled requests session for the server and user"""
+        key = (self.baseuri, self.username)
+        with self._lock:
+            session = self._request_sessions.get(key)
+            # Replace the session if caching has been turned on or off (requests_cache patches the Session class)
+            if session is None or session.__class__ is not requests.Session:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=self.POOL_SIZE,
+                                                        pool_maxsize=self.POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._request_sessions[key] = session
+            return session
+
+
+# The factory used by `ClaritySession.create`. All sessions created in a process share its connections.
+session_factory = ClaritySessionFactory()
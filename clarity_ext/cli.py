@@ -2,10 +2,7 @@ from __future__ import print_function
 import sys
 import click
 import logging
-from clarity_ext.integration import IntegrationTestService
-from clarity_ext.extensions import ExtensionService
 import os
-import yaml
 
 config = None
 logger = None
@@ -22,25 +19,29 @@ def main(level):
     """
     global config
     global logger
+    from clarity_ext.extensions import ExtensionService
     ExtensionService.initialize_logging(level.upper())
     logger = logging.getLogger(__name__)
 
     if os.path.exists("clarity-ext.config"):
+        import yaml
         with open("clarity-ext.config", "r") as f:
             config = yaml.load(f)
 
 
 @main.command()
 @click.argument("module")
-def validate(module):
+@click.option("--jobs", default=1, help="Number of integration tests to run in parallel")
+def validate(module, jobs):
     """
     Validates the extension if there exists frozen data for it.
     Can use regex to match extensions.
     """
     import time
+    from clarity_ext.integration import IntegrationTestService
     t1 = time.time()
     integration_svc = IntegrationTestService()
-    validation_exceptions = integration_svc.validate(module, config)
+    validation_exceptions = integration_svc.validate(module, config, jobs)
     delta = time.time() - t1
     if validation_exceptions == 0:
         print("\nAll integration tests ran successfully ({:.3f}s)".format(delta))
@@ -64,6 +65,7 @@ def extension(module, mode, args, cache):
     :param args: Dynamic parameters to the extension
     :param cache: Specifies if the cache should be used. If None, the default for `mode` will be used.
     """
+    from clarity_ext.extensions import ExtensionService
     try:
         extension_svc = ExtensionService()
         extension_svc.execute(module, mode, args, config, use_cache=cache)
@@ -74,6 +76,24 @@ def extension(module, mode, args, cache):
                         .format(os.path.join(ExtensionService.PRODUCTION_LOGS_DIR,
                                              ExtensionService.PRODUCTION_LOG_NAME)))
 
+
+@main.command()
+@click.option("--socket", help="Path of the Unix domain socket to listen on. Defaults to ~/.clarity-ext/worker.sock")
+@click.option("--threads", default=4, help="Number of extensions that can execute at the same time")
+@click.option("--cwd-root",
+              help="Only execute extensions for directories under this one. Defaults to the current directory")
+@click.option("--group", is_flag=True, help="Also accept clients in the group of the worker")
+def worker(socket, threads, cwd_root, group):
+    """Starts a worker that executes extensions sent by clarity-ext-client, keeping modules and sessions warm."""
+    from clarity_ext.worker import ExtensionWorker, DEFAULT_SOCKET
+    server = ExtensionWorker(config, socket_path=socket or DEFAULT_SOCKET, threads=threads, cwd_root=cwd_root,
+                             group=group)
+    logger.info("Worker listening on {}, for directories under {}".format(server.server_address, server.cwd_root))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
 if __name__ == "__main__":
     main()
 
@@ -1,4 +1,4 @@
-from clarity_ext.dilution import DilutionScheme
+from clarity_ext.dilution import DilutionScheme, ENGINE_PYTHON
 from clarity_ext import UnitConversion
 from clarity_ext.repository.file_repository import FileRepository
 from clarity_ext.utils import lazyprop
@@ -50,18 +50,24 @@ class ExtensionContext(Udf):
         self.dilution_scheme = None
 
     @staticmethod
-    def create(step_id, cache=False):
+    def create(step_id, cache=False, session=None, os_service=None, prefetch_shared_files=None, file_cache=None):
         """
         Creates a context with all required services set up. This is the way
         a context is meant to be created in production and integration tests,
         use the constructor for custom use and unit tests.
+
+        :param session: The session to use. By default a new one is created for the step.
+        :param os_service: Provides access to the file system. By default, files are kept in the current directory.
+        :param prefetch_shared_files: Names of shared files to start downloading right away, see `FileService.prefetch`
+        :param file_cache: A `FileCache` for downloaded files, shared with other runs. By default, there is none.
         """
-        session = ClaritySession.create(step_id)
+        session = session or ClaritySession.create(step_id)
         step_repo = StepRepository(session)
         artifact_service = ArtifactService(step_repo)
         current_user = step_repo.current_user()
         file_repository = FileRepository(session)
-        file_service = FileService(artifact_service, file_repository, False, OSService())
+        file_service = FileService(artifact_service, file_repository, False, os_service or OSService(), file_cache)
+        file_service.prefetch(prefetch_shared_files or [])
         step_logger_service = StepLoggerService("Step log", file_service)
         return ExtensionContext(session, artifact_service, file_service, current_user, step_logger_service, step_repo,
                                 cache=cache)
@@ -71,7 +77,7 @@ class ExtensionContext(Udf):
         return self.step_repo.all_udfs()
 
     def init_dilution_scheme(self, concentration_ref=None, include_blanks=False,
-                             volume_calc_method=None, make_pools=False):
+                             volume_calc_method=None, make_pools=False, engine=ENGINE_PYTHON, ordering=None):
         file_list = [file for file in self.shared_files if file.name ==
                      ERRORS_AND_WARNING_ENTRY_NAME]
         if not len(file_list) == 1:
@@ -83,7 +89,7 @@ class ExtensionContext(Udf):
             artifact_service=self.artifact_service, robot_name="Hamilton",
             concentration_ref=concentration_ref, include_blanks=include_blanks,
             error_log_artifact=error_log_artifact,
-            volume_calc_method=volume_calc_method, make_pools=make_pools)
+            volume_calc_method=volume_calc_method, make_pools=make_pools, engine=engine, ordering=ordering)
 
     @lazyprop
     def shared_files(self):
@@ -134,22 +140,34 @@ class ExtensionContext(Udf):
         # Clean up:
         self.file_service.cleanup()
 
-    def local_shared_file(self, name, mode="r", is_xml=False, is_csv=False):
+    def local_shared_file(self, name, mode="r", is_xml=False, is_csv=False, xml_records=None,
+                          csv_reader=False, csv_columns=None, csv_types=None):
         """
         Downloads the file from the current step. The returned file is generally a regular
         file-like object, but can be casted to an xml object or csv by passing in is_xml or is_csv.
 
+        Large XML files can be read one record at a time by passing in the tag or path of the records
+        as xml_records, e.g. `for well in context.local_shared_file("Result", xml_records="Plate/Well")`.
+        Records are removed from memory as the iteration proceeds. See `FileService.iterparse_xml`.
+
+        Large CSV files can be read one row at a time by passing in csv_reader, or the columns to read
+        as csv_columns, e.g. `context.local_shared_file("Result", csv_columns=["Well", "Conc"])`.
+        csv_types converts the values of columns, e.g. `{"Conc": float}`. See `CsvReader`.
+
 
         NOTE: It would make sense to use constants instead of is_xml and is_csv, but since this
         is designed to be used by non-developers, this might be more readable.
         """
-        if is_xml and is_csv:
+        csv_reader = csv_reader or csv_columns or csv_types
+        if (is_xml or xml_records) and (is_csv or csv_reader):
             raise ValueError("More than one file type specifiers")
         f = self.file_service.local_shared_file(name, mode=mode)
-        if is_xml:
+        if xml_records:
+            return self.file_service.iterparse_xml(f, xml_records)
+        elif is_xml:
             return self.file_service.parse_xml(f)
-        elif is_csv:
-            return self.file_service.parse_csv(f)
+        elif is_csv or csv_reader:
+            return self.file_service.parse_csv(f, reader=csv_reader, columns=csv_columns, types=csv_types)
         else:
             return f
 
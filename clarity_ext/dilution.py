@@ -1,7 +1,9 @@
-import copy
+import sys
+from array import array
 from clarity_ext.utils import get_and_apply
 from itertools import groupby
 from clarity_ext.dilution_strategies import *
+from clarity_ext.domain.container import Container
 
 DILUTION_WASTE_VOLUME = 1
 PIPETTING_MAX_VOLUME = 50
@@ -9,6 +11,10 @@ CONCENTRATION_REF_NGUL = 1
 CONCENTRATION_REF_NM = 2
 VOLUME_CALC_FIXED = 1
 VOLUME_CALC_BY_CONC = 2
+NAN = float("nan")
+# Engines calculating the transfer volumes, see dilution_strategies and dilution_strategies_batch
+ENGINE_PYTHON = 1
+ENGINE_NUMPY = 2
 
 
 class TransferEndpoint(object):
@@ -36,26 +42,34 @@ class TransferEndpoint(object):
         self.plate_pos = None
 
     def _referenced_concentration(self, aliquot=None, concentration_ref=None):
-        if concentration_ref == CONCENTRATION_REF_NGUL:
-            return aliquot.concentration_ngul
-        elif concentration_ref == CONCENTRATION_REF_NM:
-            return aliquot.concentration_nm
-        else:
-            raise NotImplementedError(
-                "Concentration ref {} not implemented".format(
-                    concentration_ref)
-            )
+        return _referenced_concentration(aliquot, concentration_ref)
 
     def _referenced_requested_concentration(self, aliquot=None, concentration_ref=None):
-        if concentration_ref == CONCENTRATION_REF_NGUL:
-            return aliquot.requested_concentration_ngul
-        elif concentration_ref == CONCENTRATION_REF_NM:
-            return aliquot.requested_concentration_nm
-        else:
-            raise NotImplementedError(
-                "Concentration ref {} not implemented".format(
-                    concentration_ref)
-            )
+        return _referenced_requested_concentration(aliquot, concentration_ref)
+
+
+def _referenced_concentration(aliquot, concentration_ref):
+    if concentration_ref == CONCENTRATION_REF_NGUL:
+        return aliquot.concentration_ngul
+    elif concentration_ref == CONCENTRATION_REF_NM:
+        return aliquot.concentration_nm
+    else:
+        raise NotImplementedError(
+            "Concentration ref {} not implemented".format(
+                concentration_ref)
+        )
+
+
+def _referenced_requested_concentration(aliquot, concentration_ref):
+    if concentration_ref == CONCENTRATION_REF_NGUL:
+        return aliquot.requested_concentration_ngul
+    elif concentration_ref == CONCENTRATION_REF_NM:
+        return aliquot.requested_concentration_nm
+    else:
+        raise NotImplementedError(
+            "Concentration ref {} not implemented".format(
+                concentration_ref)
+        )
 
 
 class SingleTransfer(object):
@@ -102,29 +116,402 @@ class SingleTransfer(object):
         self.target_aliquot_name = destination_endpoint.aliquot_name
 
     def __str__(self):
-        source = "source({}/{}, conc={})".format(self.source_container,
-                                                 self.source_well, self.source_concentration)
-        target = "target({}/{}, conc={}, vol={})".format(self.target_container, self.target_well,
-                                                         self.requested_concentration, self.requested_volume)
-        return "{} => {}".format(source, target)
+        return _transfer_str(self)
+
+    def __repr__(self):
+        return "<SingleTransfer {}>".format(self.aliquot_name)
+
+
+def _transfer_str(transfer):
+    source = "source({}/{}, conc={})".format(transfer.source_container,
+                                             transfer.source_well, transfer.source_concentration)
+    target = "target({}/{}, conc={}, vol={})".format(transfer.target_container, transfer.target_well,
+                                                     transfer.requested_concentration, transfer.requested_volume)
+    return "{} => {}".format(source, target)
+
+
+class TransferTable(object):
+    """
+    The transfers of a dilution scheme, stored column by column rather than as one object per transfer.
+
+    Rows are accessed through `TransferRow` views, which have the same attributes as `SingleTransfer`.
+    There is one view per row, so views can be used as dictionary keys. Setting an attribute on a view
+    sets the value in the table. Other attributes set on a view, e.g. by extensions, are kept in a
+    dictionary per row in the extras column.
+    """
+
+    # Columns in array('d'), where None is stored as NaN. Whether each value was an int is kept in a
+    # bytearray column, so that values are read back as they were set, e.g. 0 rather than 0.0
+    FLOAT_COLUMNS = ["source_concentration", "source_initial_volume", "requested_concentration",
+                     "requested_volume", "sample_volume", "buffer_volume"]
+    INT_FLAG_COLUMNS = {name: name + "_is_int" for name in FLOAT_COLUMNS}
+    OBJECT_COLUMNS = ["pair", "aliquot_name", "is_control", "is_source_from_original",
+                      "source_aliquot", "source_well", "source_container", "source_well_index", "source_plate_pos",
+                      "destination_aliquot", "target_aliquot_name", "target_well", "target_container",
+                      "target_well_index", "target_plate_pos", "has_to_evaporate", "sort_key"]
+    # Columns in a bytearray
+    BOOL_COLUMNS = ["scaled_up"]
+    # A column with a dictionary of other attributes per row, or None if there are none
+    EXTRAS_COLUMN = "extras"
+
+    def __init__(self, concentration_ref=None):
+        self.concentration_ref = concentration_ref
+        self.columns = dict()
+        for name in self.FLOAT_COLUMNS:
+            self.columns[name] = array("d")
+            self.columns[self.INT_FLAG_COLUMNS[name]] = bytearray()
+        for name in self.OBJECT_COLUMNS:
+            self.columns[name] = list()
+        for name in self.BOOL_COLUMNS:
+            self.columns[name] = bytearray()
+        self.columns[self.EXTRAS_COLUMN] = list()
+        self.rows = list()
+
+    @staticmethod
+    def create(aliquot_pairs, concentration_ref, include_blanks=True):
+        """Creates a table with one transfer per pair, from its input to its output artifact"""
+        pairs = list()
+        is_controls = list()
+        for pair in aliquot_pairs:
+            is_control = getattr(pair.input_artifact, "is_control", False)
+            if is_control is False or include_blanks:
+                pairs.append(pair)
+                is_controls.append(is_control)
+        sources = [pair.input_artifact for pair in pairs]
+        destinations = [pair.output_artifact for pair in pairs]
+
+        table = TransferTable(concentration_ref)
+        input_columns = TransferTable._input_columns(sources, destinations, concentration_ref)
+        table.extend(
+            len(pairs),
+            pair=pairs,
+            aliquot_name=[source.name for source in sources],
+            is_control=is_controls,
+            is_source_from_original=[source.is_from_original for source in sources],
+            source_aliquot=sources,
+            source_well=[source.well for source in sources],
+            source_container=[source.container for source in sources],
+            destination_aliquot=destinations,
+            target_aliquot_name=[destination.name for destination in destinations],
+            target_well=[destination.well for destination in destinations],
+            target_container=[destination.container for destination in destinations],
+            **input_columns)
+        return table
+
+    @staticmethod
+    def _input_columns(sources, destinations, concentration_ref):
+        """The columns that are read from the UDFs of the artifacts"""
+        return dict(
+            source_concentration=[_referenced_concentration(source, concentration_ref) for source in sources],
+            source_initial_volume=[source.volume for source in sources],
+            requested_concentration=[_referenced_requested_concentration(destination, concentration_ref)
+                                     for destination in destinations],
+            requested_volume=[get_and_apply(destination.__dict__, "requested_volume", None, float)
+                              for destination in destinations])
+
+    def read_inputs(self, indexes):
+        """Reads the columns that come from the UDFs of the artifacts again, for the rows"""
+        pairs = [self.columns["pair"][ix] for ix in indexes]
+        input_columns = self._input_columns([pair.input_artifact for pair in pairs],
+                                            [pair.output_artifact for pair in pairs], self.concentration_ref)
+        for name, values in input_columns.items():
+            self.set_row_values(name, indexes, values)
+
+    def extend(self, count, **columns):
+        """
+        Appends count rows, with the values of each column given as a list. Columns that are not given are
+        None (or False).
+        """
+        start = len(self.rows)
+        for name in self.FLOAT_COLUMNS + self.OBJECT_COLUMNS + self.BOOL_COLUMNS:
+            column = self.columns[name]
+            values = columns.get(name)
+            if values is None:
+                values = [None] * count
+            if name in self.FLOAT_COLUMNS:
+                column.extend(NAN if value is None else value for value in values)
+                self.columns[self.INT_FLAG_COLUMNS[name]].extend(_int_flags(values))
+            elif name in self.BOOL_COLUMNS:
+                column.extend(bool(value) for value in values)
+            else:
+                column.extend(values)
+        self.columns[self.EXTRAS_COLUMN].extend([None] * count)
+        self.rows.extend(TransferRow(self, ix) for ix in xrange(start, start + count))
+
+    def append_copies(self, indexes):
+        """Appends a copy of each of the rows. Returns the indexes of the copies."""
+        start = len(self.rows)
+        for name, column in self.columns.items():
+            if name == self.EXTRAS_COLUMN:
+                column.extend([_copy_extras(column[ix]) for ix in indexes])
+            else:
+                column.extend([column[ix] for ix in indexes])
+        self.rows.extend(TransferRow(self, ix) for ix in xrange(start, start + len(indexes)))
+        return range(start, start + len(indexes))
+
+    def copy_rows(self, indexes, to_indexes):
+        """Copies each of the rows to the row at the same position in to_indexes"""
+        for name, column in self.columns.items():
+            copy_value = _copy_extras if name == self.EXTRAS_COLUMN else None
+            for ix, to_ix in zip(indexes, to_indexes):
+                column[to_ix] = copy_value(column[ix]) if copy_value else column[ix]
+
+    def row_values(self, name, indexes):
+        """Returns the values of the column in the rows, with None rather than NaN for missing values"""
+        column = self.columns[name]
+        if name in self.BOOL_COLUMNS:
+            return [bool(column[ix]) for ix in indexes]
+        if name in self.FLOAT_COLUMNS:
+            int_flags = self.columns[self.INT_FLAG_COLUMNS[name]]
+            return [_from_float(column[ix], int_flags[ix]) for ix in indexes]
+        return [column[ix] for ix in indexes]
+
+    def set_row_values(self, name, indexes, values):
+        column = self.columns[name]
+        int_flags = self.columns.get(self.INT_FLAG_COLUMNS.get(name))
+        for ix, value in zip(indexes, values):
+            if name in self.FLOAT_COLUMNS:
+                column[ix] = NAN if value is None else value
+                int_flags[ix] = type(value) in _INT_TYPES
+            elif name in self.BOOL_COLUMNS:
+                column[ix] = bool(value)
+            else:
+                column[ix] = value
+
+    def values(self, name):
+        """Returns the values of the column, with None rather than NaN for missing values"""
+        column = self.columns[name]
+        if name in self.BOOL_COLUMNS:
+            return [bool(value) for value in column]
+        if name in self.FLOAT_COLUMNS:
+            int_flags = self.columns[self.INT_FLAG_COLUMNS[name]]
+            return [_from_float(value, is_int) for value, is_int in zip(column, int_flags)]
+        return column
+
+    def set_values(self, name, values):
+        column = self.columns[name]
+        if name in self.FLOAT_COLUMNS:
+            column[:] = array("d", (NAN if value is None else value for value in values))
+            self.columns[self.INT_FLAG_COLUMNS[name]][:] = _int_flags(values)
+        elif name in self.BOOL_COLUMNS:
+            column[:] = bytearray(bool(value) for value in values)
+        else:
+            column[:] = values
+
+    def memory_size(self):
+        """The approximate number of bytes used by the table and its row views"""
+        return sum(sys.getsizeof(column) for column in self.columns.values()) + \
+            sys.getsizeof(self.rows) + sum(sys.getsizeof(row) for row in self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+_INT_TYPES = frozenset([int, long])
+
+
+def _copy_extras(extras):
+    # A copy of a row has its own attributes, like a copy of a SingleTransfer
+    return dict(extras) if extras else None
+
+
+def _int_flags(values):
+    """Whether each of the values is an int, as a bytearray"""
+    return bytearray(map(_INT_TYPES.__contains__, map(type, values)))
+
+
+def _from_float(value, is_int):
+    # NaN is the only value that isn't equal to itself
+    if value != value:
+        return None
+    return int(value) if is_int else value
+
+
+def _float_column_property(name):
+    int_flag_name = TransferTable.INT_FLAG_COLUMNS[name]
+
+    def get(self):
+        columns = self.table.columns
+        value = columns[name][self.index]
+        if value != value:
+            return None
+        return int(value) if columns[int_flag_name][self.index] else value
+
+    def set(self, value):
+        columns = self.table.columns
+        if value is None:
+            columns[name][self.index] = NAN
+            columns[int_flag_name][self.index] = 0
+        else:
+            columns[name][self.index] = value
+            columns[int_flag_name][self.index] = type(value) in _INT_TYPES
+    return property(get, set)
+
+
+def _column_property(name, convert=None):
+    def get(self):
+        value = self.table.columns[name][self.index]
+        return convert(value) if convert else value
+
+    def set(self, value):
+        self.table.columns[name][self.index] = value
+    return property(get, set)
+
+
+class TransferRow(object):
+    """
+    A view of one row in a `TransferTable`, looking like a `SingleTransfer`.
+
+    Attributes that aren't columns can be set as well, and are kept in the extras column of the row.
+    """
+    __slots__ = ["table", "index"]
+
+    def __init__(self, table, index):
+        # Set through the slots directly, as there is one view per row
+        _set_table(self, table)
+        _set_index(self, index)
+
+    def __getattr__(self, name):
+        # Only called for attributes that aren't columns or slots
+        if name in TransferRow.__slots__:
+            raise AttributeError(name)
+        extras = self.table.columns[TransferTable.EXTRAS_COLUMN][self.index]
+        try:
+            return extras[name]
+        except (TypeError, KeyError):
+            raise AttributeError("'TransferRow' object has no attribute '{}'".format(name))
+
+    def __setattr__(self, name, value):
+        setter = _ROW_SETTERS.get(name)
+        if setter is not None:
+            setter(self, value)
+            return
+        if name in _ROW_ATTRIBUTES:
+            object.__setattr__(self, name, value)
+            return
+        extras_column = self.table.columns[TransferTable.EXTRAS_COLUMN]
+        if extras_column[self.index] is None:
+            extras_column[self.index] = dict()
+        extras_column[self.index][name] = value
+
+    def __delattr__(self, name):
+        extras = self.table.columns[TransferTable.EXTRAS_COLUMN][self.index]
+        if name in _ROW_ATTRIBUTES or not extras or name not in extras:
+            object.__delattr__(self, name)
+        else:
+            del extras[name]
+
+    @property
+    def pair_id(self):
+        return id(self.pair)
+
+    @property
+    def source_endpoint(self):
+        return TransferEndpoint(self.source_aliquot, self.table.concentration_ref)
+
+    @property
+    def destination_endpoint(self):
+        return TransferEndpoint(self.destination_aliquot, self.table.concentration_ref)
+
+    def __str__(self):
+        return _transfer_str(self)
 
     def __repr__(self):
         return "<SingleTransfer {}>".format(self.aliquot_name)
 
 
+for _name in TransferTable.FLOAT_COLUMNS:
+    setattr(TransferRow, _name, _float_column_property(_name))
+for _name in TransferTable.OBJECT_COLUMNS:
+    setattr(TransferRow, _name, _column_property(_name))
+for _name in TransferTable.BOOL_COLUMNS:
+    setattr(TransferRow, _name, _column_property(_name, bool))
+
+# Attributes of TransferRow itself, all others are set in the extras of the row
+_ROW_ATTRIBUTES = frozenset(TransferRow.__slots__ + dir(TransferRow))
+_set_table = TransferRow.table.__set__
+_set_index = TransferRow.index.__set__
+_ROW_SETTERS = {name: getattr(TransferRow, name).fset for name in
+                TransferTable.FLOAT_COLUMNS + TransferTable.OBJECT_COLUMNS + TransferTable.BOOL_COLUMNS}
+_ROW_SETTERS.update(table=_set_table, index=_set_index)
+
+
+class WellIndexLayouts(object):
+    """
+    The index of each well on the deck of each robot, by plate size.
+
+    A robot is registered with a table, which is either the order the robot numbers wells in or the index
+    of each position. The indexes of all wells of a plate size are looked up in it once, and kept in an
+    array by slot (see ContainerLayout).
+    """
+
+    def __init__(self):
+        self._tables = dict()
+        self._indexes = dict()
+
+    def register(self, robot_name, table, plate_size=None):
+        """
+        :param table: Container.DOWN_FIRST or Container.RIGHT_FIRST, or a dict from each position
+        to its index, e.g. {"A:1": 1, "B:1": 2, ...}
+        :param plate_size: The plate size the table is for. If None, it's used for all plate sizes
+        that no table has been registered for.
+        """
+        self._tables[(robot_name, plate_size)] = table
+        for key in [key for key in self._indexes if key[0] == robot_name]:
+            del self._indexes[key]
+
+    def __contains__(self, robot_name):
+        return any(key[0] == robot_name for key in self._tables)
+
+    def indexes(self, robot_name, layout):
+        """Returns the index of each well of the container layout on the robot, by slot"""
+        key = (robot_name, layout.size)
+        ret = self._indexes.get(key)
+        if ret is None:
+            table = self._tables.get(key, self._tables.get((robot_name, None)))
+            if table is None:
+                raise KeyError("No well indexes registered for robot {} and plate size {}x{}".format(
+                    robot_name, layout.size.height, layout.size.width))
+            ret = self._create_indexes(robot_name, table, layout)
+            self._indexes[key] = ret
+        return ret
+
+    @staticmethod
+    def _create_indexes(robot_name, table, layout):
+        if table == Container.DOWN_FIRST:
+            return array("i", range(1, len(layout) + 1))
+        if table == Container.RIGHT_FIRST:
+            return array("i", (ix + 1 for ix in layout.right_first_index))
+        ret = array("i", [0]) * len(layout)
+        for key, index in table.items():
+            ret[layout.slot(key)] = index
+        if 0 in ret:
+            raise ValueError("The well indexes of robot {} don't cover all wells of a {}x{} plate".format(
+                robot_name, layout.size.height, layout.size.width))
+        return ret
+
+
+# The well indexes used by all positioners. Register a table here to support another robot.
+well_index_layouts = WellIndexLayouts()
+well_index_layouts.register("Hamilton", Container.DOWN_FIRST)
+
+
 class EndpointPositioner(object):
     """
     Handles positions for all plates and wells for either source or
     destination placement on a robot deck
     """
 
-    def __init__(self, robot_name, transfer_endpoints, plate_size, plate_pos_prefix):
+    def __init__(self, robot_name, containers, plate_size, plate_pos_prefix):
+        """
+        :param containers: The container of each transfer endpoint
+        """
         self.robot_name = robot_name
         self._plate_size = plate_size
-        index_method_map = {"Hamilton": lambda well: well.index_down_first}
-        self.indexer = index_method_map[robot_name]
-        self.plate_sorting_map = self._build_plate_sorting_map(
-            [transfer_endpoint.container for transfer_endpoint in transfer_endpoints])
+        if robot_name not in well_index_layouts:
+            raise KeyError("No well indexes registered for robot {}".format(robot_name))
+        self.indexer = lambda well: self.well_indexes([well])[0]
+        self.plate_sorting_map = self._build_plate_sorting_map(containers)
         self.plate_position_map = self._build_plate_position_map(
             self.plate_sorting_map, plate_pos_prefix)
 
@@ -151,6 +538,19 @@ class EndpointPositioner(object):
         plate_position_numbers = dict(zip(unique_containers, positions))
         return plate_position_numbers
 
+    def well_indexes(self, wells):
+        """The index of each well on the robot, looked up in the well indexes of its plate size"""
+        indexes_by_container = dict()
+        ret = list()
+        for well in wells:
+            container = well.container
+            indexes = indexes_by_container.get(id(container))
+            if indexes is None:
+                indexes = well_index_layouts.indexes(self.robot_name, container.layout)
+                indexes_by_container[id(container)] = indexes
+            ret.append(indexes[well.slot])
+        return ret
+
     def find_sort_number(self, transfer):
         """Sort dilutes according to plate and well positions
         """
@@ -165,8 +565,16 @@ class EndpointPositioner(object):
     def __str__(self):
         return "<{type} {robot} {height}x{width}>".format(type=self.__class__.__name__,
                                                           robot=self.robot_name,
-                                                          height=self._plate_size.size.height,
-                                                          width=self._plate_size.size.width)
+                                                          height=self._plate_size.height,
+                                                          width=self._plate_size.width)
+
+
+def down_first_sort_key(plate_rank, source_well, pipetting_volume):
+    """
+    Orders transfers by source plate and source well, indexed down first. Transfers
+    from the same well, e.g. split up rows, are ordered with the largest volume first.
+    """
+    return plate_rank, source_well.index_down_first, -pipetting_volume
 
 
 class RobotDeckPositioner(object):
@@ -175,20 +583,31 @@ class RobotDeckPositioner(object):
     as well as well indexing
     """
 
-    def __init__(self, robot_name, dilutes, plate_size):
+    # The order of the transfers for each robot, as a function returning the sort key of a transfer
+    # given the rank of its source plate, its source well and its pipetting volume. Robots that
+    # are not in here are sorted with down_first_sort_key.
+    SORT_KEY_FUNCTIONS = {"Hamilton": down_first_sort_key}
 
-        source_endpoints = [dilute.source_endpoint for dilute in dilutes]
-        source_positioner = EndpointPositioner(robot_name, source_endpoints,
+    def __init__(self, robot_name, dilutes, plate_size, ordering=None):
+        """
+        :param ordering: Orders the transfers after they have been sorted, e.g. a
+        dilution_ordering.ChannelBatchOrdering. If None, the sort order is kept.
+        """
+
+        source_containers = [dilute.source_container for dilute in dilutes]
+        source_positioner = EndpointPositioner(robot_name, source_containers,
                                                plate_size, "DNA")
-        destination_endpoints = [
-            dilute.destination_endpoint for dilute in dilutes]
+        destination_containers = [dilute.target_container for dilute in dilutes]
         destination_positioner = EndpointPositioner(
-            robot_name, destination_endpoints, plate_size, "END")
+            robot_name, destination_containers, plate_size, "END")
 
         self._robot_name = robot_name
         self._plate_size = plate_size
         self._source_positioner = source_positioner
         self.indexer = source_positioner.indexer
+        self.well_indexes = source_positioner.well_indexes
+        self.sort_key = self.SORT_KEY_FUNCTIONS.get(robot_name, down_first_sort_key)
+        self.ordering = ordering
         self.source_plate_position_map = source_positioner.plate_position_map
         self.target_plate_position_map = destination_positioner.plate_position_map
 
@@ -197,6 +616,19 @@ class RobotDeckPositioner(object):
         """
         return self._source_positioner.find_sort_number(dilute)
 
+    def sort_keys(self, source_containers, source_wells, pipetting_volumes):
+        """The sort keys of many transfers, given their source containers, source wells and pipetting volumes"""
+        plate_ranks = self._source_positioner.plate_sorting_map
+        sort_key = self.sort_key
+        return [sort_key(plate_ranks[container.id], well, pipetting_volume)
+                for container, well, pipetting_volume in zip(source_containers, source_wells, pipetting_volumes)]
+
+    def order(self, transfers):
+        """Orders the sorted transfers for the robot"""
+        if self.ordering is None:
+            return list(transfers)
+        return self.ordering.order(transfers)
+
     def __str__(self):
         return "<{type} {robot} {height}x{width}>".format(type=self.__class__.__name__,
                                                           robot=self._robot_name,
@@ -204,12 +636,26 @@ class RobotDeckPositioner(object):
                                                           width=self._plate_size.width)
 
 
+def _insert_sorted(items, new_items, key):
+    """Inserts the new items in the list that is sorted on key, finding their positions by binary search"""
+    for item in new_items:
+        item_key = key(item)
+        low, high = 0, len(items)
+        while low < high:
+            middle = (low + high) // 2
+            if key(items[middle]) < item_key:
+                low = middle + 1
+            else:
+                high = middle
+        items.insert(low, item)
+
+
 class DilutionScheme(object):
     """Creates a dilution scheme, given input and output analytes."""
 
     def __init__(self, artifact_service, robot_name, scale_up_low_volumes=True,
                  concentration_ref=None, include_blanks=False, error_log_artifact=None,
-                 volume_calc_strategy=None):
+                 volume_calc_strategy=None, ordering=None):
         """
         Calculates all derived values needed in dilute driver file.
         """
@@ -221,17 +667,21 @@ class DilutionScheme(object):
         # TODO: Is it safe to just check for the container for the first output
         # analyte?
         container = pairs[0].output_artifact.container
-        all_transfers = self._create_transfers(
-            pairs, concentration_ref=concentration_ref)
-        self.transfers = self._filtered_transfers(
-            all_transfers=all_transfers, include_blanks=include_blanks)
+        # TODO: handle tube racks
+        self.transfer_table = TransferTable.create(
+            pairs, concentration_ref=concentration_ref, include_blanks=include_blanks)
+        self.transfers = list(self.transfer_table.rows)
+        # Rows after these are copies of them, from splitting up transfers with high volumes
+        self._original_count = len(self.transfer_table)
+        self._copies_by_index = dict()
+        self._copy_origins = dict()
 
-        self.aliquot_pair_by_transfer = self._map_pair_and_transfers(pairs=pairs)
         self.robot_deck_positioner = RobotDeckPositioner(
-            robot_name, self.transfers, container.size)
+            robot_name, self.transfers, container.size, ordering=ordering)
 
         self.calculate_transfer_volumes()
         self.split_up_high_volume_rows()
+        self.aliquot_pair_by_transfer = dict(zip(self.transfer_table.rows, self.transfer_table.values("pair")))
         self.do_positioning()
         self.sort_transfers()
         self.grouped_transfers = list(self._grouped_transfers())
@@ -242,33 +692,16 @@ class DilutionScheme(object):
         split up on several rows, due to the max pipetting volume of 50 ul.
         :return: An iterable group of transfers for a common destination well.
         """
-        for key, transfer_group in groupby(
-                self.transfers, key=lambda t: "{}{}".format(
-                    t.target_container, t.target_well.position)):
+        table = self.transfer_table
+        container_names = dict()
+        for container in table.values("target_container"):
+            if id(container) not in container_names:
+                container_names[id(container)] = str(container)
+        keys = [(container_names[id(container)], well.position) for container, well
+                in zip(table.values("target_container"), table.values("target_well"))]
+        for key, transfer_group in groupby(self.transfers, key=lambda t: keys[t.index]):
             yield list(transfer_group)
 
-    def _filtered_transfers(self, all_transfers, include_blanks):
-        if include_blanks:
-            return all_transfers
-        else:
-            return list(t for t in all_transfers if t.is_control is False)
-
-    def _create_transfers(self, aliquot_pairs, concentration_ref=None):
-        # TODO: handle tube racks
-        transfers = []
-        for pair in aliquot_pairs:
-            source_endpoint = TransferEndpoint(
-                pair.input_artifact, concentration_ref=concentration_ref)
-            destination_endpoint = TransferEndpoint(
-                pair.output_artifact, concentration_ref=concentration_ref)
-            transfers.append(SingleTransfer(
-                source_endpoint, destination_endpoint, pair_id=id(pair)))
-        return transfers
-
-    def _map_pair_and_transfers(self, pairs):
-        pair_dict = {id(pair): pair for pair in pairs}
-        return {transfer: pair_dict[transfer.pair_id] for transfer in self.transfers}
-
     def calculate_transfer_volumes(self):
         # Handle volumes etc.
         self.volume_calc_strategy.calculate_transfer_volumes(
@@ -280,85 +713,148 @@ class DilutionScheme(object):
         several rows, if sample volume or buffer volume exceeds 50 ul
         :return:
         """
-        added_transfers = []
-        for transfer in self.transfers:
-            calculation_volume = max(
-                self._get_volume(transfer.sample_volume), self._get_volume(transfer.buffer_volume))
-            (n, residual) = divmod(calculation_volume, PIPETTING_MAX_VOLUME)
-            if residual > 0:
-                total_rows = int(n + 1)
-            else:
-                total_rows = int(n)
+        added = self._split_rows([transfer.index for transfer in self.transfers])
+        self.transfers += [self.transfer_table.rows[ix] for ix in added]
 
-            copies = self._create_copies(transfer, total_rows)
-            added_transfers += copies
-            self._split_up_volumes(
-                [transfer] + copies, transfer.sample_volume, transfer.buffer_volume)
-
-        self.transfers += added_transfers
-
-    @staticmethod
-    def _create_copies(transfer, total_rows):
+    def _split_rows(self, indexes):
         """
-        Create copies of transfer, if duplication_number > 1,
-        that will cause extra rows in the driver file.
-        Initiate both buffer volume and sample volume to zero
-        :param transfer: The transfer to be copied
-        :param total_rows: The total number of rows needed for a
-        transfer between source well x and target well y
-        :return:
+        Splits up the rows, which must not be copies. Copies from an earlier split of a row are
+        reused, other copies are added after all rows. Returns the indexes of the copies, in the same
+        order as the rows.
         """
-        copies = []
-        for i in xrange(0, total_rows - 1):
-            t = copy.copy(transfer)
-            t.buffer_volume = 0
-            t.sample_volume = 0
-            copies.append(t)
-
-        return copies
-
-    @staticmethod
-    def _split_up_volumes(transfers, original_sample_volume, original_buffer_volume):
+        table = self.transfer_table
+        get_volume = self._get_volume
+        number_copies = list()
+        for ix, sample_volume, buffer_volume in zip(indexes, table.row_values("sample_volume", indexes),
+                                                    table.row_values("buffer_volume", indexes)):
+            calculation_volume = max(get_volume(sample_volume), get_volume(buffer_volume))
+            (n, residual) = divmod(calculation_volume, PIPETTING_MAX_VOLUME)
+            total_rows = int(n + 1) if residual > 0 else int(n)
+            number_copies.append(max(total_rows - 1, 0))
+
+        # Copies of a transfer are added after all transfers, in the same order as them
+        to_copy = list()
+        for ix, count in zip(indexes, number_copies):
+            to_copy.extend([ix] * (count - len(self._copies_by_index.get(ix, []))))
+        added = iter(table.append_copies(to_copy))
+        reused = list()
+        for ix, count in zip(indexes, number_copies):
+            copies = self._copies_by_index.pop(ix, [])
+            for copy_ix in copies:
+                del self._copy_origins[copy_ix]
+            copies = copies[:count]
+            reused.extend((ix, copy_ix) for copy_ix in copies)
+            copies += [next(added) for _ in xrange(count - len(copies))]
+            if copies:
+                self._copies_by_index[ix] = copies
+                for number, copy_ix in enumerate(copies):
+                    self._copy_origins[copy_ix] = (ix, number)
+        table.copy_rows([ix for ix, _ in reused], [copy_ix for _, copy_ix in reused])
+
+        # Copies only get a volume if it exceeds the max volume, which is then split evenly on all rows
+        ret = list()
+        sample_volumes = table.columns["sample_volume"]
+        buffer_volumes = table.columns["buffer_volume"]
+        sample_is_int = table.columns[table.INT_FLAG_COLUMNS["sample_volume"]]
+        buffer_is_int = table.columns[table.INT_FLAG_COLUMNS["buffer_volume"]]
+        for ix in indexes:
+            copies = self._copies_by_index.get(ix)
+            if not copies:
+                continue
+            ret.extend(copies)
+            number_rows = len(copies) + 1
+            original_sample_volume = _from_float(sample_volumes[ix], sample_is_int[ix])
+            original_buffer_volume = _from_float(buffer_volumes[ix], buffer_is_int[ix])
+            # Copies have the volumes of a copy of a SingleTransfer, the int 0
+            for copy_ix in copies:
+                sample_volumes[copy_ix] = buffer_volumes[copy_ix] = 0
+                sample_is_int[copy_ix] = buffer_is_int[copy_ix] = 1
+            for row_ix in [ix] + copies:
+                if original_buffer_volume > PIPETTING_MAX_VOLUME:
+                    buffer_volumes[row_ix] = float(original_buffer_volume / number_rows)
+                    buffer_is_int[row_ix] = 0
+                if original_sample_volume > PIPETTING_MAX_VOLUME:
+                    sample_volumes[row_ix] = float(original_sample_volume / number_rows)
+                    sample_is_int[row_ix] = 0
+        return ret
+
+    def calculate_sort_keys(self, indexes=None):
         """
-        Split up any transferring volume exceeding 50 ul to multiple rows represented by the
-         list 'transfers'
-        :param transfers: Represents rows in driver file,
-        needed for a transfer between source well x and target well y
-        :param original_sample_volume: Sample volume first calculated for a single row transfer,
-        that might exceed 50 ul
-        :param original_buffer_volume: Buffer volume first calculated for a single row transfer,
-        that might exceed 50 ul
-        :return:
+        Calculates the sort key of the transfers once, in the sort_key column, so that sorting
+        only compares the keys. All transfers are calculated if indexes is None.
         """
-        number_rows = len(transfers)
-        for t in transfers:
-            # Only split up pipetting volume if the actual volume exceeds
-            # max of 50 ul. Otherwise, the min volume of 2 ul might be
-            # violated.
-            if original_buffer_volume > PIPETTING_MAX_VOLUME:
-                t.buffer_volume = float(
-                    original_buffer_volume / number_rows)
-
-            if original_sample_volume > PIPETTING_MAX_VOLUME:
-                t.sample_volume = float(
-                    original_sample_volume / number_rows)
+        table = self.transfer_table
+        if indexes is None:
+            indexes = range(len(table))
+        get_volume = self._get_volume
+        pipetting_volumes = [get_volume(buffer_volume) + get_volume(sample_volume) for buffer_volume, sample_volume
+                             in zip(table.row_values("buffer_volume", indexes),
+                                    table.row_values("sample_volume", indexes))]
+        table.set_row_values("sort_key", indexes, self.robot_deck_positioner.sort_keys(
+            table.row_values("source_container", indexes), table.row_values("source_well", indexes),
+            pipetting_volumes))
 
     def sort_transfers(self):
-        def pipetting_volume(transfer):
-            return self._get_volume(transfer.buffer_volume) + self._get_volume(transfer.sample_volume)
+        # Sort on source position, and in case of splitted rows, pipetting
+        # volumes. Let max pipetting volumes be shown first. The sort is stable,
+        # so transfers with equal keys keep their order
+        self.calculate_sort_keys()
+        keys = self.transfer_table.columns["sort_key"]
+        self._sorted_transfers = sorted(self.transfers, key=lambda t: keys[t.index])
+        self.transfers = self.robot_deck_positioner.order(self._sorted_transfers)
+
+    def _sort_order(self, ix):
+        """
+        The position of the row when sorting, which is the sort key followed by the order of the rows
+        before sorting: all transfers in the order of the pairs, then their copies
+        """
+        key = self.transfer_table.columns["sort_key"][ix]
+        if ix < self._original_count:
+            return key, 0, ix, 0
+        origin, number = self._copy_origins[ix]
+        return key, 1, origin, number
 
-        def max_added_pip_volume():
-            volumes = map(lambda t: (self._get_volume(t.buffer_volume),
-                                     self._get_volume(t.sample_volume)), self.transfers)
-            return max(map(lambda (buffer_vol, sample_vol): buffer_vol + sample_vol, volumes))
+    def update(self, artifacts):
+        """
+        Calculates the transfers of the artifacts again, after the UDFs of the artifacts have been changed,
+        e.g. the requested concentration of an output analyte. The positions of the artifacts must not have
+        been changed.
 
-        # Sort on source position, and in case of splitted rows, pipetting
-        # volumes. Let max pipetting volumes be shown first
-        max_vol = max_added_pip_volume()
-        self.transfers = sorted(self.transfers,
-                                key=lambda t:
-                                self.robot_deck_positioner.find_sort_number(t) +
-                                (max_vol - pipetting_volume(t)) / (max_vol + 1.0))
+        Only the transfers of the artifacts, and the other transfers to the same pool, are calculated and
+        split up again, and then inserted among the sorted transfers. The result is the same as creating
+        the scheme again. Copies of rows that are no longer needed are left unused in the transfer table.
+        """
+        table = self.transfer_table
+        artifact_ids = {id(artifact) for artifact in artifacts}
+        pairs = table.columns["pair"]
+        target_names = table.columns["target_aliquot_name"]
+        pools = {target_names[ix] for ix in xrange(self._original_count)
+                 if id(pairs[ix].input_artifact) in artifact_ids or id(pairs[ix].output_artifact) in artifact_ids}
+        indexes = [ix for ix in xrange(self._original_count) if target_names[ix] in pools]
+        if not indexes:
+            return
+
+        table.read_inputs(indexes)
+        for name in ["sample_volume", "buffer_volume", "has_to_evaporate", "scaled_up"]:
+            table.set_row_values(name, indexes, [None] * len(indexes))
+        self.volume_calc_strategy.calculate_transfer_volumes(
+            transfers=[table.rows[ix] for ix in indexes], scale_up_low_volumes=self.scale_up_low_volumes)
+
+        previous_copies = [copy_ix for ix in indexes for copy_ix in self._copies_by_index.get(ix, [])]
+        copies = self._split_rows(indexes)
+        for copy_ix in previous_copies:
+            del self.aliquot_pair_by_transfer[table.rows[copy_ix]]
+        for copy_ix in copies:
+            self.aliquot_pair_by_transfer[table.rows[copy_ix]] = pairs[copy_ix]
+
+        changed = indexes + copies
+        self.calculate_sort_keys(changed)
+        removed = set(indexes + previous_copies)
+        self._sorted_transfers = [transfer for transfer in self._sorted_transfers if transfer.index not in removed]
+        _insert_sorted(self._sorted_transfers, [table.rows[ix] for ix in changed],
+                       key=lambda t: self._sort_order(t.index))
+        self.transfers = self.robot_deck_positioner.order(self._sorted_transfers)
+        self.grouped_transfers = list(self._grouped_transfers())
 
     @staticmethod
     def _get_volume(volume):
@@ -372,15 +868,16 @@ class DilutionScheme(object):
 
     def do_positioning(self):
         # Handle positioning
-        for transfer in self.transfers:
-            transfer.source_well_index = self.robot_deck_positioner.indexer(
-                transfer.source_well)
-            transfer.source_plate_pos = self.robot_deck_positioner. \
-                source_plate_position_map[transfer.source_container.id]
-            transfer.target_well_index = self.robot_deck_positioner.indexer(
-                transfer.target_well)
-            transfer.target_plate_pos = self.robot_deck_positioner \
-                .target_plate_position_map[transfer.target_container.id]
+        table = self.transfer_table
+        positioner = self.robot_deck_positioner
+        source_plate_positions = positioner.source_plate_position_map
+        target_plate_positions = positioner.target_plate_position_map
+        table.set_values("source_well_index", positioner.well_indexes(table.values("source_well")))
+        table.set_values("source_plate_pos", [source_plate_positions[container.id]
+                                              for container in table.values("source_container")])
+        table.set_values("target_well_index", positioner.well_indexes(table.values("target_well")))
+        table.set_values("target_plate_pos", [target_plate_positions[container.id]
+                                              for container in table.values("target_container")])
 
     def __str__(self):
         return "<DilutionScheme positioner={}>".format(self.robot_deck_positioner)
@@ -388,15 +885,27 @@ class DilutionScheme(object):
     @staticmethod
     def create(artifact_service, robot_name, scale_up_low_volumes=True,
                concentration_ref=None, include_blanks=False, error_log_artifact=None,
-               volume_calc_method=None, make_pools=False):
+               volume_calc_method=None, make_pools=False, engine=ENGINE_PYTHON, ordering=None):
+        """
+        :param engine: ENGINE_NUMPY calculates the volumes of all transfers at once with NumPy.
+        The results are the same.
+        :param ordering: Orders the transfers for the robot after sorting them, see dilution_ordering.
+        """
         volume_calc_strategy = None
 
+        if engine == ENGINE_PYTHON:
+            import clarity_ext.dilution_strategies as strategies
+        elif engine == ENGINE_NUMPY:
+            import clarity_ext.dilution_strategies_batch as strategies
+        else:
+            raise ValueError("Engine {} is not implemented".format(engine))
+
         if volume_calc_method == VOLUME_CALC_FIXED:
-            volume_calc_strategy = FixedVolumeCalc()
+            volume_calc_strategy = strategies.FixedVolumeCalc()
         elif volume_calc_method == VOLUME_CALC_BY_CONC and make_pools is False:
-            volume_calc_strategy = OneToOneConcentrationCalc()
+            volume_calc_strategy = strategies.OneToOneConcentrationCalc()
         elif volume_calc_method == VOLUME_CALC_BY_CONC and make_pools is True:
-            volume_calc_strategy = PoolConcentrationCalc()
+            volume_calc_strategy = strategies.PoolConcentrationCalc()
         else:
             raise ValueError(
                 "Choice for volume calculation method is not implemented. \n"
@@ -407,4 +916,5 @@ class DilutionScheme(object):
             artifact_service=artifact_service, robot_name=robot_name,
             scale_up_low_volumes=scale_up_low_volumes,
             concentration_ref=concentration_ref, include_blanks=include_blanks,
-            error_log_artifact=error_log_artifact, volume_calc_strategy=volume_calc_strategy)
+            error_log_artifact=error_log_artifact, volume_calc_strategy=volume_calc_strategy,
+            ordering=ordering)
@@ -0,0 +1,123 @@
+# Orderings of the transfers of a DilutionScheme for robots with a multi channel head.
+# Pass one to DilutionScheme.create to order the transfers with it, after they have been
+# sorted on source position and pipetting volume.
+#
+# The robot is modelled as a head with a number of channels that move together between
+# plate columns, each channel with its own tip. A batch is up to one transfer per channel,
+# all from one column of a source plate to one column of a target plate, from distinct
+# rows to distinct rows. The tips are changed for each batch, and a batch takes one
+# aspirate and dispense cycle per row of its longest transfer (transfers that are split
+# up on several rows). A plate is switched whenever the source or target plate differs
+# from the one of the previous batch.
+#
+# All rows of a transfer are kept together, in the order they were given.
+
+from collections import OrderedDict
+
+
+class ChannelBatchOrdering(object):
+    """
+    Orders transfers in batches that use as many channels of the head as possible, grouping
+    the batches by source and target plate so that plates are switched as seldom as possible.
+    """
+
+    CHANNELS = 8
+    # Estimated times in seconds
+    CYCLE_TIME = 10.0
+    TIP_CHANGE_TIME = 8.0
+    PLATE_SWITCH_TIME = 20.0
+
+    def __init__(self, channels=None, cycle_time=None, tip_change_time=None, plate_switch_time=None):
+        self.channels = channels or self.CHANNELS
+        self.cycle_time = cycle_time if cycle_time is not None else self.CYCLE_TIME
+        self.tip_change_time = tip_change_time if tip_change_time is not None else self.TIP_CHANGE_TIME
+        self.plate_switch_time = plate_switch_time if plate_switch_time is not None else self.PLATE_SWITCH_TIME
+
+    def order(self, transfers):
+        """Returns the transfers in batches, see the module comment for the model of the robot"""
+        batches_by_columns = OrderedDict()
+        for unit in _units(transfers):
+            column_batches = batches_by_columns.setdefault(unit.columns, list())
+            for batch in column_batches:
+                if self._fits(batch, unit):
+                    batch.append(unit)
+                    break
+            else:
+                column_batches.append([unit])
+
+        # The batches of each pair of source and target plate are done together, moving to a
+        # pair that shares a plate with the current one whenever there is one
+        batches_by_plates = OrderedDict()
+        for columns, column_batches in batches_by_columns.items():
+            batches_by_plates.setdefault(columns[0::2], list()).extend(column_batches)
+        ret = list()
+        plates = None
+        while batches_by_plates:
+            plates = _next_plates(batches_by_plates, plates)
+            for batch in batches_by_plates.pop(plates):
+                for unit in sorted(batch, key=lambda u: u.source_row):
+                    ret.extend(unit.transfers)
+        return ret
+
+    def estimate_time(self, transfers):
+        """
+        Estimates the time in seconds that the robot takes to do the transfers in the order given,
+        taking consecutive transfers in a batch while they fit in it
+        """
+        batches = list()
+        for unit in _units(transfers):
+            if batches and batches[-1][0].columns == unit.columns and self._fits(batches[-1], unit):
+                batches[-1].append(unit)
+            else:
+                batches.append([unit])
+
+        plate_switches = 0
+        previous = None
+        for batch in batches:
+            plates = batch[0].columns[0::2]
+            if previous is not None:
+                plate_switches += (plates[0] != previous[0]) + (plates[1] != previous[1])
+            previous = plates
+        cycles = sum(max(len(unit.transfers) for unit in batch) for batch in batches)
+        return cycles * self.cycle_time + len(batches) * self.tip_change_time + \
+            plate_switches * self.plate_switch_time
+
+    def _fits(self, batch, unit):
+        return len(batch) < self.channels and \
+            all(unit.source_row != other.source_row and unit.target_row != other.target_row for other in batch)
+
+
+class _TransferUnit(object):
+    """All rows of a transfer from a source well to a target well"""
+
+    def __init__(self, transfer):
+        source_position = transfer.source_well.position
+        target_position = transfer.target_well.position
+        self.columns = (id(transfer.source_container), source_position.col,
+                        id(transfer.target_container), target_position.col)
+        self.source_row = source_position.row
+        self.target_row = target_position.row
+        self.transfers = [transfer]
+
+
+def _units(transfers):
+    """Groups consecutive rows of the same transfer"""
+    ret = list()
+    previous_key = None
+    for transfer in transfers:
+        key = (id(transfer.source_well), id(transfer.target_well))
+        if key == previous_key:
+            ret[-1].transfers.append(transfer)
+        else:
+            ret.append(_TransferUnit(transfer))
+        previous_key = key
+    return ret
+
+
+def _next_plates(batches_by_plates, current):
+    """Returns the next pair of source and target plate, preferring one that shares a plate with current"""
+    if current is not None:
+        for plates in batches_by_plates:
+            if plates[0] == current[0] or plates[1] == current[1]:
+                return plates
+    return next(iter(batches_by_plates))
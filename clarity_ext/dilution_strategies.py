@@ -1,4 +1,4 @@
-# These values, residing in SingleTransfer objects, are calculated in
+# These values, residing in the transfers of a DilutionScheme, are calculated in
 # the these strategy classes (except FixedVolumeCalc)
 #
 # Variables to be used in driver file and udf update calculations:
@@ -18,7 +18,7 @@
 #   both sample volume and buffer volume will be scaled up, still rendering
 #   the right concentration but higher volume than desired.
 
-from itertools import groupby
+from collections import OrderedDict
 
 ROBOT_MIN_VOLUME = 2
 
@@ -94,11 +94,8 @@ class PoolConcentrationCalc:
         pass
 
     def calculate_transfer_volumes(self, transfers=None, scale_up_low_volumes=None):
-        transfers = sorted(transfers, key=lambda t: t.target_aliquot_name)
-        grouped_transfers = groupby(
-            transfers, key=lambda t: t.target_aliquot_name)
-        for key, group in grouped_transfers:
-            self._calc_single_pool(list(group), scale_up_low_volumes)
+        for group in group_by_pool(transfers).itervalues():
+            self._calc_single_pool(group, scale_up_low_volumes)
 
     def _calc_single_pool(self, transfers, scale_up_low_volumes):
         """
@@ -106,32 +103,48 @@ class PoolConcentrationCalc:
         :param transfers: A list of transfers associated with a single pool
         :return:
         """
+        pool_size = len(transfers)
         for transfer in transfers:
             try:
                 transfer.sample_volume = \
                     transfer.requested_concentration * transfer.requested_volume / \
-                    transfer.source_concentration / len(transfers)
+                    transfer.source_concentration / pool_size
                 transfer.buffer_volume = 0
             except (TypeError, ZeroDivisionError):
                 transfer.sample_volume = 0
                 transfer.buffer_volume = 0
                 transfer.has_to_evaporate = False
 
+        # The aggregates of the pool, before any volumes are scaled up
+        total_sample_volume = sum(t.sample_volume for t in transfers)
+        min_sample_volume = min(t.sample_volume for t in transfers)
+
         t = transfers[0]
-        t.buffer_volume = max(t.requested_volume -
-                              sum([tt.sample_volume for tt in transfers]), 0)
+        t.buffer_volume = max(t.requested_volume - total_sample_volume, 0)
 
-        min_sample_volume = min(map(lambda t: t.sample_volume, transfers))
-        for t in transfers:
-            t.has_to_evaporate = t.requested_volume - \
-                sum([tt.sample_volume for tt in transfers]) < 0
+        scale_factor = None
+        if scale_up_low_volumes is True and min_sample_volume < ROBOT_MIN_VOLUME:
             try:
-                if scale_up_low_volumes is True and min_sample_volume < ROBOT_MIN_VOLUME:
-                    scale_factor = float(ROBOT_MIN_VOLUME/min_sample_volume)
-                    t.sample_volume *= scale_factor
-                    t.buffer_volume *= scale_factor
-                    t.scaled_up = True
+                scale_factor = float(ROBOT_MIN_VOLUME/min_sample_volume)
             except ZeroDivisionError:
                 # Zero sample volume indicates an error that should be caught
                 # later by validation
                 pass
+
+        for t in transfers:
+            t.has_to_evaporate = t.requested_volume - total_sample_volume < 0
+            if scale_factor is not None:
+                t.sample_volume *= scale_factor
+                t.buffer_volume *= scale_factor
+                t.scaled_up = True
+
+
+def group_by_pool(transfers):
+    """
+    Groups the transfers by the pool they are transferred to, in one pass over them.
+    Returns an ordered dictionary from pool name to its transfers, in the order they were given.
+    """
+    ret = OrderedDict()
+    for transfer in transfers:
+        ret.setdefault(transfer.target_aliquot_name, list()).append(transfer)
+    return ret
@@ -0,0 +1,123 @@
+# Batch versions of the strategies in dilution_strategies, calculating the
+# volumes of all transfers at once with NumPy rather than one transfer at a time.
+# They give the same results, see dilution_strategies for what the variables mean.
+#
+# Missing input values (None) are represented by NaN in the calculations. Where
+# the strategies in dilution_strategies catch an exception for a transfer, these
+# use a mask over the transfers that the exception would have been raised for.
+#
+# Requires NumPy. Select these with the engine argument to DilutionScheme.create.
+
+import numpy
+from clarity_ext.dilution_strategies import FixedVolumeCalc, ROBOT_MIN_VOLUME, group_by_pool
+
+
+def _columns(transfers, *attributes):
+    """Returns the attributes of all transfers as float arrays, with NaN where a value is None"""
+    return [numpy.array([getattr(transfer, attribute) for transfer in transfers], dtype=float)
+            for attribute in attributes]
+
+
+def _set_results(transfers, sample_volume, buffer_volume, has_to_evaporate, scaled_up, unset_mask):
+    """Sets the results on the transfers, with None for the volumes where the mask is set"""
+    for transfer, sample, buffer_, evaporate, scaled, unset in zip(
+            transfers, sample_volume.tolist(), buffer_volume.tolist(), has_to_evaporate.tolist(),
+            scaled_up.tolist(), unset_mask.tolist()):
+        if unset:
+            transfer.sample_volume = None
+            transfer.buffer_volume = None
+            transfer.has_to_evaporate = None
+        else:
+            transfer.sample_volume = sample
+            transfer.buffer_volume = buffer_
+            transfer.has_to_evaporate = evaporate
+        if scaled:
+            transfer.scaled_up = True
+
+
+class OneToOneConcentrationCalc:
+    """
+    Batch version of dilution_strategies.OneToOneConcentrationCalc
+    """
+
+    def __init__(self):
+        pass
+
+    def calculate_transfer_volumes(self, transfers=None, scale_up_low_volumes=None):
+        if not transfers:
+            return
+        requested_concentration, requested_volume, source_concentration = _columns(
+            transfers, "requested_concentration", "requested_volume", "source_concentration")
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            sample_volume = requested_concentration * requested_volume / source_concentration
+            remaining_volume = requested_volume - sample_volume
+            buffer_volume = numpy.maximum(remaining_volume, 0)
+            has_to_evaporate = remaining_volume < 0
+            # Either a value is missing or the source concentration is zero
+            failed = numpy.isnan(sample_volume) | (source_concentration == 0)
+
+            scaled_up = numpy.zeros(len(transfers), dtype=bool)
+            if scale_up_low_volumes:
+                to_scale = ~failed & (sample_volume < ROBOT_MIN_VOLUME)
+                # A sample volume of zero can't be scaled up, which fails the transfer
+                failed |= to_scale & (sample_volume == 0)
+                scaled_up = to_scale & ~failed
+                scale_factor = numpy.where(scaled_up, ROBOT_MIN_VOLUME / sample_volume, 1.0)
+                sample_volume *= scale_factor
+                buffer_volume *= scale_factor
+
+        _set_results(transfers, sample_volume, buffer_volume, has_to_evaporate, scaled_up, failed)
+
+
+class PoolConcentrationCalc:
+    """
+    Batch version of dilution_strategies.PoolConcentrationCalc
+
+    Note that has_to_evaporate is based on the sample volumes of the pool before
+    they are scaled up, as in dilution_strategies.
+    """
+
+    def __init__(self):
+        pass
+
+    def calculate_transfer_volumes(self, transfers=None, scale_up_low_volumes=None):
+        if not transfers:
+            return
+        # Order the transfers so that each pool is a consecutive range, with the first
+        # transfer of the pool (which gets the buffer volume) at the start of it
+        pools = group_by_pool(transfers).values()
+        transfers = [transfer for pool in pools for transfer in pool]
+        pool_sizes = numpy.array([len(pool) for pool in pools])
+        pool_starts = numpy.concatenate(([0], numpy.cumsum(pool_sizes)[:-1]))
+        pool_of_transfer = numpy.repeat(numpy.arange(len(pool_sizes)), pool_sizes)
+
+        requested_concentration, requested_volume, source_concentration = _columns(
+            transfers, "requested_concentration", "requested_volume", "source_concentration")
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            sample_volume = requested_concentration * requested_volume / source_concentration / \
+                pool_sizes[pool_of_transfer]
+            failed = numpy.isnan(sample_volume) | (source_concentration == 0)
+            sample_volume[failed] = 0
+
+            pool_sample_volume = numpy.add.reduceat(sample_volume, pool_starts)
+            remaining_volume = requested_volume - pool_sample_volume[pool_of_transfer]
+            has_to_evaporate = remaining_volume < 0
+            buffer_volume = numpy.zeros(len(transfers))
+            buffer_volume[pool_starts] = numpy.maximum(remaining_volume[pool_starts], 0)
+
+            scaled_up = numpy.zeros(len(transfers), dtype=bool)
+            if scale_up_low_volumes is True:
+                min_sample_volume = numpy.minimum.reduceat(sample_volume, pool_starts)
+                # Zero sample volume indicates an error that should be caught later by validation
+                pools_to_scale = (min_sample_volume < ROBOT_MIN_VOLUME) & (min_sample_volume != 0)
+                scale_factor = numpy.where(pools_to_scale, ROBOT_MIN_VOLUME / min_sample_volume, 1.0)
+                scaled_up = pools_to_scale[pool_of_transfer]
+                sample_volume *= scale_factor[pool_of_transfer]
+                buffer_volume *= scale_factor[pool_of_transfer]
+
+        # The strategy in dilution_strategies raises a TypeError if a requested volume is missing,
+        # here the results of that transfer are left unset instead
+        no_volume = numpy.isnan(remaining_volume)
+        _set_results(transfers, sample_volume, buffer_volume, has_to_evaporate, scaled_up, no_volume)
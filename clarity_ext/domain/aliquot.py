@@ -29,7 +29,7 @@ class Aliquot(Artifact):
 
     @staticmethod
     def create_well_from_rest(resource, container_repo):
-        # TODO: Batch call
+        # NOTE: The containers have been fetched in one batch call by the step repository
         try:
             container = container_repo.get_container(resource.location[0])
         except AttributeError:
@@ -43,17 +43,63 @@ class Aliquot(Artifact):
 
         well = None
         if container and pos:
-            well = container.wells[pos]
+            well = container[pos]
 
         return well
 
+    @staticmethod
+    def create_samples_from_rest(resource, sample_repo):
+        """
+        Creates the samples of the artifact resource. If a sample repository is provided, the samples
+        are loaded lazily through it, together with all other samples in the step.
+        """
+        if sample_repo:
+            return sample_repo.get_samples(resource.samples)
+        return [Sample.create_from_rest_resource(sample) for sample in resource.samples]
+
 
 class Sample(DomainObjectMixin):
+    """
+    A sample in Clarity.
+
+    The name and project can be provided by a `loader` instead, a function taking the sample and returning
+    a (name, project) tuple. It's called the first time any of them is accessed, so samples that
+    are never inspected don't require any requests.
+    """
 
-    def __init__(self, sample_id, name, project):
+    VALUE_FIELDS = ["id", "name", "project"]
+
+    def __init__(self, sample_id, name=None, project=None, loader=None):
         self.id = sample_id
-        self.name = name
-        self.project = project
+        self._name = name
+        self._project = project
+        self._loader = loader
+
+    def _load(self):
+        if self._loader:
+            loader = self._loader
+            self._loader = None
+            self._name, self._project = loader(self)
+
+    @property
+    def name(self):
+        self._load()
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        self._load()
+        self._name = value
+
+    @property
+    def project(self):
+        self._load()
+        return self._project
+
+    @project.setter
+    def project(self, value):
+        self._load()
+        self._project = value
 
     def __repr__(self):
         return "<Sample id={}>".format(self.id)
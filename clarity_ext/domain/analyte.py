@@ -38,7 +38,7 @@ class Analyte(Aliquot):
         return "{} ({})".format(self.name, self.id)
 
     @staticmethod
-    def create_from_rest_resource(resource, is_input, udf_map, container_repo):
+    def create_from_rest_resource(resource, is_input, udf_map, container_repo, sample_repo=None):
         """
         Creates an Analyte from the rest resource. By default, the container
         is created from the related container resource, except if one
@@ -54,9 +54,7 @@ class Analyte(Aliquot):
         well = Aliquot.create_well_from_rest(
             resource=resource, container_repo=container_repo)
 
-        # TODO: sample should be put in a lazy property, and all samples in a step should be
-        # loaded in one batch
-        samples = [Sample.create_from_rest_resource(sample) for sample in resource.samples]
+        samples = Aliquot.create_samples_from_rest(resource=resource, sample_repo=sample_repo)
         is_control = False
         # TODO: This code principally belongs to the genologics layer, but 'control-type' does not exist there
         if resource.root.find("control-type") is not None:
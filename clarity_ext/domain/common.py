@@ -3,53 +3,64 @@ import copy
 
 
 class DomainObjectMixin(object):
+    """
+    Provides value equality for domain objects.
+
+    Objects are compared field by field. Subclasses can declare the fields that make up their value in
+    VALUE_FIELDS, otherwise all public fields in the instance dictionary are compared.
+    """
+    VALUE_FIELDS = None
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
-            return self._eq_rec(self, other)
+            return self._eq_rec(self, other, set())
         else:
             return False
 
-    def _eq_rec(self, a, b, cache=[]):
+    def value_fields(self):
+        if self.VALUE_FIELDS is not None:
+            return self.VALUE_FIELDS
+        return [key for key in self.__dict__ if not key.startswith("_")]
+
+    def _eq_rec(self, a, b, visited):
         """
         Replaces the == operator because of circulating references (e.g. analyte <-> well)
-        Adapted solution taken from
-        http://stackoverflow.com/questions/31415844/using-the-operator-on-circularly-defined-dictionaries
-        """
-        cache = cache + [a, b]
-        if isinstance(a, DomainObjectMixin):
-            a = a.__dict__
-        if isinstance(b, DomainObjectMixin):
-            b = b.__dict__
-        if not isinstance(a, dict) or not isinstance(b, dict):
-            return a == b
-
-        set_keys = set(a.keys())
-        if set_keys != set(b.keys()):
-            return False
 
-        for key in set_keys:
-            if any(a[key] is i for i in cache):
-                continue
-            elif any(b[key] is i for i in cache):
-                continue
-            elif a[key].__class__.__name__ == "MagicMock" and a[key].__class__.__name__ == "MagicMock":
-                # filter out mocked fields
-                continue
-            elif not self._eq_rec(a[key], b[key], cache):
+        :param visited: The (id(a), id(b)) pairs of domain objects that are being compared. A pair that is
+                        reached again through a circular reference is treated as equal, the comparison
+                        that is already in progress decides if it is.
+        """
+        if a is b:
+            return True
+        if a.__class__.__name__ == "MagicMock":
+            # filter out mocked fields
+            return True
+        if isinstance(a, DomainObjectMixin) and isinstance(b, DomainObjectMixin):
+            pair = (id(a), id(b))
+            if pair in visited:
+                return True
+            visited.add(pair)
+            fields = a.value_fields()
+            if set(fields) != set(b.value_fields()):
+                return False
+            return all(self._eq_rec(getattr(a, key), getattr(b, key), visited) for key in fields)
+        if isinstance(a, dict) and isinstance(b, dict):
+            if set(a.keys()) != set(b.keys()):
+                return False
+            return all(self._eq_rec(a[key], b[key], visited) for key in a)
+        if isinstance(a, (list, tuple)) and isinstance(b, (list, tuple)):
+            if len(a) != len(b):
                 return False
-        return True
+            return all(self._eq_rec(x, y, visited) for x, y in zip(a, b))
+        return a == b
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
     def differing_fields(self, other):
         if isinstance(other, self.__class__):
-            ret = []
-            for key in self.__dict__:
-                if self.__dict__.get(key, None) != other.__dict__.get(key, None):
-                    ret.append(key)
-            return ret
+            return [key for key in self.value_fields()
+                    if not self._eq_rec(getattr(self, key), getattr(other, key, None), set())]
         else:
             return None
 
@@ -9,13 +9,49 @@ class Well(DomainObjectMixin):
 
     This could for example be a well in a plate, but could also be the single location in a tube.
 
+    The wells of a container are views of its storage, created when they are first used.
+    Setting the artifact of such a well sets it in the container.
+
     # TODO: Rename class to Location?
     """
 
     def __init__(self, position, container, artifact=None):
         self.position = position
         self.container = container
-        self.artifact = artifact
+        # The index of the well in the storage of the container, if it's a view of it
+        self._slot = None
+        self._artifact = artifact
+        self.artifact_name = None
+        self.artifact_id = None
+
+    @staticmethod
+    def create_view(container, slot):
+        well = Well(container.layout.positions[slot], container)
+        well._slot = slot
+        return well
+
+    @property
+    def artifact(self):
+        if self._slot is None:
+            return self._artifact
+        return self.container._artifacts[self._slot]
+
+    @artifact.setter
+    def artifact(self, value):
+        if self._slot is None:
+            self._artifact = value
+        else:
+            self.container.set_artifact_at(self._slot, value)
+
+    def value_fields(self):
+        return ["artifact"] + super(Well, self).value_fields()
+
+    @property
+    def slot(self):
+        """The index of the well in the storage of its container, see ContainerLayout"""
+        if self._slot is not None:
+            return self._slot
+        return self.container.layout.slot(self.position)
 
     @property
     def is_empty(self):
@@ -33,6 +69,8 @@ class Well(DomainObjectMixin):
 
     @property
     def index_down_first(self):
+        if self._slot is not None:
+            return self._slot + 1
         # The position is 1-indexed
         return (self.position.col - 1) * self.container.size.height + self.position.row
 
@@ -57,7 +95,9 @@ class ContainerPosition(namedtuple("ContainerPosition", ["row", "col"])):
         if isinstance(repr, basestring):
             row, col = repr.split(":")
             if row.isalpha():
-                row = ord(row.upper()) - 64
+                if row.upper() not in ROW_NUMBERS:
+                    raise ValueError("Unknown row '{}'".format(row))
+                row = ROW_NUMBERS[row.upper()]
             else:
                 row = int(row)
             col = int(col)
@@ -67,8 +107,23 @@ class ContainerPosition(namedtuple("ContainerPosition", ["row", "col"])):
 
     @property
     def row_letter(self):
-        """Returns the letter representation for the row index, e.g. 3 => C"""
-        return chr(65 + self.row - 1)
+        """Returns the letter representation for the row index, e.g. 3 => C and 27 => AA"""
+        if 0 < self.row < len(ROW_LETTERS):
+            return ROW_LETTERS[self.row]
+        return _row_letter(self.row)
+
+
+def _row_letter(row):
+    letters = ""
+    while row > 0:
+        row, remainder = divmod(row - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+# The letters of rows 1 to 702 (A to ZZ), indexed by the row number, and the other way around
+ROW_LETTERS = [None] + [_row_letter(row) for row in range(1, 27 * 26 + 1)]
+ROW_NUMBERS = {letters: row for row, letters in enumerate(ROW_LETTERS) if letters}
 
 
 class PlateSize(namedtuple("PlateSize", ["height", "width"])):
@@ -76,6 +131,60 @@ class PlateSize(namedtuple("PlateSize", ["height", "width"])):
     pass
 
 
+class ContainerLayout(object):
+    """
+    The positions of a container size, calculated once and shared by all containers of that size.
+
+    A well is stored at its slot in the container, which is its zero based index when traversing the
+    container down first. All position formats that ContainerPosition.create supports, except those
+    with lower case rows, are looked up directly in `slot_by_key`.
+    """
+
+    _layouts = dict()
+
+    def __init__(self, size):
+        self.size = PlateSize(height=size.height, width=size.width)
+        rows = range(1, size.height + 1)
+        cols = range(1, size.width + 1)
+        self.positions = [ContainerPosition(row=row, col=col) for col in cols for row in rows]
+        self.slot_by_key = dict()
+        for slot, position in enumerate(self.positions):
+            # Also matches (row, col) tuples
+            self.slot_by_key[position] = slot
+            self.slot_by_key[repr(position)] = slot
+            self.slot_by_key["{}:{}".format(position.row, position.col)] = slot
+        self.slots_down_first = range(len(self.positions))
+        self.slots_right_first = [(col - 1) * size.height + row - 1 for row in rows for col in cols]
+        # The index of each slot when traversing right first
+        self.right_first_index = [0] * len(self.positions)
+        for ix, slot in enumerate(self.slots_right_first):
+            self.right_first_index[slot] = ix
+
+    @staticmethod
+    def get(size):
+        """Returns the layout of containers of the size"""
+        key = (size.height, size.width)
+        layout = ContainerLayout._layouts.get(key)
+        if layout is None:
+            layout = ContainerLayout(size)
+            ContainerLayout._layouts[key] = layout
+        return layout
+
+    def slot(self, well_pos):
+        """Returns the slot of the position, raises a KeyError if the container doesn't have it"""
+        try:
+            return self.slot_by_key[well_pos]
+        except (KeyError, TypeError):
+            pass
+        try:
+            return self.slot_by_key[ContainerPosition.create(well_pos)]
+        except ValueError:
+            raise KeyError(well_pos)
+
+    def __len__(self):
+        return len(self.positions)
+
+
 class Container(DomainObjectMixin):
     """Encapsulates a Container"""
 
@@ -87,6 +196,9 @@ class Container(DomainObjectMixin):
     CONTAINER_TYPE_TUBE = 300
     CONTAINER_TYPE_PATTERNED_FLOW_CELL = 400
 
+    # The artifacts are compared rather than the wells, which would create a view of every well
+    VALUE_FIELDS = ["id", "name", "container_type", "size", "mapping", "artifacts"]
+
     def __init__(self, mapping=None, container_type=None, size=None):
         """
         :param mapping: A dictionary-like object containing mapping from well
@@ -113,8 +225,16 @@ class Container(DomainObjectMixin):
             else:
                 raise ValueError("Unknown plate type '{}'".format(self.container_type))
 
-    def __repr__(self):
-        return "<Container id={}>".format(self.id)
+        self.layout = ContainerLayout.get(self.size)
+        # The artifact in each well and whether it's set, by slot, and the wells that have been created
+        self._artifacts = [None] * len(self.layout)
+        self._occupied = bytearray(len(self.layout))
+        # Whether each well is set, in right first order
+        self._occupied_right_first = bytearray(len(self.layout))
+        self._views = [None] * len(self.layout)
+        if self.mapping:
+            for key, content in self.mapping.items():
+                self.set_artifact_at(self.layout.slot(key), content)
 
     @classmethod
     def create_from_rest_resource(cls, resource, api_artifacts=[]):
@@ -142,50 +262,105 @@ class Container(DomainObjectMixin):
             ret.set_well(artifact.location[1], artifact)
         return ret
 
+    def well_at(self, slot):
+        """Returns the well at the slot, creating it the first time it's used"""
+        well = self._views[slot]
+        if well is None:
+            well = Well.create_view(self, slot)
+            self._views[slot] = well
+        return well
+
+    @property
+    def artifacts(self):
+        """The artifact in each well, or None, by slot (see ContainerLayout)"""
+        return self._artifacts
+
+    def set_artifact_at(self, slot, artifact):
+        self._artifacts[slot] = artifact
+        self._occupied[slot] = artifact is not None
+        self._occupied_right_first[self.layout.right_first_index[slot]] = artifact is not None
+
+    def _occupancy(self, order):
+        """Returns one byte per well that is set if it has an artifact, and the slot of each byte"""
+        if order == self.RIGHT_FIRST:
+            return self._occupied_right_first, self.layout.slots_right_first
+        return self._occupied, self.layout.slots_down_first
+
+    def occupied_wells(self, order=DOWN_FIRST):
+        """Lists the wells that have an artifact"""
+        occupied, slots = self._occupancy(order)
+        ret = list()
+        ix = occupied.find(b"\x01")
+        while ix != -1:
+            ret.append(self.well_at(slots[ix]))
+            ix = occupied.find(b"\x01", ix + 1)
+        return ret
+
+    @property
+    def occupied_count(self):
+        return self._occupied.count(b"\x01")
+
+    def first_free_well(self, order=DOWN_FIRST):
+        """Returns the first well without an artifact, or None if the container is full"""
+        occupied, slots = self._occupancy(order)
+        ix = occupied.find(b"\x00")
+        return self.well_at(slots[ix]) if ix != -1 else None
+
+    def wells_in_range(self, first, last, order=DOWN_FIRST):
+        """
+        Lists the wells in the rectangle that has the wells at the positions first and last in opposite corners,
+        e.g. `wells_in_range("A:1", "H:6")` for the left half of a 96 well plate.
+        """
+        first = self.layout.positions[self.layout.slot(first)]
+        last = self.layout.positions[self.layout.slot(last)]
+        rows = range(min(first.row, last.row) - 1, max(first.row, last.row))
+        cols = range(min(first.col, last.col) - 1, max(first.col, last.col))
+        height = self.layout.size.height
+        if order == self.RIGHT_FIRST:
+            slots = [col * height + row for row in rows for col in cols]
+        else:
+            slots = [col * height + row for col in cols for row in rows]
+        return [self.well_at(slot) for slot in slots]
+
     @lazyprop
     def wells(self):
-        ret = dict()
-        for row, col in self._traverse():
-            key = "{}:{}".format(row, col)
-            content = self.mapping[key] if self.mapping and key in self.mapping else None
-            pos = ContainerPosition(row=row, col=col)
-            ret[(row, col)] = Well(pos, content)
-            ret[(row, col)].container = self
-        return ret
+        """All wells of the container by position. Use `__getitem__` when only some of them are needed."""
+        return {position: self.well_at(slot) for slot, position in enumerate(self.layout.positions)}
 
     def _traverse(self, order=DOWN_FIRST):
         """Traverses the container, visiting wells in a certain order, yielding keys as (row,col) tuples, 1-indexed"""
-        if not self.size:
-            raise ValueError("Not able to traverse the container without a plate size")
+        positions = self.layout.positions
+        return (positions[slot] for slot in self._slots(order))
 
-        rows = range(1, self.size.height + 1)
-        cols = range(1, self.size.width + 1)
+    def _slots(self, order=DOWN_FIRST):
         if order == self.RIGHT_FIRST:
-            return ((row, col) for row in rows for col in cols)
-        else:
-            return ((row, col) for col in cols for row in rows)
+            return self.layout.slots_right_first
+        return self.layout.slots_down_first
 
     # Lists the wells in a certain order:
     def enumerate_wells(self, order=DOWN_FIRST):
-        for key in self._traverse(order):
-            yield self.wells[key]
+        for slot in self._slots(order):
+            yield self.well_at(slot)
 
     def list_wells(self, order=DOWN_FIRST):
-        return list(self.enumerate_wells(order))
+        well_at = self.well_at
+        return [well_at(slot) for slot in self._slots(order)]
 
     def set_well(self, well_pos, artifact_name=None, artifact_id=None, artifact=None):
         # We should support any position that ContainerPosition can handle:
-        if not isinstance(well_pos, ContainerPosition):
-            well_pos = ContainerPosition.create(well_pos)
-
-        if well_pos not in self.wells:
+        try:
+            slot = self.layout.slot(well_pos)
+        except KeyError:
             raise KeyError(
                 "Well id {} is not available in this container (type={})".format(well_pos, self))
 
-        self.wells[well_pos].artifact_name = artifact_name
-        self.wells[well_pos].artifact_id = artifact_id
+        # Only create the well if there is something to set on it
+        if artifact_name is not None or artifact_id is not None or self._views[slot] is not None:
+            well = self.well_at(slot)
+            well.artifact_name = artifact_name
+            well.artifact_id = artifact_id
         # TODO: Accept only an artifact
-        self.wells[well_pos].artifact = artifact
+        self.set_artifact_at(slot, artifact)
 
     def __iter__(self):
         return self.enumerate_wells(order=self.DOWN_FIRST)
@@ -194,13 +369,14 @@ class Container(DomainObjectMixin):
         self.set_well(key, artifact=value)
 
     def __contains__(self, item):
-        return item in self.wells
+        try:
+            self.layout.slot(item)
+            return True
+        except KeyError:
+            return False
 
     def __getitem__(self, well_pos):
-        if not isinstance(well_pos, ContainerPosition):
-            well_pos = ContainerPosition.create(well_pos)
-        return self.wells[well_pos]
+        return self.well_at(self.layout.slot(well_pos))
 
     def __repr__(self):
         return "Container(id={})".format(self.id)
-
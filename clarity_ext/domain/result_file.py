@@ -12,7 +12,7 @@ class ResultFile(Aliquot):
             artifact_specific_udf_map=artifact_specific_udf_map, **kwargs)
 
     @staticmethod
-    def create_from_rest_resource(resource, is_input, udf_map, container_repo):
+    def create_from_rest_resource(resource, is_input, udf_map, container_repo, sample_repo=None):
         """
         Creates a `ResultFile` from the REST resource object.
         The container is fetched from the container_repo.
@@ -25,9 +25,7 @@ class ResultFile(Aliquot):
         well = Aliquot.create_well_from_rest(
             resource=resource, container_repo=container_repo)
 
-        # TODO: sample should be put in a lazy property, and all samples in a step should be
-        # loaded in one batch
-        samples = [Sample.create_from_rest_resource(sample) for sample in resource.samples]
+        samples = Aliquot.create_samples_from_rest(resource=resource, sample_repo=sample_repo)
         ret = ResultFile(api_resource=resource, is_input=is_input,
                          id=resource.id, samples=samples, name=resource.name, well=well,
                          artifact_specific_udf_map=result_file_udf_map, **kwargs)
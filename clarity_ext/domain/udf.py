@@ -5,10 +5,25 @@ from clarity_ext.domain.common import AssignLogger
 from clarity_ext.unit_conversion import UnitConversion
 
 
+class TrackUpdatesAfterInit(type):
+    """
+    Starts tracking updated fields on an object once it has been created, so fields set
+    while initializing it are not counted as updates.
+    """
+    def __call__(cls, *args, **kwargs):
+        instance = super(TrackUpdatesAfterInit, cls).__call__(*args, **kwargs)
+        instance.reset_updated_fields()
+        return instance
+
+
 class Udf(DomainObjectMixin):
     """
     Represents an entity having udfs
+
+    Keeps track of which public fields are assigned, so the changes can be sent back to the server
+    without comparing with a copy of the original object.
     """
+    __metaclass__ = TrackUpdatesAfterInit
 
     def __init__(self, api_resource=None, id=None, entity_specific_udf_map=None):
         self.id = id
@@ -27,6 +42,21 @@ class Udf(DomainObjectMixin):
     def udf_backward_map(self):
         return {self.udf_map[key]: key for key in self.udf_map}
 
+    def __setattr__(self, name, value):
+        original_values = self.__dict__.get("_original_values")
+        if original_values is not None and name not in original_values and not name.startswith("_"):
+            original_values[name] = self.__dict__.get(name)
+        super(Udf, self).__setattr__(name, value)
+
+    def updated_fields(self):
+        """Returns the names of the fields whose values differ from when tracking was last reset"""
+        return [name for name, original in self._original_values.items()
+                if self.__dict__.get(name) != original]
+
+    def reset_updated_fields(self):
+        """Treats the current state as the original one, e.g. after the changes have been committed"""
+        self.__dict__["_original_values"] = dict()
+
     def reset_assigner(self):
         self.assigner = AssignLogger(self)
 
@@ -38,7 +68,7 @@ class Udf(DomainObjectMixin):
             # Assign existing instance variable
             # Log for assignment of instance variables are handled in
             # step_repository.commit()
-            self.__dict__[self.udf_backward_map[name]] = value
+            setattr(self, self.udf_backward_map[name], value)
         else:
             # There is no mapped instance variable for this udf.
             # Log the assignment right away
@@ -1,7 +1,6 @@
 import os
 import shutil
 import difflib
-from genologics.epp import attach_file
 from genologics.entities import *
 from clarity_ext.utils import lazyprop
 import re
@@ -9,29 +8,50 @@ import codecs
 
 
 class OSService(object):
-    def __init__(self):
-        pass
+    """
+    Provides access to the file system for one run of an extension.
+
+    Relative paths are resolved against the working directory of the run rather than the
+    current working directory of the process, so several runs can proceed in parallel.
+    """
+    def __init__(self, working_dir=None):
+        """
+        :param working_dir: The directory relative paths are resolved against. Defaults to the current directory.
+        """
+        self.working_dir = os.path.abspath(working_dir or os.getcwd())
+
+    def abspath(self, path):
+        return os.path.normpath(os.path.join(self.working_dir, path))
 
     def exists(self, path):
-        return os.path.exists(path)
+        return os.path.exists(self.abspath(path))
 
     def makedirs(self, path):
-        os.makedirs(path)
+        os.makedirs(self.abspath(path))
 
     def open_file(self, path, mode):
-        return open(path, mode)
+        return open(self.abspath(path), mode)
 
     def rmdir(self, path):
-        os.rmdir(path)
+        os.rmdir(self.abspath(path))
 
     def mkdir(self, path):
-        os.mkdir(path)
+        os.mkdir(self.abspath(path))
+
+    def remove(self, path):
+        os.remove(self.abspath(path))
 
     def copy_file(self, source, dest):
-        shutil.copyfile(source, dest)
+        shutil.copyfile(self.abspath(source), self.abspath(dest))
 
     def attach_file_for_epp(self, local_file, artifact):
-        return attach_file(local_file, artifact)
+        """
+        Copies the file to the working directory, prefixed with the artifact id, which is where the EPP node
+        expects files to upload. Same as genologics.epp.attach_file, which always uses the current directory.
+        """
+        location = self.abspath("{}_{}".format(artifact.id, os.path.basename(local_file)))
+        shutil.copy(self.abspath(local_file), location)
+        return location
 
 
 class GeneralFileService(object):
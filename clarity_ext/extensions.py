@@ -13,12 +13,10 @@ import logging
 import difflib
 from clarity_ext.utils import lazyprop
 from clarity_ext import ClaritySession
-from clarity_ext.repository import StepRepository
+from clarity_ext.repository import StepRepository, FileCache
 from clarity_ext.service import ArtifactService
-from test.integration.integration_test_service import IntegrationTest
 from clarity_ext.repository.step_repository import DEFAULT_UDF_MAP
 from clarity_ext.service.validation_service import ValidationService
-from jinja2 import Template
 
 
 # Defines all classes that are expected to be extended. These are
@@ -37,6 +35,12 @@ class ExtensionService(object):
     CACHE_NAME = ".http_cache"
     CACHE_ARTIFACTS_DIR = ".cache"
 
+    DEFAULT_CONFIG = {
+        "test_root_path": "./clarity_ext_scripts/int_tests",
+        "frozen_root_path": "../clarity-ext-frozen",
+        "exec_root_path": "."
+    }
+
     PRODUCTION_LOGS_DIR = "/opt/clarity-ext/logs"
     PRODUCTION_LOG_NAME = "extensions.log"
 
@@ -60,6 +64,7 @@ class ExtensionService(object):
 
         if os.path.exists(cls.PRODUCTION_LOGS_DIR):
             file_name = os.path.join(cls.PRODUCTION_LOGS_DIR, cls.PRODUCTION_LOG_NAME)
+            import logging.handlers
             rotating_handler = logging.handlers.RotatingFileHandler(file_name, maxBytes=10 * (2**20), backupCount=5)
             rotating_handler.setFormatter(formatter)
             root_logger.addHandler(rotating_handler)
@@ -78,17 +83,31 @@ class ExtensionService(object):
             raise ValueError("Unexpected mode")
 
     def _parse_run_argument(self, in_argument):
-        if isinstance(in_argument, IntegrationTest):
-            return in_argument.run_argument_dict
         if isinstance(in_argument, str):
             return {"pid": in_argument}
         elif isinstance(in_argument, dict):
             return in_argument
+
+        # Imported here, since the test package loads the integration test config
+        from test.integration.integration_test_service import IntegrationTest
+        if isinstance(in_argument, IntegrationTest):
+            return in_argument.run_argument_dict
         else:
             return in_argument.__dict__
 
-    def _artifact_service(self, pid):
-        session = ClaritySession.create(pid)
+    def _session(self, pid, os_service, use_cache):
+        """
+        Creates a session for the run. If `use_cache` is set, requests are cached in the run directory
+        by a session of its own, so runs don't share a cache.
+        """
+        request_session = None
+        if use_cache:
+            cache = os_service.abspath(self.CACHE_NAME)
+            self.logger.info("Using cache {}".format(cache))
+            request_session = utils.requests_cache_session(cache)
+        return ClaritySession.create(pid, request_session)
+
+    def _artifact_service(self, session):
         step_repo = StepRepository(session, DEFAULT_UDF_MAP)
         return ArtifactService(step_repo)
 
@@ -102,24 +121,19 @@ class ExtensionService(object):
             extensions integration_tests will be used. A list of dicts can be provided for
             multiple runs.
             A string of key value pairs can also be sent.
-        :param config: A configuration directory with additional parameters, such as location of directories
+        :param config: A configuration directory with additional parameters, such as location of directories.
+            Downloaded files are kept in a cache shared by all runs if `file_cache_path` is set, limited to
+            `file_cache_max_mb`.
         :param artifacts_to_stdout: Set to true if all artifacts created should be echoed to stdout
         :param use_cache: True if the cache should be used. Defaults to true if running in test mode.
         :return:
         """
         if config is None:
-            config = {
-                "test_root_path": "./clarity_ext_scripts/int_tests",
-                "frozen_root_path": "../clarity-ext-frozen",
-                "exec_root_path": "."
-            }
+            config = self.DEFAULT_CONFIG
 
         if use_cache is None:
             use_cache = mode == self.RUN_MODE_TEST
-
-        if use_cache:
-            self.logger.info("Using cache {}".format(self.CACHE_NAME))
-            utils.use_requests_cache(self.CACHE_NAME)
+        file_cache = FileCache.create_from_config(config)
 
         if isinstance(run_arguments_list, str) or isinstance(run_arguments_list, unicode):
             arguments = run_arguments_list.split(" ")
@@ -131,12 +145,7 @@ class ExtensionService(object):
         instance = extension(None)
 
         if not run_arguments_list and (mode == self.RUN_MODE_TEST or mode == self.RUN_MODE_FREEZE):
-            for integration_test in instance.integration_tests():
-                if isinstance(integration_test, IntegrationTest) and integration_test.preparer:
-                    artifact_service = self._artifact_service(integration_test.pid())
-                    integration_test.preparer.prepare(artifact_service)
-
-            run_arguments_list = map(self._parse_run_argument, instance.integration_tests())
+            run_arguments_list = list(instance.integration_tests())
             if len(run_arguments_list) == 0:
                 print("WARNING: No integration tests defined. Not able to test.")
                 return
@@ -153,7 +162,8 @@ class ExtensionService(object):
                 print("  clarity-ext extension {} {}".format(
                     module, self.RUN_MODE_FREEZE))
 
-            for run_arguments in run_arguments_list:
+            for run_argument in run_arguments_list:
+                run_arguments = self._parse_run_argument(run_argument)
                 path = self._run_path(run_arguments, module, mode, config)
                 frozen_path = self._run_path(run_arguments, module, self.RUN_MODE_FREEZE, config)
 
@@ -179,14 +189,19 @@ class ExtensionService(object):
                         self.logger.info("Frozen cache directory exists and will be used")
                         shutil.copytree(frozen_cache_dir, os.path.join(path, self.CACHE_ARTIFACTS_DIR))
 
-                old_dir = os.getcwd()
-                os.chdir(path)
+                os_service = OSService(path)
+                session = self._session(run_arguments["pid"], os_service, use_cache)
+
+                if getattr(run_argument, "preparer", None):
+                    run_argument.preparer.prepare(self._artifact_service(session))
 
-                self.logger.info("Executing at {}".format(os.path.abspath(path)))
+                self.logger.info("Executing at {}".format(os_service.working_dir))
                 cache_artifacts = mode == self.RUN_MODE_TEST
-                context = ExtensionContext.create(run_arguments["pid"], cache=cache_artifacts)
+                context = ExtensionContext.create(run_arguments["pid"], cache=cache_artifacts, session=session,
+                                                  os_service=os_service,
+                                                  prefetch_shared_files=instance.prefetch_shared_files(),
+                                                  file_cache=file_cache)
                 instance = extension(context)
-                os_service = OSService()
                 if issubclass(extension, DriverFileExtension):
                     file_svc = DriverFileService.create_file_service(
                         instance, instance.shared_file(), self.logger, os_service)
@@ -201,8 +216,6 @@ class ExtensionService(object):
                     raise NotImplementedError("Unknown extension type")
                 context.cleanup()
 
-                os.chdir(old_dir)
-
                 if os.path.exists(frozen_path) and file_svc:
                     test_info = RunDirectoryInfo(path, file_svc)
                     frozen_info = RunDirectoryInfo(frozen_path, file_svc)
@@ -221,7 +234,7 @@ class ExtensionService(object):
             print("Freezing data (requests, responses and result files/hashes) to {}"
                   .format(frozen_root_path))
 
-            for run_arguments in run_arguments_list:
+            for run_arguments in map(self._parse_run_argument, run_arguments_list):
                 test_path = self._run_path(run_arguments, module, self.RUN_MODE_TEST, config)
                 frozen_path = self._run_path(run_arguments, module, self.RUN_MODE_FREEZE, config)
                 print(test_path, "=>", frozen_path)
@@ -317,6 +330,13 @@ class GeneralExtension(object):
         """Returns `DriverFileTest`s that should be run to validate the code"""
         pass
 
+    def prefetch_shared_files(self):
+        """
+        Returns the names of the shared files the extension reads. They are downloaded concurrently
+        when the context is created, so reading them later doesn't wait for each download in turn.
+        """
+        return []
+
     def test(self, pid):
         """Creates a test instance suitable for this extension"""
         return ExtensionTest(pid=pid)
@@ -409,6 +429,7 @@ class TemplateExtension(DriverFileExtension):
         return os.path.join(self.template_dir, self.default_template_name)
 
     def content(self):
+        from jinja2 import Template
         with open(self.template_path, 'r') as fs:
             text = fs.read()
             text = codecs.decode(text, "utf-8")
@@ -2,6 +2,8 @@ from __future__ import print_function
 import os
 import shutil
 import logging
+import importlib
+import multiprocessing
 from driverfile import DriverFileIntegrationTests
 
 
@@ -69,30 +71,67 @@ class IntegrationTestService(object):
             shutil.rmtree(target)
         shutil.copytree(source, target)
 
-    def validate(self, module, config):
+    def validate(self, module, config, jobs=1):
         """
         Runs the tests on the frozen tests. The idea is that this should run (at least) on every official build,
         thus validating every script against a known state
 
+        Every integration test of every extension is a separate job. The results are reported when all jobs are done.
+
         :param config:
-        :return:
+        :param jobs: The number of processes to run the jobs in. Each run has its own working directory
+                     and requests cache, so runs don't interfere.
+        :return: The number of integration tests whose results differ from the frozen data
         """
-        from clarity_ext.extensions import ExtensionService
-        extension_svc = ExtensionService()
-        config_obj = ConfigFromConventionProvider.get_extension_config(module)
-        exception_count = 0
+        validation_jobs = list()
+        for entry in ConfigFromConventionProvider.get_extension_config(module):
+            for index in range(len(self._integration_tests(entry["module"]))):
+                validation_jobs.append((entry["module"], index, config))
 
-        for entry in config_obj:
-            module = entry["module"]
-            print("- {}".format(module))
-            from clarity_ext.extensions import ResultsDifferFromFrozenData
+        if jobs > 1:
+            pool = multiprocessing.Pool(jobs)
             try:
-                extension_svc.execute(module, "test", None, config, artifacts_to_stdout=False, print_help=False)
-            except ResultsDifferFromFrozenData as e:
-                print("Error: {}".format(e.message))
+                results = pool.map(validate_integration_test, validation_jobs, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            results = map(validate_integration_test, validation_jobs)
+
+        exception_count = 0
+        for module, pid, error in results:
+            print("- {} ({})".format(module, pid))
+            if error:
+                print("Error: {}".format(error))
                 exception_count += 1
         return exception_count
 
+    @staticmethod
+    def _integration_tests(module):
+        extension = getattr(importlib.import_module(module), "Extension")
+        return list(extension(None).integration_tests())
+
+
+def validate_integration_test(job):
+    """
+    Runs one integration test of an extension and compares it with the frozen data.
+
+    Defined on module level so it can be sent to worker processes.
+
+    :param job: A tuple of (module, index of the integration test, config)
+    :return: A tuple of (module, pid, error), where error is None if the results were as frozen
+    """
+    from clarity_ext.extensions import ExtensionService, ResultsDifferFromFrozenData
+    module, index, config = job
+    integration_test = IntegrationTestService._integration_tests(module)[index]
+    extension_svc = ExtensionService()
+    pid = extension_svc._parse_run_argument(integration_test)["pid"]
+    try:
+        extension_svc.execute(module, "test", [integration_test], config, artifacts_to_stdout=False, print_help=False)
+    except ResultsDifferFromFrozenData as e:
+        return module, pid, e.message
+    return module, pid, None
+
 
 class FreezingBeforeRunning(Exception):
     """Thrown when the user tries to freeze a state before doing an initial run"""
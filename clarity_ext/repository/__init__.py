@@ -1,3 +1,5 @@
 from step_repository import StepRepository
 from file_repository import FileRepository
+from file_cache import FileCache
 from container_repository import ContainerRepository
+from sample_repository import SampleRepository
@@ -0,0 +1,145 @@
+import os
+import errno
+import shutil
+import logging
+import tempfile
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where the cache is then not safe to share between processes
+    fcntl = None
+
+
+class FileCache(object):
+    """
+    A disk cache for files downloaded from Clarity that can be shared by all processes on a machine.
+
+    File contents are stored once per SHA-256 digest, in `objects/`. An index in `index/` maps each
+    Clarity file id to the digest of its content. Since a file in Clarity is never changed after it
+    has been uploaded, a file id always refers to the same content.
+
+    When the total size of the contents exceeds `max_size`, the least recently used ones are removed.
+    Writes and evictions hold an exclusive lock on the cache, reads a shared one.
+    """
+
+    DEFAULT_MAX_SIZE = 2 * 2**30
+
+    def __init__(self, root, max_size=None):
+        self.root = os.path.abspath(root)
+        self.max_size = max_size or self.DEFAULT_MAX_SIZE
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_dir = os.path.join(self.root, "index")
+        self.lock_path = os.path.join(self.root, ".lock")
+        self.logger = logging.getLogger(__name__)
+        for directory in [self.objects_dir, self.index_dir]:
+            try:
+                os.makedirs(directory)
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+
+    @staticmethod
+    def create_from_config(config):
+        """
+        Returns the cache configured with `file_cache_path` and `file_cache_max_mb`,
+        or None if no cache has been configured.
+        """
+        if not config or not config.get("file_cache_path"):
+            return None
+        max_mb = config.get("file_cache_max_mb")
+        return FileCache(config["file_cache_path"], max_mb * 2**20 if max_mb else None)
+
+    def get(self, file_id, local_path):
+        """
+        Copies the cached content of the file to local_path.
+
+        Returns the SHA-256 digest of the content, or None if the file is not in the cache.
+        """
+        with self._lock(shared=True):
+            digest = self._read_index(file_id)
+            if digest is None:
+                return None
+            object_path = self._object_path(digest)
+            if not os.path.exists(object_path):
+                return None
+            shutil.copyfile(object_path, local_path)
+            # The modification time is used to find the least recently used files
+            os.utime(object_path, None)
+        self.logger.info("Fetched file {} from the file cache".format(file_id))
+        return digest
+
+    def put(self, file_id, local_path, digest):
+        """Adds the file at local_path, having the SHA-256 digest, to the cache"""
+        with self._lock(shared=False):
+            object_path = self._object_path(digest)
+            if os.path.exists(object_path):
+                os.utime(object_path, None)
+            else:
+                self._write_atomically(object_path, lambda f: self._copy_content(local_path, f))
+            self._write_atomically(self._index_path(file_id), lambda f: f.write(digest))
+            self._evict()
+
+    def _evict(self):
+        entries = list()
+        for name in os.listdir(self.objects_dir):
+            path = os.path.join(self.objects_dir, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size:
+            return
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self.logger.info("Evicting {} from the file cache".format(path))
+            os.remove(path)
+            total_size -= size
+
+        # Remove index entries that refer to evicted contents
+        for file_id in os.listdir(self.index_dir):
+            digest = self._read_index(file_id)
+            if digest is None or not os.path.exists(self._object_path(digest)):
+                os.remove(self._index_path(file_id))
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def _index_path(self, file_id):
+        return os.path.join(self.index_dir, file_id)
+
+    def _read_index(self, file_id):
+        try:
+            with open(self._index_path(file_id), "r") as f:
+                return f.read().strip() or None
+        except IOError:
+            return None
+
+    @staticmethod
+    def _copy_content(source, target_file):
+        with open(source, "rb") as f:
+            shutil.copyfileobj(f, target_file, 1024 * 1024)
+
+    def _write_atomically(self, path, write):
+        """Writes to a temporary file that is renamed to path, so readers never see a partial file"""
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    @contextmanager
+    def _lock(self, shared):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
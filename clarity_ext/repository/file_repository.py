@@ -1,17 +1,86 @@
+import os
+import hashlib
+
+
 class FileRepository:
     """
     Handles remote and local file access.
     """
 
-    def __init__(self, session):
+    # The number of bytes read from the network and written to disk at a time
+    CHUNK_SIZE = 1024 * 1024
+
+    # Suffix of files that are being downloaded. Downloads that fail are resumed from them.
+    PARTIAL_SUFFIX = ".part"
+
+    def __init__(self, session, chunk_size=None):
         self.session = session
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
 
-    def copy_remote_file(self, remote_file_id, local_path):
-        # TODO: implemented in the genologics pip package?
-        response = self.session.get("files/{}/download".format(remote_file_id))
-        with open(local_path, 'wb') as fd:
-            for chunk in response.iter_content():
-                fd.write(chunk)
+    def copy_remote_file(self, remote_file_id, local_path, sha256=None):
+        """
+        Streams the remote file to local_path and returns the hex encoded SHA-256 digest of its content.
+
+        The file is written to local_path + ".part" first and only renamed when complete, so an
+        interrupted download is resumed from where it stopped the next time it's copied.
+
+        :param sha256: The expected SHA-256 digest of the file, if known.
+        """
+        partial_path = local_path + self.PARTIAL_SUFFIX
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = dict()
+        if offset:
+            # The range is in bytes of the content as sent, so the rest of it must not be compressed
+            headers = {"Range": "bytes={}-".format(offset), "Accept-Encoding": "identity"}
+        response = self.session.get("files/{}/download".format(remote_file_id), stream=True, headers=headers)
+        try:
+            digest = hashlib.sha256()
+            if offset and response.status_code == 416:
+                # The range starts at the end of the file, so the partial file already has all of it
+                self._update_digest(digest, partial_path)
+                if sha256 and digest.hexdigest() != sha256:
+                    os.remove(partial_path)
+                    return self.copy_remote_file(remote_file_id, local_path, sha256)
+                return self._complete(partial_path, local_path, digest)
+            response.raise_for_status()
+            if response.status_code == 206:
+                self._update_digest(digest, partial_path)
+                mode = 'ab'
+            else:
+                # The server sent the whole file
+                offset = 0
+                mode = 'wb'
+            with open(partial_path, mode) as fd:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    fd.write(chunk)
+                    digest.update(chunk)
+        finally:
+            response.close()
+
+        # The length of a compressed body is that of the compressed content, while iter_content decompresses it
+        content_length = response.headers.get("Content-Length")
+        size = os.path.getsize(partial_path)
+        if content_length is not None and not response.headers.get("Content-Encoding") and \
+                size != offset + int(content_length):
+            raise DownloadIncomplete("Downloaded {} of {} bytes of file {}".format(
+                size, offset + int(content_length), remote_file_id))
+        if sha256 and digest.hexdigest() != sha256:
+            os.remove(partial_path)
+            raise ChecksumMismatch("File {} has the checksum {}, expected {}".format(
+                remote_file_id, digest.hexdigest(), sha256))
+        return self._complete(partial_path, local_path, digest)
+
+    @staticmethod
+    def _complete(partial_path, local_path, digest):
+        if os.path.exists(local_path):
+            os.remove(local_path)
+        os.rename(partial_path, local_path)
+        return digest.hexdigest()
+
+    def _update_digest(self, digest, path):
+        with open(path, 'rb') as fd:
+            for chunk in iter(lambda: fd.read(self.chunk_size), b""):
+                digest.update(chunk)
 
     def open_local_file(self, local_path, mode):
         """
@@ -21,3 +90,12 @@ class FileRepository:
         Services will always use this way of opening files.
         """
         return open(local_path, mode)
+
+
+class DownloadIncomplete(Exception):
+    """Thrown when the connection closed before the whole file was downloaded. Copying again resumes it."""
+    pass
+
+
+class ChecksumMismatch(Exception):
+    pass
@@ -0,0 +1,42 @@
+from clarity_ext.domain.aliquot import Sample, Project
+
+
+class SampleRepository:
+    """
+    Used to fetch `Sample` domain objects for all artifacts in a step.
+
+    Samples are created without any requests. The first time the name or project of one of them is
+    accessed, all samples created through the repository so far are fetched in one batch call.
+    Each distinct project is then fetched once (the REST API has no batch endpoint for projects).
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.cache = dict()
+        self.project_cache = dict()
+        self._pending = dict()
+
+    def get_samples(self, sample_resources):
+        return [self.get_sample(sample_resource) for sample_resource in sample_resources]
+
+    def get_sample(self, sample_resource):
+        if sample_resource.id in self.cache:
+            return self.cache[sample_resource.id]
+        else:
+            self._pending[sample_resource.uri] = sample_resource
+            ret = Sample(sample_resource.id, loader=lambda sample: self._load(sample_resource))
+            self.cache[sample_resource.id] = ret
+            return ret
+
+    def _load(self, sample_resource):
+        if self._pending:
+            self.session.api.get_batch(list(self._pending.values()))
+            self._pending = dict()
+        return sample_resource.name, self._get_project(sample_resource.project)
+
+    def _get_project(self, project_resource):
+        if project_resource is None:
+            return None
+        if project_resource.uri not in self.project_cache:
+            self.project_cache[project_resource.uri] = Project(project_resource.name)
+        return self.project_cache[project_resource.uri]
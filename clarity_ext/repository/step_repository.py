@@ -3,8 +3,8 @@ from clarity_ext.domain.analyte import Analyte
 from clarity_ext.domain.result_file import ResultFile
 from clarity_ext.domain.shared_result_file import SharedResultFile
 from clarity_ext.repository.container_repository import ContainerRepository
+from clarity_ext.repository.sample_repository import SampleRepository
 from clarity_ext.domain.user import User
-import copy
 
 
 class StepRepository(object):
@@ -26,7 +26,8 @@ class StepRepository(object):
         """
         self.session = session
         self.udf_map = udf_map or DEFAULT_UDF_MAP
-        self.orig_state_cache = dict()
+        self._parent_container_repo = ContainerRepository()
+        self._parent_sample_repo = SampleRepository(session)
 
     def all_udfs(self):
         """
@@ -62,24 +63,43 @@ class StepRepository(object):
             input['uri'] = artifacts_by_uri[input['uri'].uri]
             output['uri'] = artifacts_by_uri[output['uri'].uri]
 
+        self._prefetch_containers(artifacts)
+
         ret = []
-        # TODO: Ensure that the container repo fetches all containers in one batch call:
         container_repo = ContainerRepository()
+        sample_repo = SampleRepository(self.session)
         for input_res, output_res in input_output_maps:
             input, output = self._wrap_input_output(
-                input_res, output_res, container_repo)
+                input_res, output_res, container_repo, sample_repo)
             ret.append((input, output))
 
-        self._add_to_orig_state_cache(ret)
+        self._reset_updated_fields(ret)
         return ret
 
-    def _add_to_orig_state_cache(self, artifact_tuple_list):
-        artifact_set = set(list(sum(artifact_tuple_list, ())))
-        artifact_dict = {artifact.id: copy.copy(artifact) for artifact in artifact_set}
-        artifact_dict.update(self.orig_state_cache)
-        self.orig_state_cache = artifact_dict
+    def _prefetch_containers(self, artifacts):
+        """
+        Fetches all containers the artifacts are placed in with one batch call and then each distinct
+        container type once (the REST API has no batch endpoint for container types).
 
-    def _wrap_input_output(self, input_info, output_info, container_repo):
+        After this, creating the `Container` domain objects doesn't require any further requests,
+        so wrapping a step costs the same number of requests regardless of the number of plates.
+        """
+        containers_by_uri = dict()
+        for artifact in artifacts:
+            container, _ = artifact.location
+            if container is not None:
+                containers_by_uri[container.uri] = container
+        containers = self.session.api.get_batch(list(containers_by_uri.values()))
+        container_types_by_uri = {container.type.uri: container.type for container in containers}
+        for container_type in container_types_by_uri.values():
+            container_type.get()
+
+    def _reset_updated_fields(self, artifact_tuple_list):
+        """Fields set while wiring up the artifacts are not updates"""
+        for artifact in set(sum(artifact_tuple_list, ())):
+            artifact.reset_updated_fields()
+
+    def _wrap_input_output(self, input_info, output_info, container_repo, sample_repo):
         # Create a map of all containers, so we can fill in it while building
         # domain objects.
 
@@ -89,8 +109,8 @@ class StepRepository(object):
         output_resource = output_info["uri"]
         output_gen_type = output_info["output-generation-type"]
         input = self._wrap_artifact(
-            input_resource, container_repo, gen_type="Input", is_input=True)
-        output = self._wrap_artifact(output_resource, container_repo,
+            input_resource, container_repo, sample_repo, gen_type="Input", is_input=True)
+        output = self._wrap_artifact(output_resource, container_repo, sample_repo,
                                      gen_type=output_gen_type, is_input=False)
 
         if output_gen_type == "PerInput":
@@ -117,15 +137,17 @@ class StepRepository(object):
 
         return input, output
 
-    def _wrap_artifact(self, artifact, container_repo, gen_type, is_input):
+    def _wrap_artifact(self, artifact, container_repo, sample_repo, gen_type, is_input):
         """
         Wraps an artifact in a domain object, if one exists. The domain objects provide logic
         convenient methods for working with the domain object in extensions.
         """
         if artifact.type == "Analyte":
-            wrapped = Analyte.create_from_rest_resource(artifact, is_input, self.udf_map, container_repo)
+            wrapped = Analyte.create_from_rest_resource(artifact, is_input, self.udf_map, container_repo,
+                                                        sample_repo)
         elif artifact.type == "ResultFile" and gen_type == "PerInput":
-            wrapped = ResultFile.create_from_rest_resource(artifact, is_input, self.udf_map, container_repo)
+            wrapped = ResultFile.create_from_rest_resource(artifact, is_input, self.udf_map, container_repo,
+                                                           sample_repo)
         elif artifact.type == "ResultFile" and gen_type == "PerAllInputs":
             wrapped = SharedResultFile.create_from_rest_resource(artifact, self.udf_map)
         else:
@@ -140,6 +162,28 @@ class StepRepository(object):
 
         return wrapped
 
+    def parent_input_artifact_resources(self, parent_processes):
+        """
+        Fetches the input artifacts of all the parent processes, using the current session.
+
+        The input-output map of each process requires one request, after which the input artifacts
+        of all processes are fetched in one batch call. The REST resources are returned unwrapped,
+        so they can be indexed without wrapping artifacts that are never used.
+        """
+        artifacts_by_uri = dict()
+        for process in parent_processes:
+            for input, _ in process.input_output_maps:
+                artifacts_by_uri[input["uri"].uri] = input["uri"]
+        return self.session.api.get_batch(list(artifacts_by_uri.values()))
+
+    def wrap_parent_input_artifact(self, artifact):
+        """
+        Wraps an input artifact resource from a parent process in a domain object. Containers and samples
+        are shared between all parent input artifacts wrapped by this repository.
+        """
+        return self._wrap_artifact(artifact, self._parent_container_repo, self._parent_sample_repo,
+                                   gen_type="Input", is_input=True)
+
     def _wrap_artifacts(self, artifacts):
         for artifact in artifacts:
             yield self._wrap_artifact(artifact)
@@ -151,7 +195,7 @@ class StepRepository(object):
         update_queue = []
         response = []
         for artifact in artifacts:
-            updated_fields = self._retrieve_updated_fields(artifact)
+            updated_fields = artifact.updated_fields()
             original_artifact_from_rest = artifact.api_resource
             updated_rest_resource, single_response = \
                 artifact.updated_rest_resource(
@@ -160,12 +204,10 @@ class StepRepository(object):
             update_queue.append(updated_rest_resource)
 
         self.session.api.put_batch(update_queue)
+        for artifact in artifacts:
+            artifact.reset_updated_fields()
         return sum(response, [])
 
-    def _retrieve_updated_fields(self, updated_artifact):
-        orig_art = self.orig_state_cache[updated_artifact.id]
-        return updated_artifact.differing_fields(orig_art)
-
     def current_user(self):
         current_user_resource = self.session.current_step.technician
         return User.create_from_rest_resource(current_user_resource)
@@ -1,8 +1,6 @@
 import logging
 from clarity_ext.domain import *
 from clarity_ext.domain.shared_result_file import SharedResultFile
-from clarity_ext.repository import StepRepository
-from clarity_ext import ClaritySession
 
 
 class ArtifactService:
@@ -18,7 +16,8 @@ class ArtifactService:
         self.step_repository = step_repository
         self.logger = logging.getLogger(__name__)
         self._artifacts = None
-        self._parent_input_artifacts_by_sample_id = None
+        self._parent_input_resources_by_sample_id = None
+        self._parent_input_artifacts_by_id = dict()
 
     def all_artifacts(self):
         # NOTE: The underlying REST library does also do some caching, but since this library wraps
@@ -136,30 +135,36 @@ class ArtifactService:
         This method will fetch all of the input artifacts based on all of your output artifacts in one call
         and index them by their respective process id.
         """
-
-        # We will need the input artifacts from the previous step
-        parent_processes = set([artifact.input.parent_process for artifact in self.all_output_artifacts()])
-
-        for process in parent_processes:
-            # This might seem roundabout, but for simplicity, we create another artifact service for
-            # fetching the parent items:
-            parent_step_repo = StepRepository(ClaritySession.create(process.id))
-            parent_artifact_service = ArtifactService(parent_step_repo)
-            for input in parent_artifact_service.all_input_artifacts():
-                yield input
+        for resource in self._parent_input_artifact_resources():
+            yield self._wrap_parent_input_artifact(resource)
+
+    def _parent_input_artifact_resources(self):
+        # We will need the input artifacts from the previous step. Artifacts that were not created by
+        # a process (i.e. the original samples) have no parent process:
+        parent_processes = set(artifact.input.parent_process for artifact in self.all_output_artifacts())
+        parent_processes.discard(None)
+        return self.step_repository.parent_input_artifact_resources(parent_processes)
+
+    def _wrap_parent_input_artifact(self, resource):
+        if resource.id not in self._parent_input_artifacts_by_id:
+            self._parent_input_artifacts_by_id[resource.id] = \
+                self.step_repository.wrap_parent_input_artifact(resource)
+        return self._parent_input_artifacts_by_id[resource.id]
 
     def get_parent_input_artifact(self, sample):
         """
         Given a sample in some artifact, returns parent artifact for that sample.
 
         Performance note:
-        Starts by fetching all input artifacts of all parent processes (to save time if there are further calls)
+        Starts by fetching all input artifacts of all parent processes (to save time if there are further calls).
+        Only the artifacts that are asked for are wrapped in domain objects.
         """
-        if not self._parent_input_artifacts_by_sample_id:
-            parent_input_artifacts = list(self.parent_input_artifacts())
-            self._parent_input_artifacts_by_sample_id = {
-                utils.single(current.samples).id: current for current in parent_input_artifacts}
-        return self._parent_input_artifacts_by_sample_id[sample.id]
+        if self._parent_input_resources_by_sample_id is None:
+            self._parent_input_resources_by_sample_id = {
+                utils.single(resource.samples).id: resource
+                for resource in self._parent_input_artifact_resources()}
+        resource = self._parent_input_resources_by_sample_id[sample.id]
+        return self._wrap_parent_input_artifact(resource)
 
     def all_output_result_files(self):
         """
@@ -1,8 +1,10 @@
 import re
 import os
-import shutil
+import csv
 import logging
-from lxml import objectify
+import operator
+from multiprocessing.pool import ThreadPool
+from lxml import objectify, etree
 
 
 class FileService:
@@ -11,11 +13,16 @@ class FileService:
     well as cleaning up after a script as run
     """
 
-    def __init__(self, artifact_service, file_repo, should_cache, os_service):
+    # The maximum number of shared files downloaded at the same time by `prefetch`
+    PREFETCH_THREADS = 4
+
+    def __init__(self, artifact_service, file_repo, should_cache, os_service, file_cache=None):
         """
         :param artifact_service: An artifact service instance.
         :param should_cache: Set to True if files should be cached in .cache, mainly
         for faster integration tests.
+        :param os_service: Provides access to the file system. Local files are kept in its working directory.
+        :param file_cache: A `FileCache` that downloaded files are kept in, shared with other runs.
         """
         self._local_shared_files = []
         self.artifact_service = artifact_service
@@ -23,6 +30,9 @@ class FileService:
         self.should_cache = should_cache
         self.file_repo = file_repo
         self.os_service = os_service
+        self.file_cache = file_cache
+        self._shared_files_by_name = None
+        self._prefetched = dict()
 
     def parse_xml(self, f):
         """
@@ -33,10 +43,96 @@ class FileService:
             tree = objectify.parse(f)
             return tree.getroot()
 
-    def parse_csv(self, f):
+    def iterparse_xml(self, f, path):
+        """
+        Parses the file like object as XML, yielding the elements at `path` one at a time. Meant for XML
+        files too large to be held in memory, as elements are removed from the tree once they have
+        been processed.
+
+        The path is a tag, e.g. "Well", or the last tags to the element, e.g. "Plate/Well". Namespaces can
+        be left out of the tags. The elements are regular lxml elements, so children are read with
+        e.g. `well.findtext("{*}Value")`, where {*} matches any namespace or none.
+        """
+        path = [tag if tag.startswith("{") else "{*}" + tag for tag in path.split("/")]
+        with f:
+            # Only the elements with the last tag are returned by lxml, the rest of the path is checked here
+            matching_parent = None
+            for _, element in etree.iterparse(f, events=("end",), tag=path[-1]):
+                parent = element.getparent()
+                # Records are usually siblings, so the path of the parent only has to be checked once
+                if parent is not matching_parent:
+                    if not self._matches_path(parent, path[:-1]):
+                        continue
+                    matching_parent = parent
+                self._remove_preceding(element)
+                yield element
+                element.clear()
+
+    @staticmethod
+    def _matches_path(element, path):
+        for tag in reversed(path):
+            if element is None:
+                return False
+            if tag.startswith("{*}"):
+                if element.tag.rpartition("}")[2] != tag[3:]:
+                    return False
+            elif tag != element.tag:
+                return False
+            element = element.getparent()
+        return True
+
+    @staticmethod
+    def _remove_preceding(element):
+        """Removes all elements before the element from the tree, also those that aren't records"""
+        while element.getparent() is not None:
+            parent = element.getparent()
+            while element.getprevious() is not None:
+                del parent[0]
+            element = parent
+
+    def parse_csv(self, f, reader=False, columns=None, types=None):
+        """
+        Reads the file like object into a `Csv`.
+
+        With reader, columns or types, a `CsvReader` is returned instead, reading the file one row at a time.
+        The file is then left open, since it's read as the rows are iterated over.
+        """
+        if reader or columns or types:
+            return CsvReader(f, columns=columns, types=types)
         with f:
             return Csv(f)
 
+    def prefetch(self, file_names, extension=""):
+        """
+        Starts downloading the shared files on a thread pool and returns right away.
+
+        `local_shared_file` waits for a prefetched file to be downloaded, if it hasn't been already,
+        and then opens the local copy. Files that don't exist in the step are skipped here, so asking for
+        them later fails as usual.
+        """
+        pending = list()
+        for file_name in file_names:
+            local_file_name = self._local_file_name(file_name, extension)
+            local_path = self.os_service.abspath(local_file_name)
+            if local_path in self._prefetched:
+                continue
+            try:
+                artifact = self._artifact_by_name(file_name)
+            except SharedFileNotFound:
+                self.logger.warning("Not prefetching '{}', it's not a shared file in the step".format(file_name))
+                continue
+            pending.append((file_name, local_file_name, local_path, artifact))
+
+        if not pending:
+            return
+        pool = ThreadPool(min(len(pending), self.PREFETCH_THREADS))
+        for file_name, local_file_name, local_path, artifact in pending:
+            self.logger.info("Prefetching shared file '{}'".format(file_name))
+            self._prefetched[local_path] = pool.apply_async(
+                self._copy_to_local, (file_name, local_file_name, local_path, False, artifact))
+            self._add_to_cleanup(local_path)
+        pool.close()
+
     def local_shared_file(self, file_name, mode='r', extension="", modify_attached=False):
         """
         Downloads the local shared file and returns an open file-like object.
@@ -49,87 +145,234 @@ class FileService:
         """
 
         # TODO: Mockable, file system repo
+        local_file_name = self._local_file_name(file_name, extension)
+        local_path = self.os_service.abspath(local_file_name)
+
+        prefetched = self._prefetched.pop(local_path, None)
+        if prefetched:
+            # Raises the exception if the download failed
+            prefetched.get()
+        artifact = self._copy_to_local(file_name, local_file_name, local_path, modify_attached)
 
+        # Add to this to the cleanup list
+        self._add_to_cleanup(local_path)
+
+        if modify_attached:
+            if artifact is None:
+                artifact = self._artifact_by_name(file_name)
+            # After this, the caller will be able to modify the file with the prefix that ensures
+            # that this will be uploaded afterwards. We don't want that in the case of files that are
+            # not to be modified, since then they would be automatically uploaded afterwards.
+            attached_name = self.os_service.attach_file_for_epp(local_path, artifact.api_resource)
+            local_path = attached_name
+
+        return self.file_repo.open_local_file(local_path, mode)
+
+    def _local_file_name(self, file_name, extension):
         # Ensure that the user is only sending in a "name" (alphanumerical or spaces)
         # File paths are not allowed
         if not re.match(r"[\w ]+", file_name):
             raise ValueError(
                 "File name can only contain alphanumeric characters, underscores and spaces")
-        local_file_name = ".".join([file_name.replace(" ", "_"), extension])
-        local_path = os.path.abspath(local_file_name)
-        local_path = os.path.abspath(local_path)
-        cache_directory = os.path.abspath(".cache")
+        return ".".join([file_name.replace(" ", "_"), extension])
+
+    def _copy_to_local(self, file_name, local_file_name, local_path, modify_attached, artifact=None):
+        """
+        Copies the shared file to local_path from the cache or the LIMS, unless it's already there.
+
+        Returns the shared file artifact if it had to be looked up.
+        """
+        cache_directory = self.os_service.abspath(".cache")
         cache_path = os.path.join(cache_directory, local_file_name)
-        artifact = None
 
-        if self.should_cache and os.path.exists(cache_path):
+        if self.should_cache and self.os_service.exists(cache_path):
             self.logger.info("Fetching cached artifact from '{}'".format(cache_path))
-            shutil.copy(cache_path, ".")
+            self.os_service.copy_file(cache_path, local_path)
         else:
-            if not os.path.exists(local_path):
-                artifact = self._artifact_by_name(file_name)
+            if not self.os_service.exists(local_path):
+                artifact = artifact or self._artifact_by_name(file_name)
 
                 if len(artifact.api_resource.files) == 0:
                     # No file has been uploaded yet
                     if modify_attached:
-                        with open(local_path, "w+") as fs:
+                        with self.os_service.open_file(local_path, "w+"):
                             pass
                 else:
                     file = artifact.api_resource.files[0]  # TODO: Hide this logic
-                    self.logger.info("Downloading file {} (artifact={} '{}')"
-                                     .format(file.id, artifact.id, artifact.name))
-                    self.file_repo.copy_remote_file(file.id, local_path)
-                    self.logger.info("Download completed, path='{}'".format(local_path))
+                    if not self.file_cache or not self.file_cache.get(file.id, local_path):
+                        self.logger.info("Downloading file {} (artifact={} '{}')"
+                                         .format(file.id, artifact.id, artifact.name))
+                        digest = self.file_repo.copy_remote_file(file.id, local_path)
+                        self.logger.info("Download completed, path='{}'".format(local_path))
+                        if self.file_cache:
+                            self.file_cache.put(file.id, local_path, digest)
 
                     if self.should_cache:
-                        if not os.path.exists(cache_directory):
-                            os.mkdir(cache_directory)
+                        if not self.os_service.exists(cache_directory):
+                            self.os_service.mkdir(cache_directory)
                         self.logger.info("Copying artifact to cache directory, {}=>{}".format(
                             local_path, cache_directory))
-                        shutil.copy(local_path, cache_directory)
+                        self.os_service.copy_file(local_path, cache_path)
+        return artifact
 
-        # Add to this to the cleanup list
+    def _add_to_cleanup(self, local_path):
         if local_path not in self._local_shared_files:
             self._local_shared_files.append(local_path)
 
-        if modify_attached:
-            if artifact is None:
-                artifact = self._artifact_by_name(file_name)
-            # After this, the caller will be able to modify the file with the prefix that ensures
-            # that this will be uploaded afterwards. We don't want that in the case of files that are
-            # not to be modified, since then they would be automatically uploaded afterwards.
-            attached_name = self.os_service.attach_file_for_epp(local_file_name, artifact.api_resource)
-            local_path = attached_name
-
-        return self.file_repo.open_local_file(local_path, mode)
-
     def _artifact_by_name(self, file_name):
-        shared_files = self.artifact_service.shared_files()
-        by_name = [shared_file for shared_file in shared_files
-                   if shared_file.name == file_name]
+        if self._shared_files_by_name is None:
+            self._shared_files_by_name = dict()
+            for shared_file in self.artifact_service.shared_files():
+                self._shared_files_by_name.setdefault(shared_file.name, []).append(shared_file)
+        by_name = self._shared_files_by_name.get(file_name, [])
         if len(by_name) != 1:
-            files = ", ".join(map(lambda x: x.name, shared_files))
+            files = ", ".join(name for name, shared_files in self._shared_files_by_name.items()
+                              for _ in shared_files)
             raise SharedFileNotFound("Expected a shared file called '{}', got {}.\nFile: '{}'\nFiles: {}".format(
                 file_name, len(by_name), file_name, files))
         artifact = by_name[0]
         return artifact
 
     def cleanup(self):
+        # Downloads that are still running would otherwise create the files again
+        for prefetched in self._prefetched.values():
+            prefetched.wait()
         for path in self._local_shared_files:
-            if os.path.exists(path):
+            if self.os_service.exists(path):
                 self.logger.info("Local shared file '{}' will be removed to ensure "
                                  "that it won't be uploaded again".format(path))
                 # TODO: Handle exception
-                os.remove(path)
+                self.os_service.remove(path)
 
 
 class SharedFileNotFound(Exception):
     pass
 
 
+class CsvReader(object):
+    """
+    Reads a CSV file one row at a time.
+
+    Only the columns asked for are kept, and they can be converted when read:
+
+        reader = CsvReader(f, columns=["Well", "Conc"], types={"Conc": float})
+        for row in reader:
+            print(row["Well"], row["Conc"])
+
+    Quoted values may contain the delimiter. Rows shorter than the header are padded with empty values.
+    """
+
+    def __init__(self, file_stream, delim=",", columns=None, types=None):
+        """
+        :param file_stream: A file-like object, positioned at the header
+        :param columns: The columns to read. By default, all columns are read.
+        :param types: A dictionary from column to a function converting the values in it, e.g. float
+        """
+        self._reader = csv.reader(file_stream, delimiter=delim)
+        self.header = next(self._reader)
+        self.key_to_index = {key: ix for ix, key in enumerate(self.header)}
+        self.columns = list(columns or self.header)
+        missing = [column for column in self.columns if column not in self.key_to_index]
+        if missing:
+            raise ValueError("Columns not in the file: {}".format(", ".join(missing)))
+        self._column_to_index = {column: ix for ix, column in enumerate(self.columns)}
+        indexes = [self.key_to_index[column] for column in self.columns]
+        if indexes == range(len(self.header)):
+            self._project = list
+        elif len(indexes) == 1:
+            self._project = lambda values, ix=indexes[0]: [values[ix]]
+        else:
+            self._project = lambda values, getter=operator.itemgetter(*indexes): list(getter(values))
+        types = types or dict()
+        self._converters = [(ix, types[column]) for ix, column in enumerate(self.columns) if column in types]
+
+    def __iter__(self):
+        column_to_index = self._column_to_index
+        for values in self._values():
+            yield CsvRow(values, column_to_index)
+
+    def _values(self):
+        project = self._project
+        converters = self._converters
+        width = len(self.header)
+        for values in self._reader:
+            if not values:
+                continue
+            if len(values) < width:
+                # Trailing empty values are left out by some programs
+                values += [""] * (width - len(values))
+            values = project(values)
+            for ix, convert in converters:
+                values[ix] = convert(values[ix])
+            yield values
+
+    def index(self, key_column):
+        """Reads the remaining rows into a dictionary, by the value in the key column"""
+        ret = dict()
+        for row in self:
+            key = row[key_column]
+            if key in ret:
+                raise ValueError("The value '{}' occurs more than once in column '{}'".format(key, key_column))
+            ret[key] = row
+        return ret
+
+    def to_columns(self, numeric=None):
+        """
+        Reads the remaining rows into a dictionary from column to a list of its values.
+
+        :param numeric: Columns that are numeric. If NumPy is installed, they are returned as float arrays.
+        """
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        ret = {column: list(values) for column, values in zip(self.columns, zip(*self._values()))}
+        for column in self.columns:
+            ret.setdefault(column, list())
+        for column in numeric or []:
+            if numpy:
+                ret[column] = numpy.array(ret[column], dtype=float)
+            else:
+                ret[column] = [float(value) for value in ret[column]]
+        return ret
+
+
+class CsvRow(object):
+    """One row read by a `CsvReader`"""
+    __slots__ = ["values", "_column_to_index"]
+
+    def __init__(self, values, column_to_index):
+        self.values = values
+        self._column_to_index = column_to_index
+
+    def __getitem__(self, key):
+        return self.values[self._column_to_index[key]]
+
+    def get(self, key, default=None):
+        value = self.values[self._column_to_index[key]]
+        return default if value == "" else value
+
+    def get_float(self, key, default=None):
+        value = self.get(key)
+        return default if value is None else float(value)
+
+    def get_int(self, key, default=None):
+        value = self.get(key)
+        return default if value is None else int(value)
+
+    def __repr__(self):
+        return repr(self.values)
+
+
 class Csv:
-    """A simple wrapper for csv files"""
+    """
+    A simple wrapper for csv files, reading all of it into memory. Lines can be changed.
+
+    Lines are stripped and split on the delimiter, without any handling of quotes. Use `CsvReader`
+    to read large files or files with quoted values.
+    """
     def __init__(self, file_stream, delim=","):
+        self._indexes = dict()
         if isinstance(file_stream, basestring):
             with open(file_stream, "r") as fs:
                 self._init_from_file_stream(fs, delim)
@@ -139,7 +382,10 @@ class Csv:
     def _init_from_file_stream(self, file_stream, delim):
         lines = list()
         for line in file_stream:
-            values = line.strip().split(delim)
+            line = line.strip()
+            if not line:
+                continue
+            values = line.split(delim)
             csv_line = CsvLine(values, self)
             lines.append(csv_line)
             if len(lines) == 1:
@@ -147,6 +393,12 @@ class Csv:
         self.header = lines[0]
         self.data = lines[1:]
 
+    def index(self, key_column):
+        """Returns the lines in a dictionary by the value in the key column. Built the first time it's asked for."""
+        if key_column not in self._indexes:
+            self._indexes[key_column] = {line[key_column]: line for line in self.data}
+        return self._indexes[key_column]
+
     def __iter__(self):
         return iter(self.data)
 
@@ -164,6 +416,8 @@ class CsvLine:
     def __setitem__(self, key, value):
         index = self.csv.key_to_index[key]
         self.line[index] = value
+        # The value may be a key in an index
+        self.csv._indexes.clear()
 
     @property
     def values(self):
@@ -1,11 +1,122 @@
+import mmap
+from array import array
+from clarity_ext.utils import lazyprop
+
+
 class HamiltonReader(object):
+    """
+    Reads a tab separated Hamilton driver file, one row per transfer, with the columns in `HamiltonColumnReference`.
+
+    Rows can be looked up by sample with `dict_matrix` or `row_by_sample`, and by plate and well with
+    `row_by_target` and `rows_by_source`. The lookups are built the first time they are used.
+    """
+
+    DELIMITER = "\t"
 
     def __init__(self, filecontents):
-        self._delimiter = "\t"
-        rows = filter(lambda rw: len(rw) > 0, filecontents.split("\n"))
-        self.matrix = [row.split(self._delimiter) for row in rows]
-        entries = [(rw[0], rw) for rw in self.matrix]
-        self.dict_matrix = dict(entries)
+        """
+        :param filecontents: The contents of the file, or any object with a readline method, such as an open file
+        """
+        self._delimiter = self.DELIMITER
+        if isinstance(filecontents, basestring):
+            lines = filecontents.split("\n")
+        else:
+            lines = iter(filecontents.readline, "")
+        self.matrix = list(self._split_lines(lines, self._delimiter))
+
+    @staticmethod
+    def create_from_path(path):
+        """
+        Reads the file by memory mapping it, so its contents are split into rows without first being read
+        into one string. All rows are still held in `matrix`, use `iter_rows` for files too large for that.
+        """
+        with open(path, "rb") as f:
+            if not HamiltonReader._has_content(f):
+                return HamiltonReader("")
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return HamiltonReader(mapped)
+            finally:
+                mapped.close()
+
+    @staticmethod
+    def iter_rows(path):
+        """Yields the rows of the file one at a time, for files that are too large to be read as a whole"""
+        with open(path, "r") as f:
+            for row in HamiltonReader._split_lines(f, HamiltonReader.DELIMITER):
+                yield row
+
+    @staticmethod
+    def _split_lines(lines, delimiter):
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if len(line) > 0:
+                yield line.split(delimiter)
+
+    @staticmethod
+    def _has_content(f):
+        f.seek(0, 2)
+        size = f.tell()
+        f.seek(0)
+        return size > 0
+
+    @lazyprop
+    def dict_matrix(self):
+        return {row[HamiltonColumnReference.SAMPLE]: row for row in self.matrix}
+
+    @lazyprop
+    def _rows_by_target(self):
+        return {(row[HamiltonColumnReference.TARGET_PLATE_POS], row[HamiltonColumnReference.TARGET_WELL_POS]): row
+                for row in self.matrix}
+
+    @lazyprop
+    def _rows_by_source(self):
+        ret = dict()
+        for row in self.matrix:
+            key = (row[HamiltonColumnReference.SOURCE_PLATE_POS], row[HamiltonColumnReference.SOURCE_WELL_POS])
+            ret.setdefault(key, list()).append(row)
+        return ret
+
+    def row_by_sample(self, sample):
+        return self.dict_matrix[sample]
+
+    def row_by_target(self, plate, well):
+        """Returns the row transferring to the well, given by its position as in the file, e.g. ("END1", 16)"""
+        return self._rows_by_target[(plate, str(well))]
+
+    def rows_by_source(self, plate, well):
+        """Returns all rows transferring from the well, as a sample can be transferred to more than one well"""
+        return self._rows_by_source.get((plate, str(well)), list())
+
+    @lazyprop
+    def volume_sample(self):
+        """The sample volumes of all rows, as an array('d')"""
+        return self._float_column(HamiltonColumnReference.VOLUME_SAMPLE)
+
+    @lazyprop
+    def volume_buffer(self):
+        """The buffer volumes of all rows, as an array('d')"""
+        return self._float_column(HamiltonColumnReference.VOLUME_BUFFER)
+
+    def volumes(self, column, as_numpy=False):
+        """
+        Returns the volumes in a column of all rows, e.g. HamiltonColumnReference.VOLUME_SAMPLE
+
+        :param as_numpy: Return a NumPy array rather than an array('d'). Requires NumPy.
+        """
+        if column == HamiltonColumnReference.VOLUME_SAMPLE:
+            values = self.volume_sample
+        elif column == HamiltonColumnReference.VOLUME_BUFFER:
+            values = self.volume_buffer
+        else:
+            values = self._float_column(column)
+        if as_numpy:
+            import numpy
+            return numpy.array(values, dtype=float)
+        return values
+
+    def _float_column(self, column):
+        return array("d", (float(row[column]) for row in self.matrix))
 
     def number_columns(self):
         return len(self.matrix[0])
@@ -15,12 +126,19 @@ class HamiltonReader(object):
 
 
 class HamiltonColumnReference(object):
+    SAMPLE = 0
+    SOURCE_WELL_POS = 1
+    SOURCE_PLATE_POS = 2
+    VOLUME_SAMPLE = 3
+    VOLUME_BUFFER = 4
+    TARGET_WELL_POS = 5
+    TARGET_PLATE_POS = 6
 
     def __init__(self):
-        self.sample = 0
-        self.source_well_pos = 1
-        self.source_plate_pos = 2
-        self.volume_sample = 3
-        self.volume_buffer = 4
-        self.target_well_pos = 5
-        self.target_plate_pos = 6
+        self.sample = self.SAMPLE
+        self.source_well_pos = self.SOURCE_WELL_POS
+        self.source_plate_pos = self.SOURCE_PLATE_POS
+        self.volume_sample = self.VOLUME_SAMPLE
+        self.volume_buffer = self.VOLUME_BUFFER
+        self.target_well_pos = self.TARGET_WELL_POS
+        self.target_plate_pos = self.TARGET_PLATE_POS
@@ -1,6 +1,6 @@
-import requests_cache
 import os
 import shutil
+import threading
 
 
 # http://stackoverflow.com/a/3013910/282024
@@ -14,10 +14,12 @@ def lazyprop(fn):
     return _lazyprop
 
 # Monkey patch the sqlite cache in requests_cache so that it doesn't save
-# the AUTH_HEADER
-default_dbdict_set_item = requests_cache.backends.storage.dbdict.DbPickleDict.__setitem__
-default_dbdict_get_item = requests_cache.backends.storage.dbdict.DbPickleDict.__getitem__
+# the AUTH_HEADER. The patch is applied the first time caching is turned on, so
+# requests_cache is not imported when running without a cache.
 AUTH_HEADER = 'Authorization'
+default_dbdict_set_item = None
+default_dbdict_get_item = None
+_patch_lock = threading.Lock()
 
 
 def dbdict_set_item(self, key, item):
@@ -42,13 +44,33 @@ def dbdict_get_item(self, key):
         raise ValueError("Auth header was serialized")
     return item
 
-requests_cache.backends.storage.dbdict.DbPickleDict.__setitem__ = dbdict_set_item
-requests_cache.backends.storage.dbdict.DbPickleDict.__getitem__ = dbdict_get_item
+
+def _patched_requests_cache():
+    """Returns the requests_cache module, patched so that the AUTH_HEADER is never cached"""
+    global default_dbdict_set_item, default_dbdict_get_item
+    import requests_cache
+    with _patch_lock:
+        if default_dbdict_set_item is None:
+            db_pickle_dict = requests_cache.backends.storage.dbdict.DbPickleDict
+            default_dbdict_set_item = db_pickle_dict.__setitem__
+            default_dbdict_get_item = db_pickle_dict.__getitem__
+            db_pickle_dict.__setitem__ = dbdict_set_item
+            db_pickle_dict.__getitem__ = dbdict_get_item
+    return requests_cache
 
 
 def use_requests_cache(cache):
     """Turns on caching for the requests library"""
-    requests_cache.install_cache(
+    _patched_requests_cache().install_cache(
+        cache, allowable_methods=('GET', 'POST', 'DELETE', 'PUT'))
+
+
+def requests_cache_session(cache):
+    """
+    Returns a requests session that caches all requests. Unlike `use_requests_cache`, this
+    doesn't affect other sessions in the process.
+    """
+    return _patched_requests_cache().CachedSession(
         cache, allowable_methods=('GET', 'POST', 'DELETE', 'PUT'))
 
 
@@ -0,0 +1,175 @@
+"""
+A long-running worker that executes extensions, so that starting Python, importing the extension
+modules and connecting to Clarity is only done once rather than on every EPP trigger.
+
+Start the worker with `clarity-ext worker`. EPPs then run extensions through the thin client, e.g.:
+
+    clarity-ext-client --args 'pid={processLuid}' clarity_ext_scripts.some.extension exec
+
+The client, in the top level module clarity_ext_client, sends one JSON request per connection and waits
+for the JSON response. Requests are queued and executed by a fixed number of worker threads.
+
+The worker listens on a Unix domain socket that only its own user (and optionally group) may connect to,
+and only runs extensions for directories under a root given when it's started.
+"""
+import os
+import sys
+import stat
+import json
+import struct
+import socket
+import logging
+import threading
+import SocketServer
+import Queue
+# The client is re-exported here for callers that used it from this module
+from clarity_ext_client import DEFAULT_SOCKET, STATUS_OK, STATUS_ERROR, execute
+from clarity_ext_client import main as client_main
+
+DEFAULT_THREADS = 4
+
+# Paths in the config that are relative to the directory the client was started in
+CONFIG_PATHS = ["test_root_path", "frozen_root_path", "exec_root_path"]
+
+# From <sys/socket.h> on Linux, the socket module of Python 2 doesn't define it
+SO_PEERCRED = getattr(socket, "SO_PEERCRED", 17)
+
+
+def peer_credentials(connection):
+    """
+    Returns (pid, uid, gid) of the process connected to the Unix domain socket,
+    or None on platforms other than Linux
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    size = struct.calcsize("3i")
+    return struct.unpack("3i", connection.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, size))
+
+
+class ExtensionJob(object):
+    """A request to execute an extension, as sent by the client"""
+
+    def __init__(self, module, mode, cwd, args=None, cache=None):
+        self.module = str(module)
+        self.mode = mode
+        self.cwd = cwd
+        self.args = args
+        self.cache = cache
+        self.error = None
+        self.done = threading.Event()
+
+    def response(self):
+        if self.error:
+            return {"status": STATUS_ERROR, "message": self.error}
+        return {"status": STATUS_OK}
+
+
+class ExtensionRequestHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        try:
+            job = ExtensionJob(**json.loads(self.rfile.readline()))
+        except (ValueError, TypeError) as e:
+            response = {"status": STATUS_ERROR, "message": "Invalid request: {}".format(e)}
+        else:
+            if self.server.allows_cwd(job.cwd):
+                self.server.submit(job)
+                response = job.response()
+            else:
+                response = {"status": STATUS_ERROR,
+                            "message": "Directory {} is not under {}".format(job.cwd, self.server.cwd_root)}
+        self.wfile.write(json.dumps(response) + "\n")
+
+
+class ExtensionWorker(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+    """
+    Executes extensions requested by clients via `ExtensionService.execute`.
+
+    Extension modules stay imported and sessions to Clarity share connections between requests.
+
+    Requests are not authenticated, so the worker only accepts connections from its own user: the socket
+    is created with mode 0600 and, on Linux, the user of each client is checked. With `group`, the
+    socket is 0660 and clients in the group of the worker are accepted too.
+    """
+    daemon_threads = True
+
+    def __init__(self, config=None, socket_path=DEFAULT_SOCKET, threads=DEFAULT_THREADS, cwd_root=None,
+                 group=False):
+        """
+        :param cwd_root: Extensions are only executed for directories under this one. Defaults to the
+                         current directory.
+        """
+        from clarity_ext.extensions import ExtensionService
+        self.logger = logging.getLogger(__name__)
+        self.cwd_root = os.path.realpath(cwd_root or os.getcwd())
+        self.group = group
+        SocketServer.UnixStreamServer.__init__(self, socket_path, ExtensionRequestHandler)
+        self.config = config or ExtensionService.DEFAULT_CONFIG
+        self.extension_service = ExtensionService()
+        self.jobs = Queue.Queue()
+        for _ in range(threads):
+            thread = threading.Thread(target=self._process_jobs)
+            thread.daemon = True
+            thread.start()
+
+    def server_bind(self):
+        directory = os.path.dirname(self.server_address)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        # The socket of a worker that wasn't shut down cleanly
+        if os.path.exists(self.server_address) and stat.S_ISSOCK(os.stat(self.server_address).st_mode):
+            os.remove(self.server_address)
+        # The socket is created without permissions for anyone else, so there is no window before chmod
+        umask = os.umask(0o177)
+        try:
+            SocketServer.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+        os.chmod(self.server_address, 0o660 if self.group else 0o600)
+
+    def server_close(self):
+        SocketServer.UnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+    def verify_request(self, request, client_address):
+        credentials = peer_credentials(request)
+        if credentials is None:
+            # The permissions of the socket are all there is on this platform
+            return True
+        pid, uid, gid = credentials
+        if uid == os.getuid() or (self.group and gid == os.getgid()):
+            return True
+        self.logger.warning("Refused connection from process {} of user {}".format(pid, uid))
+        return False
+
+    def allows_cwd(self, cwd):
+        """Returns True if extensions may be executed for the directory, i.e. it's under `cwd_root`"""
+        if not isinstance(cwd, basestring):
+            return False
+        path = os.path.realpath(cwd)
+        return path == self.cwd_root or path.startswith(self.cwd_root.rstrip(os.sep) + os.sep)
+
+    def submit(self, job):
+        """Queues the job and blocks until it has been executed"""
+        self.jobs.put(job)
+        job.done.wait()
+
+    def _process_jobs(self):
+        while True:
+            job = self.jobs.get()
+            self.logger.info("Executing {} ({}) for {}".format(job.module, job.mode, job.cwd))
+            try:
+                self.extension_service.execute(job.module, job.mode, job.args, self._config(job.cwd),
+                                               artifacts_to_stdout=False, print_help=False, use_cache=job.cache)
+            except Exception as e:
+                self.logger.exception("Exception while running extension {}".format(job.module))
+                job.error = "{}: {}".format(e.__class__.__name__, e)
+            finally:
+                job.done.set()
+
+    def _config(self, cwd):
+        config = dict(self.config)
+        for key in CONFIG_PATHS:
+            if key in config:
+                config[key] = os.path.join(cwd, config[key])
+        return config
@@ -0,0 +1,61 @@
+"""
+The thin client of the clarity-ext worker (see clarity_ext.worker), run by EPPs instead of clarity-ext:
+
+    clarity-ext-client --args 'pid={processLuid}' clarity_ext_scripts.some.extension exec
+
+This module is kept outside of the clarity_ext package and only uses the standard library, so that
+starting it doesn't import genologics, requests or anything else that clarity_ext loads.
+"""
+from __future__ import print_function
+import os
+import sys
+import json
+import socket
+import argparse
+
+# The worker listens on a Unix domain socket, which only the user running it can connect to
+DEFAULT_SOCKET = os.path.join(os.path.expanduser("~"), ".clarity-ext", "worker.sock")
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+def execute(module, mode, args=None, cache=None, socket_path=DEFAULT_SOCKET):
+    """
+    Executes the extension in the worker listening on the socket, as if it was run from the current directory.
+    Returns the response from the worker.
+    """
+    request = {"module": module, "mode": mode, "cwd": os.getcwd(), "args": args, "cache": cache}
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+        try:
+            connection.sendall(json.dumps(request) + "\n")
+            response = connection.makefile("r").readline()
+        except socket.error:
+            # The worker closed the connection without reading the request
+            response = None
+    finally:
+        connection.close()
+    if not response:
+        return {"status": STATUS_ERROR, "message": "The worker refused the connection, see its log for details"}
+    return json.loads(response)
+
+
+def main(argv=None):
+    """Entry point of the thin client"""
+    parser = argparse.ArgumentParser(description="Executes an extension in a running clarity-ext worker")
+    parser.add_argument("module")
+    parser.add_argument("mode")
+    parser.add_argument("--args")
+    parser.add_argument("--cache", type=lambda value: value.lower() in ["true", "1", "yes"], default=None)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parsed = parser.parse_args(argv)
+    response = execute(parsed.module, parsed.mode, parsed.args, parsed.cache, socket_path=parsed.socket)
+    if response["status"] != STATUS_OK:
+        print(response["message"], file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,13 +16,20 @@ setup(
     description='Main entry point for Clarity extensions in the SNP&SEQ installation',
     long_description=__doc__,
     packages=find_packages(exclude=['tests']),
+    # The thin client of the worker, outside of the package so that it starts without importing it
+    py_modules=['clarity_ext_client'],
     include_package_data=True,
     zip_safe=False,
     platforms='any',
     install_requires=dependencies,
+    extras_require={
+        # Numeric CSV columns are read into arrays when available
+        'numpy': ['numpy'],
+    },
     entry_points={
         'console_scripts': [
             'clarity-ext = clarity_ext.cli:main',
+            'clarity-ext-client = clarity_ext_client:main',
         ],
     },
     classifiers=[
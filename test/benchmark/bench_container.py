@@ -0,0 +1,76 @@
+"""
+Measures creating containers of 384 and 1536 wells, filling them by position, reading
+their wells and finding the occupied ones.
+
+    python -m test.benchmark.bench_container --containers 100 --repeat 5
+"""
+from __future__ import print_function
+import argparse
+import timeit
+from clarity_ext.domain.container import Container, PlateSize
+
+SIZES = [("384", PlateSize(height=16, width=24)), ("1536", PlateSize(height=32, width=48))]
+
+
+def create(size, count):
+    ret = list()
+    for ix in range(count):
+        container = Container(size=size)
+        container.id = container.name = "cont{}".format(ix)
+        ret.append(container)
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--containers", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, size in SIZES:
+        positions = [well.position for well in create(size, 1)[0].list_wells()]
+        keys = ["{}:{}".format(position.row, position.col) for position in positions]
+
+        def one_well():
+            for container in create(size, args.containers):
+                container["B:2"]
+
+        def fill():
+            for container in create(size, args.containers):
+                for key in keys:
+                    container[key] = key
+
+        def read_all():
+            for container in create(size, args.containers):
+                sum(1 for well in container.list_wells() if well.is_empty)
+
+        # Every third well is occupied
+        filled = create(size, args.containers)
+        for container in filled:
+            for key in keys[::3]:
+                container[key] = key
+
+        def scan_occupied():
+            for container in filled:
+                [well for well in container.list_wells() if not well.is_empty]
+
+        def occupied():
+            for container in filled:
+                container.occupied_wells()
+
+        cases = [
+            ("one well", one_well),
+            ("set all wells", fill),
+            ("list all wells", read_all),
+            ("occupied wells, filtered list", scan_occupied),
+            ("occupied wells", occupied),
+            ("first free well", lambda: [container.first_free_well() for container in filled]),
+        ]
+        print("{} containers of {} wells".format(args.containers, name))
+        for case_name, case in cases:
+            best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+            print("{:<32}{:>10.4f}s".format(case_name, best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Measures reading a large CSV file, e.g. a robot or instrument result file.
+
+    python -m test.benchmark.bench_csv --rows 100000 --repeat 3
+"""
+from __future__ import print_function
+import argparse
+from argparse import Namespace
+import timeit
+from StringIO import StringIO
+from clarity_ext.service.file_service import Csv, CsvLine, CsvReader
+
+COLUMNS = ["Well", "Sample", "Conc", "Volume"] + ["Extra{}".format(ix) for ix in range(8)]
+
+
+def generate(rows):
+    lines = [",".join(COLUMNS)]
+    for ix in range(rows):
+        lines.append(",".join(["W{}".format(ix), "sample{}".format(ix), str(ix * 0.5), str(ix % 100)] +
+                              ["x"] * 8))
+    return "\n".join(lines)
+
+
+def split_lines(content):
+    """Reading the way Csv did before it used the csv module"""
+    lines = [line.strip().split(",") for line in StringIO(content)]
+    csv = Namespace(key_to_index={key: ix for ix, key in enumerate(lines[0])})
+    lines = [CsvLine(line, csv) for line in lines]
+    return sum(float(line["Conc"]) for line in lines[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    content = generate(args.rows)
+
+    def projected():
+        reader = CsvReader(StringIO(content), columns=["Conc"], types={"Conc": float})
+        return sum(row["Conc"] for row in reader)
+
+    cases = [
+        ("split lines (old Csv)", lambda: split_lines(content)),
+        ("Csv", lambda: sum(float(line["Conc"]) for line in Csv(StringIO(content)))),
+        ("CsvReader, all columns", lambda: sum(row.get_float("Conc") for row in CsvReader(StringIO(content)))),
+        ("CsvReader, projected", projected),
+        ("CsvReader.index", lambda: CsvReader(StringIO(content), columns=["Well", "Conc"]).index("Well")),
+        ("CsvReader.to_columns", lambda: CsvReader(StringIO(content), columns=["Conc"]).to_columns(["Conc"])),
+    ]
+    print("{} rows of {} columns".format(args.rows, len(COLUMNS)))
+    for name, case in cases:
+        best = min(timeit.repeat(case, number=1, repeat=args.repeat))
+        print("{:<32}{:>10.4f}s".format(name, best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Measures calculating transfer volumes one transfer at a time and in a batch with NumPy.
+
+    python -m test.benchmark.bench_dilution --transfers 10000 --repeat 5
+"""
+from __future__ import print_function
+import argparse
+import random
+import timeit
+from clarity_ext import dilution_strategies, dilution_strategies_batch
+
+
+class Transfer(object):
+    def __init__(self, ix):
+        self.source_concentration = random.choice([None, 0.0] + [random.uniform(1, 1000)] * 20)
+        self.requested_concentration = random.uniform(1, 20)
+        self.requested_volume = random.uniform(10, 100)
+        self.target_aliquot_name = "pool{}".format(ix // 8)
+        self.scaled_up = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(1)
+    transfers = [Transfer(ix) for ix in range(args.transfers)]
+
+    print("{} transfers, pools of 8".format(args.transfers))
+    for strategy_name in ["OneToOneConcentrationCalc", "PoolConcentrationCalc"]:
+        for module in [dilution_strategies, dilution_strategies_batch]:
+            strategy = getattr(module, strategy_name)()
+            best = min(timeit.repeat(lambda: strategy.calculate_transfer_volumes(transfers, True),
+                                     number=1, repeat=args.repeat))
+            print("{:<56}{:>10.4f}s".format("{}.{}".format(module.__name__.split(".")[-1], strategy_name), best))
+
+
+if __name__ == "__main__":
+    main()
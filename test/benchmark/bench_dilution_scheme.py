@@ -0,0 +1,87 @@
+"""
+Measures creating a dilution scheme from full source plates to as many target plates, and the memory
+held by its transfers (objects and their attributes, not the analytes they refer to). Also measures
+updating the scheme after the requested volume of a few target analytes has been changed.
+
+    python -m test.benchmark.bench_dilution_scheme --plates 4 --repeat 5
+"""
+from __future__ import print_function
+import sys
+import argparse
+import random
+import timeit
+from mock import MagicMock
+from clarity_ext.dilution import DilutionScheme, CONCENTRATION_REF_NGUL, VOLUME_CALC_BY_CONC
+from clarity_ext.domain import Container
+from clarity_ext.domain.analyte import Analyte
+from clarity_ext.domain.container import Well, ContainerPosition, PlateSize
+from clarity_ext.service.artifact_service import ArtifactPair
+
+SIZE_384_WELLS = PlateSize(height=16, width=24)
+
+
+def plate_analytes(container_id, is_input):
+    container = Container(size=SIZE_384_WELLS)
+    container.id = container.name = container_id
+    ret = list()
+    for col in range(1, SIZE_384_WELLS.width + 1):
+        for row in range(1, SIZE_384_WELLS.height + 1):
+            well = Well(ContainerPosition(row, col), container)
+            if is_input:
+                udfs = dict(concentration_ngul=random.uniform(0.5, 500), volume=random.uniform(20, 100))
+            else:
+                # Some transfers are above the max pipetting volume and are split up
+                udfs = dict(requested_concentration_ngul=random.uniform(1, 20),
+                            requested_volume=random.choice([20.0, 40.0, 80.0]))
+            analyte = Analyte(api_resource=None, is_input=is_input, name="{}-{}".format(container_id, well),
+                              well=well, samples=[], **udfs)
+            well.artifact = analyte
+            ret.append(analyte)
+    return ret
+
+
+def transfers_size(dilution_scheme):
+    """Approximate bytes held by the transfers of the scheme"""
+    table = getattr(dilution_scheme, "transfer_table", None)
+    if table is not None:
+        return table.memory_size()
+    return sum(sys.getsizeof(t) + sys.getsizeof(t.__dict__) for t in dilution_scheme.transfers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plates", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--changed", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(1)
+    pairs = list()
+    for ix in range(args.plates):
+        inputs = plate_analytes("source{}".format(ix), True)
+        outputs = plate_analytes("target{}".format(ix), False)
+        pairs.extend(ArtifactPair(i, o) for i, o in zip(inputs, outputs))
+    artifact_service = MagicMock()
+    artifact_service.all_aliquot_pairs.return_value = pairs
+
+    def create():
+        return DilutionScheme.create(artifact_service, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                     volume_calc_method=VOLUME_CALC_BY_CONC)
+    scheme = create()
+    best = min(timeit.repeat(create, number=1, repeat=args.repeat))
+    print("{} plates of 384 wells, {} rows".format(args.plates, len(scheme.transfers)))
+    print("{:<32}{:>10.4f}s".format("create", best))
+    print("{:<32}{:>10.0f}kB".format("transfers", transfers_size(scheme) / 1024.0))
+
+    if hasattr(scheme, "update"):
+        changed = [pair.output_artifact for pair in random.sample(pairs, args.changed)]
+
+        def update():
+            for artifact in changed:
+                artifact.requested_volume = random.choice([20.0, 40.0, 80.0])
+            scheme.update(changed)
+        best = min(timeit.repeat(update, number=1, repeat=args.repeat))
+        print("{:<32}{:>10.4f}s".format("update {} targets".format(args.changed), best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measures the throughput of `FileRepository.copy_remote_file` against a local stand-in for the
+Clarity file download endpoint.
+
+    python -m test.benchmark.bench_download --size-mb 200 --chunk-sizes 65536 1048576 4194304
+
+A chunk size of 1 is what `iter_content()` uses by default. Use a small file for it.
+"""
+from __future__ import print_function
+import os
+import re
+import shutil
+import argparse
+import tempfile
+import threading
+import time
+import requests
+import BaseHTTPServer
+import SocketServer
+from clarity_ext.repository.file_repository import FileRepository
+
+
+class FileHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Serves the same file for every path, supporting Range requests like the Clarity server"""
+
+    def do_GET(self):
+        size = os.path.getsize(self.server.file_path)
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        offset = int(match.group(1)) if match else 0
+        self.send_response(206 if offset else 200)
+        self.send_header("Content-Length", str(size - offset))
+        self.end_headers()
+        with open(self.server.file_path, "rb") as f:
+            f.seek(offset)
+            shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+    def log_message(self, *args):
+        pass
+
+
+class FileServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class LocalSession(object):
+    """Stands in for `ClaritySession`, sending requests to the local server"""
+
+    def __init__(self, port):
+        self.base_url = "http://127.0.0.1:{}/api/v2/".format(port)
+        self.request_session = requests.Session()
+
+    def get(self, endpoint, **kwargs):
+        return self.request_session.get(self.base_url + endpoint, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[64 * 1024, FileRepository.CHUNK_SIZE])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        server_file = os.path.join(directory, "served.bin")
+        with open(server_file, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        server = FileServer(("127.0.0.1", 0), FileHandler)
+        server.file_path = server_file
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        session = LocalSession(server.server_address[1])
+        local_path = os.path.join(directory, "downloaded.bin")
+        print("Downloading {} MB".format(args.size_mb))
+        for chunk_size in args.chunk_sizes:
+            repo = FileRepository(session, chunk_size=chunk_size)
+            timings = list()
+            for _ in range(args.repeat):
+                start = time.time()
+                repo.copy_remote_file("40-1", local_path)
+                timings.append(time.time() - start)
+                os.remove(local_path)
+            best = min(timings)
+            print("chunk size {:>9}: {:>8.3f}s {:>10.1f} MB/s".format(chunk_size, best, args.size_mb / best))
+        server.shutdown()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Measures comparing domain objects with circular references, e.g. analyte <-> well <-> container.
+
+    python -m test.benchmark.bench_equality --plates 4 --repeat 5
+"""
+from __future__ import print_function
+import argparse
+import timeit
+from clarity_ext.domain.container import Container, PlateSize
+from test.unit.clarity_ext.helpers import fake_full_container
+
+SIZE_384_WELLS = PlateSize(height=16, width=24)
+
+
+def unused_wells(containers):
+    """Copies of the containers whose wells have not been used, as when they are read from the REST API"""
+    ret = list()
+    for container in containers:
+        copy = Container(container_type=container.container_type, size=container.size)
+        copy.id = copy.name = container.id
+        for slot, artifact in enumerate(container.artifacts):
+            copy.set_artifact_at(slot, artifact)
+        ret.append(copy)
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plates", type=int, default=4, help="Number of 384 well plates on each side")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def plates():
+        return [fake_full_container("cont{}".format(ix), SIZE_384_WELLS) for ix in range(args.plates)]
+    a, b = plates(), plates()
+    different = plates()
+    different[-1]["P:24"].artifact.volume = 10
+    # Copied before each repetition, as comparing them may create their wells
+    unused = list()
+
+    def copy_unused():
+        unused[:] = [unused_wells(a), unused_wells(b)]
+
+    cases = [
+        ("equal containers", lambda: a == b),
+        ("one differing well", lambda: a == different),
+        ("analyte (walks its container)", lambda: a[0]["A:1"].artifact == b[0]["A:1"].artifact),
+        ("differing_fields", lambda: a[-1]["P:24"].artifact.differing_fields(different[-1]["P:24"].artifact)),
+        ("equal containers, wells unused", lambda: unused[0] == unused[1], copy_unused),
+    ]
+    print("{} plates of 384 wells".format(args.plates))
+    for case in cases:
+        name, stmt = case[:2]
+        setup = case[2] if len(case) > 2 else "pass"
+        best = min(timeit.repeat(stmt, setup, number=1, repeat=args.repeat))
+        print("{:<32}{:>10.4f}s".format(name, best))
+
+
+if __name__ == "__main__":
+    main()
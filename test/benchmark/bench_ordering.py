@@ -0,0 +1,55 @@
+"""
+Compares the estimated robot time of the transfers of full 4 plate dilution schemes, in the sort
+order of DilutionScheme and ordered by ChannelBatchOrdering, and measures the time to order them.
+
+The source wells are either transferred to the same positions on the target plates, or to
+random positions on any of the target plates (cherry picking).
+
+    python -m test.benchmark.bench_ordering --plates 4 --repeat 5
+"""
+from __future__ import print_function
+import argparse
+import random
+import timeit
+from mock import MagicMock
+from clarity_ext.dilution import DilutionScheme, CONCENTRATION_REF_NGUL, VOLUME_CALC_BY_CONC
+from clarity_ext.dilution_ordering import ChannelBatchOrdering
+from clarity_ext.service.artifact_service import ArtifactPair
+from test.benchmark.bench_dilution_scheme import plate_analytes
+
+
+def create(pairs, ordering=None):
+    artifact_service = MagicMock()
+    artifact_service.all_aliquot_pairs.return_value = pairs
+    return DilutionScheme.create(artifact_service, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                 volume_calc_method=VOLUME_CALC_BY_CONC, ordering=ordering)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--plates", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(1)
+    inputs = list()
+    outputs = list()
+    for ix in range(args.plates):
+        inputs.extend(plate_analytes("source{}".format(ix), True))
+        outputs.extend(plate_analytes("target{}".format(ix), False))
+    shuffled = list(outputs)
+    random.shuffle(shuffled)
+
+    ordering = ChannelBatchOrdering()
+    for name, targets in [("same positions", outputs), ("cherry picking", shuffled)]:
+        pairs = [ArtifactPair(i, o) for i, o in zip(inputs, targets)]
+        sorted_transfers = create(pairs).transfers
+        ordered_transfers = create(pairs, ordering).transfers
+        best = min(timeit.repeat(lambda: ordering.order(sorted_transfers), number=1, repeat=args.repeat))
+        print("{} plates of 384 wells, {}, {} rows".format(args.plates, name, len(sorted_transfers)))
+        print("{:<32}{:>10.0f}s".format("estimate, sort order", ordering.estimate_time(sorted_transfers)))
+        print("{:<32}{:>10.0f}s".format("estimate, batch ordering", ordering.estimate_time(ordered_transfers)))
+        print("{:<32}{:>10.4f}s".format("batch ordering", best))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Measures calculating pool volumes for many libraries across many pools.
+
+    python -m test.benchmark.bench_pooling --libraries 5000 --pool-size 384 --repeat 5
+"""
+from __future__ import print_function
+import argparse
+import random
+import timeit
+from clarity_ext import dilution_strategies
+try:
+    from clarity_ext import dilution_strategies_batch
+except ImportError:
+    dilution_strategies_batch = None
+
+
+class Transfer(object):
+    def __init__(self, pool):
+        self.source_concentration = random.uniform(1, 1000)
+        self.requested_concentration = random.uniform(1, 20)
+        self.requested_volume = random.uniform(10, 100)
+        self.target_aliquot_name = pool
+        self.scaled_up = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--libraries", type=int, default=5000)
+    parser.add_argument("--pool-size", type=int, default=384)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    random.seed(1)
+    pools = ["pool{}".format(ix) for ix in range(max(args.libraries // args.pool_size, 1))]
+    # Libraries are not ordered by pool in a step
+    transfers = [Transfer(random.choice(pools)) for _ in range(args.libraries)]
+
+    print("{} libraries in {} pools".format(args.libraries, len(pools)))
+    modules = [dilution_strategies] + ([dilution_strategies_batch] if dilution_strategies_batch else [])
+    for module in modules:
+        strategy = module.PoolConcentrationCalc()
+        best = min(timeit.repeat(lambda: strategy.calculate_transfer_volumes(transfers, True),
+                                 number=1, repeat=args.repeat))
+        print("{:<32}{:>10.4f}s".format(module.__name__.split(".")[-1], best))
+
+
+if __name__ == "__main__":
+    main()
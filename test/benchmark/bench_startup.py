@@ -0,0 +1,101 @@
+"""
+Measures how long it takes to import what each clarity-ext subcommand needs.
+
+Every measurement runs in a fresh interpreter, since modules are only imported once per process.
+
+    python -m test.benchmark.bench_startup --repeat 10 --save startup.json
+    python -m test.benchmark.bench_startup --baseline startup.json
+
+With --baseline, exits with a non-zero status if a subcommand got slower than the baseline
+by more than the tolerance. Also exits with a non-zero status if the thin client imports clarity_ext.
+"""
+from __future__ import print_function
+import sys
+import json
+import argparse
+import subprocess
+
+# The modules each subcommand imports before it starts doing any work
+SUBCOMMANDS = [
+    ("cli", ["clarity_ext.cli"]),
+    ("extension", ["clarity_ext.cli", "clarity_ext.extensions"]),
+    ("validate", ["clarity_ext.cli", "clarity_ext.extensions", "clarity_ext.integration"]),
+    ("worker", ["clarity_ext.cli", "clarity_ext.extensions", "clarity_ext.worker"]),
+    ("client", ["clarity_ext_client"]),
+]
+
+# The thin client must start without importing the clarity_ext package
+CLIENT_MODULE = "clarity_ext_client"
+
+MEASURE = """
+import time
+t = time.time()
+{imports}
+print(time.time() - t)
+"""
+
+
+def import_time(modules):
+    script = MEASURE.format(imports="\n".join("import {}".format(module) for module in modules))
+    return float(subprocess.check_output([sys.executable, "-c", script]))
+
+
+def imports_clarity_ext(module):
+    script = "import sys\nimport {}\nprint('clarity_ext' in sys.modules)".format(module)
+    return subprocess.check_output([sys.executable, "-c", script]).strip() == "True"
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run(repeat):
+    return {name: median([import_time(modules) for _ in range(repeat)])
+            for name, modules in SUBCOMMANDS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Save the results to this file, for use as a baseline")
+    parser.add_argument("--baseline", help="Compare with results saved earlier")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed slowdown compared to the baseline, as a fraction")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    baseline = dict()
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+    regressions = list()
+    print("{:<12}{:>12}{:>12}".format("subcommand", "import (s)", "baseline"))
+    for name, _ in SUBCOMMANDS:
+        previous = baseline.get(name)
+        print("{:<12}{:>12.3f}{:>12}".format(name, results[name],
+                                             "{:.3f}".format(previous) if previous else "-"))
+        if previous and results[name] > previous * (1 + args.tolerance):
+            regressions.append(name)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = False
+    if regressions:
+        print("Slower than the baseline: {}".format(", ".join(regressions)))
+        failed = True
+    if imports_clarity_ext(CLIENT_MODULE):
+        print("{} imports clarity_ext".format(CLIENT_MODULE))
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Measures time and peak memory of parsing a large XML file, e.g. a plate reader export, as a whole
+and one record at a time. Each parse runs in its own process, so the peak memory is its own.
+
+    python -m test.benchmark.bench_xml --wells 200000
+"""
+from __future__ import print_function
+import os
+import sys
+import argparse
+import resource
+import subprocess
+import tempfile
+import time
+from mock import MagicMock
+from clarity_ext.service.file_service import FileService
+
+
+def generate(path, wells):
+    with open(path, "w") as f:
+        f.write('<Result xmlns="http://example.com/reader"><Plate>')
+        for ix in range(wells):
+            f.write('<Well pos="{}"><Read cycle="1"><Value>{}</Value></Read></Well>'.format(ix, ix * 0.5))
+        f.write('</Plate></Result>')
+
+
+def parse(path, mode):
+    file_service = FileService(MagicMock(), MagicMock(), False, MagicMock())
+    start = time.time()
+    if mode == "parse_xml":
+        total = sum(float(well.Read.Value) for well in file_service.parse_xml(open(path)).Plate.Well)
+    else:
+        total = sum(float(well.findtext("{http://example.com/reader}Read/{http://example.com/reader}Value"))
+                    for well in file_service.iterparse_xml(open(path), "Plate/Well"))
+    elapsed = time.time() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    print("{:<16}{:>10.2f}s{:>10.0f} MB peak   (sum {})".format(mode, elapsed, peak_mb, total))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wells", type=int, default=200000)
+    parser.add_argument("--mode")
+    parser.add_argument("--path")
+    args = parser.parse_args()
+    if args.mode:
+        parse(args.path, args.mode)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    os.close(fd)
+    try:
+        generate(path, args.wells)
+        print("{} wells, {:.0f} MB".format(args.wells, os.path.getsize(path) / 2.0**20))
+        for mode in ["parse_xml", "iterparse_xml"]:
+            subprocess.check_call([sys.executable, "-m", "test.benchmark.bench_xml", "--mode", mode, "--path", path])
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
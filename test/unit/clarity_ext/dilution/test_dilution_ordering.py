@@ -0,0 +1,63 @@
+import unittest
+from argparse import Namespace
+from mock import MagicMock
+from clarity_ext.dilution import DilutionScheme, CONCENTRATION_REF_NGUL, VOLUME_CALC_BY_CONC
+from clarity_ext.dilution_ordering import ChannelBatchOrdering
+from clarity_ext.domain.container import Container
+from test.unit.clarity_ext.dilution.test_transfer_table import fake_pair
+
+
+def fake_transfer(source_container, source_key, target_container, target_key):
+    return Namespace(source_container=source_container, source_well=source_container[source_key],
+                     target_container=target_container, target_well=target_container[target_key])
+
+
+def plate(container_id):
+    container = Container(container_type=Container.CONTAINER_TYPE_96_WELLS_PLATE)
+    container.id = container_id
+    return container
+
+
+class TestChannelBatchOrdering(unittest.TestCase):
+
+    def setUp(self):
+        self.source1, self.source2, self.target = plate("source1"), plate("source2"), plate("target")
+        self.ordering = ChannelBatchOrdering(channels=2, cycle_time=10, tip_change_time=1, plate_switch_time=100)
+
+    def test_transfers_batched_by_columns_and_plates(self):
+        t1 = fake_transfer(self.source1, "A:1", self.target, "A:1")
+        t2 = fake_transfer(self.source2, "A:1", self.target, "A:2")
+        t3 = fake_transfer(self.source1, "B:1", self.target, "B:1")
+        t4 = fake_transfer(self.source1, "C:1", self.target, "C:1")
+        self.assertEqual([t1, t3, t4, t2], self.ordering.order([t1, t2, t3, t4]))
+
+    def test_rows_of_a_transfer_kept_together(self):
+        t1 = fake_transfer(self.source1, "A:1", self.target, "A:1")
+        t1_copy = fake_transfer(self.source1, "A:1", self.target, "A:1")
+        t2 = fake_transfer(self.source1, "B:1", self.target, "B:1")
+        # A copy of a row refers to the same wells
+        t1_copy.source_well, t1_copy.target_well = t1.source_well, t1.target_well
+        self.assertEqual([t1, t1_copy, t2], self.ordering.order([t1, t1_copy, t2]))
+
+    def test_estimate_time(self):
+        t1 = fake_transfer(self.source1, "A:1", self.target, "A:1")
+        t2 = fake_transfer(self.source2, "A:1", self.target, "A:2")
+        t3 = fake_transfer(self.source1, "B:1", self.target, "B:1")
+        # Three batches, with a plate switch between each
+        self.assertEqual(3 * 10 + 3 * 1 + 2 * 100, self.ordering.estimate_time([t1, t2, t3]))
+        # Two batches and one plate switch
+        self.assertEqual(2 * 10 + 2 * 1 + 100, self.ordering.estimate_time(self.ordering.order([t1, t2, t3])))
+
+
+class TestDilutionSchemeOrdering(unittest.TestCase):
+
+    def test_ordering_applied_after_sorting(self):
+        pairs = [fake_pair("s1", "A:1", 100), fake_pair("s2", "B:1", 100), fake_pair("s3", "A:2", 100)]
+        ordering = MagicMock()
+        ordering.order.side_effect = lambda transfers: list(reversed(transfers))
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        dilution_scheme = DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                                volume_calc_method=VOLUME_CALC_BY_CONC, ordering=ordering)
+        self.assertEqual(["s3", "s2", "s1"], [t.aliquot_name for t in dilution_scheme.transfers])
+        self.assertEqual(["s3", "s2", "s1"], [group[0].aliquot_name for group in dilution_scheme.grouped_transfers])
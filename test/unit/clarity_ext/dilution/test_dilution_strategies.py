@@ -0,0 +1,91 @@
+import unittest
+from mock import MagicMock
+from clarity_ext import dilution_strategies
+try:
+    import numpy
+    from clarity_ext import dilution_strategies_batch
+except ImportError:
+    numpy = None
+
+RESULT_FIELDS = ["sample_volume", "buffer_volume", "has_to_evaporate", "scaled_up"]
+
+
+def fake_transfer(source_concentration, requested_concentration, requested_volume, pool="pool1"):
+    transfer = MagicMock()
+    transfer.source_concentration = source_concentration
+    transfer.requested_concentration = requested_concentration
+    transfer.requested_volume = requested_volume
+    transfer.target_aliquot_name = pool
+    transfer.sample_volume = None
+    transfer.buffer_volume = None
+    transfer.has_to_evaporate = None
+    transfer.scaled_up = False
+    return transfer
+
+
+def results(strategy, transfer_args, scale_up_low_volumes=True):
+    transfers = [fake_transfer(*args) for args in transfer_args]
+    strategy.calculate_transfer_volumes(transfers=transfers, scale_up_low_volumes=scale_up_low_volumes)
+    return [[getattr(transfer, field) for field in RESULT_FIELDS] for transfer in transfers]
+
+
+class TestPoolConcentrationCalc(unittest.TestCase):
+
+    def test_pools_grouped_in_given_order(self):
+        transfers = [fake_transfer(100.0, 10.0, 40.0, pool) for pool in ["pool2", "pool1", "pool2"]]
+        pools = dilution_strategies.group_by_pool(transfers)
+        self.assertEqual(["pool2", "pool1"], pools.keys())
+        self.assertEqual([transfers[0], transfers[2]], pools["pool2"])
+
+    def test_buffer_volume_on_first_transfer_of_pool(self):
+        rows = results(dilution_strategies.PoolConcentrationCalc(),
+                       [(100.0, 10.0, 40.0, "pool2"), (100.0, 10.0, 40.0, "pool1"), (50.0, 10.0, 40.0, "pool2")])
+        self.assertEqual([[2.0, 34.0], [4.0, 36.0], [4.0, 0]], [row[:2] for row in rows])
+
+    def test_evaporation_based_on_unscaled_pool_volume(self):
+        rows = results(dilution_strategies.PoolConcentrationCalc(),
+                       [(1000.0, 10.0, 5.0), (10.0, 10.0, 5.0)])
+        self.assertEqual([True, True], [row[3] for row in rows])
+        self.assertEqual([False, False], [row[2] for row in rows])
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestBatchStrategiesEquivalent(unittest.TestCase):
+    """The batch strategies give the same results as the ones calculating one transfer at a time"""
+
+    def assert_equivalent(self, strategy_name, transfer_args):
+        for scale_up_low_volumes in [True, False]:
+            expected = results(getattr(dilution_strategies, strategy_name)(), transfer_args, scale_up_low_volumes)
+            actual = results(getattr(dilution_strategies_batch, strategy_name)(), transfer_args, scale_up_low_volumes)
+            self.assertEqual(len(expected), len(actual))
+            for expected_row, actual_row in zip(expected, actual):
+                for expected_value, actual_value in zip(expected_row, actual_row):
+                    if isinstance(expected_value, float):
+                        self.assertAlmostEqual(expected_value, actual_value)
+                    else:
+                        self.assertEqual(expected_value, actual_value)
+
+    def test_one_to_one(self):
+        self.assert_equivalent("OneToOneConcentrationCalc", [
+            (100.0, 10.0, 20.0),
+            (10.0, 20.0, 20.0),      # Has to evaporate
+            (1000.0, 10.0, 20.0),    # Scaled up
+            (None, 10.0, 20.0),
+            (100.0, None, 20.0),
+            (0.0, 10.0, 20.0),
+            (100.0, 0.0, 20.0),      # Zero sample volume can't be scaled up
+        ])
+
+    def test_pools(self):
+        self.assert_equivalent("PoolConcentrationCalc", [
+            (100.0, 10.0, 40.0, "pool2"),
+            (50.0, 10.0, 40.0, "pool1"),
+            (100.0, 10.0, 40.0, "pool1"),
+            (1000.0, 10.0, 40.0, "pool3"),   # Scaled up
+            (100.0, 10.0, 40.0, "pool3"),
+            (None, 10.0, 40.0, "pool4"),     # Not scaled up, as the pool has a zero sample volume
+            (100.0, 10.0, 40.0, "pool4"),
+            (1.0, 10.0, 5.0, "pool5"),       # Has to evaporate
+            (1000.0, 10.0, 5.0, "pool6"),    # Only has to evaporate after being scaled up
+            (10.0, 10.0, 5.0, "pool6"),
+        ])
@@ -0,0 +1,52 @@
+import unittest
+from mock import MagicMock
+from clarity_ext.dilution import DilutionScheme, CONCENTRATION_REF_NGUL, VOLUME_CALC_BY_CONC
+from clarity_ext.service.artifact_service import ArtifactPair
+from test.unit.clarity_ext.dilution.test_transfer_table import fake_pair
+
+
+def values(dilution_scheme):
+    return [(t.aliquot_name, t.target_aliquot_name, t.sample_volume, t.buffer_volume, t.has_to_evaporate,
+             t.scaled_up, t.source_well_index, t.target_plate_pos) for t in dilution_scheme.transfers]
+
+
+class TestDilutionSchemeUpdate(unittest.TestCase):
+
+    def create(self, pairs, make_pools=False):
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        return DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                     volume_calc_method=VOLUME_CALC_BY_CONC, make_pools=make_pools)
+
+    def test_update_same_as_creating_again(self):
+        pairs = [fake_pair("s1", "A:1", 5), fake_pair("s2", "B:1", 100), fake_pair("s3", "A:2", 5)]
+        dilution_scheme = self.create(pairs)
+        # The sample volume of s1 becomes 200 ul, which is split on 4 rows, and then 40 ul again
+        for requested_volume in [100, 20]:
+            pairs[0].output_artifact.requested_volume = requested_volume
+            dilution_scheme.update([pairs[0].output_artifact])
+            self.assertEqual(values(self.create(pairs)), values(dilution_scheme))
+            self.assertEqual(len(dilution_scheme.transfers), len(dilution_scheme.aliquot_pair_by_transfer))
+            self.assertEqual([len(group) for group in self.create(pairs).grouped_transfers],
+                             [len(group) for group in dilution_scheme.grouped_transfers])
+
+    def test_only_transfers_of_artifacts_calculated(self):
+        pairs = [fake_pair("s1", "A:1", 5), fake_pair("s2", "B:1", 100)]
+        dilution_scheme = self.create(pairs)
+        dilution_scheme.volume_calc_strategy = MagicMock(wraps=dilution_scheme.volume_calc_strategy)
+        pairs[1].input_artifact.concentration_ngul = 50
+        dilution_scheme.update([pairs[1].input_artifact])
+        transfers = dilution_scheme.volume_calc_strategy.calculate_transfer_volumes.call_args[1]["transfers"]
+        self.assertEqual(["s2"], [t.aliquot_name for t in transfers])
+        self.assertEqual(4.0, dilution_scheme.transfers[1].sample_volume)
+
+    def test_whole_pool_calculated(self):
+        library1, library2 = fake_pair("s1", "A:1", 100), fake_pair("s2", "B:1", 100)
+        pairs = [library1, ArtifactPair(library2.input_artifact, library1.output_artifact), fake_pair("s3", "C:1", 100)]
+        dilution_scheme = self.create(pairs, make_pools=True)
+        dilution_scheme.volume_calc_strategy = MagicMock(wraps=dilution_scheme.volume_calc_strategy)
+        pairs[1].input_artifact.concentration_ngul = 50
+        dilution_scheme.update([pairs[1].input_artifact])
+        transfers = dilution_scheme.volume_calc_strategy.calculate_transfer_volumes.call_args[1]["transfers"]
+        self.assertEqual(["s1", "s2"], [t.aliquot_name for t in transfers])
+        self.assertEqual(values(self.create(pairs, make_pools=True)), values(dilution_scheme))
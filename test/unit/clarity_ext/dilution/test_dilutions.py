@@ -1,6 +1,6 @@
 import unittest
 from mock import MagicMock
-from clarity_ext.dilution import DilutionScheme
+from clarity_ext.dilution import DilutionScheme, ENGINE_PYTHON, ENGINE_NUMPY
 from clarity_ext.dilution import CONCENTRATION_REF_NGUL
 from clarity_ext.dilution import CONCENTRATION_REF_NM
 from clarity_ext.dilution import VOLUME_CALC_BY_CONC
@@ -10,6 +10,10 @@ from test.unit.clarity_ext import helpers
 from clarity_ext.service import ArtifactService
 from clarity_ext.domain.validation import ValidationException
 from clarity_ext.domain.validation import ValidationType
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class TestDilutionScheme(unittest.TestCase):
@@ -17,6 +21,7 @@ class TestDilutionScheme(unittest.TestCase):
     Validates that the DilutionScheme property of the context object returns the expected values
     based on fake data from the LIMS
     """
+    engine = ENGINE_PYTHON
 
     def _default_dilution_scheme(self, artifact_service, concentration_ref=CONCENTRATION_REF_NGUL,
                                  include_blanks=False, volume_calc_method=VOLUME_CALC_BY_CONC,
@@ -24,7 +29,8 @@ class TestDilutionScheme(unittest.TestCase):
         return DilutionScheme.create(artifact_service=artifact_service, robot_name="Hamilton",
                                      scale_up_low_volumes=scale_up_low_volumes,
                                      concentration_ref=concentration_ref,
-                                     include_blanks=include_blanks, volume_calc_method=volume_calc_method)
+                                     include_blanks=include_blanks, volume_calc_method=volume_calc_method,
+                                     engine=self.engine)
 
     def test_dilution_scheme_hamilton_base(self):
         """Dilution scheme created by mocked analytes is correctly generated for Hamilton"""
@@ -497,6 +503,10 @@ def post_validate_dilution(dilution_scheme):
                 transfer_group[0].aliquot_name, pos_str(transfer_group[0])), ValidationType.WARNING)
 
 
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestDilutionSchemeNumpyEngine(TestDilutionScheme):
+    engine = ENGINE_NUMPY
+
+
 if __name__ == "__main__":
     unittest.main()
-
@@ -1,6 +1,6 @@
 import unittest
 from mock import MagicMock
-from clarity_ext.dilution import DilutionScheme
+from clarity_ext.dilution import DilutionScheme, ENGINE_PYTHON, ENGINE_NUMPY
 from clarity_ext.dilution import CONCENTRATION_REF_NM
 from clarity_ext.dilution import VOLUME_CALC_BY_CONC
 from clarity_ext.domain.validation import ValidationException
@@ -8,6 +8,10 @@ from clarity_ext.domain.validation import ValidationType
 from test.unit.clarity_ext.helpers import fake_analyte
 from test.unit.clarity_ext.helpers import print_list
 from test.unit.clarity_ext import helpers
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 UDF_MAP = {
@@ -19,11 +23,14 @@ UDF_MAP = {
 
 
 class TestLibraryPooling(unittest.TestCase):
+    engine = ENGINE_PYTHON
+
     def _default_dilution_scheme(self, artifact_service, scale_up_low_volumes=True):
         return DilutionScheme.create(artifact_service=artifact_service, robot_name="Hamilton",
                                      scale_up_low_volumes=scale_up_low_volumes,
                                      concentration_ref=CONCENTRATION_REF_NM, include_blanks=False,
-                                     volume_calc_method=VOLUME_CALC_BY_CONC, make_pools=True)
+                                     volume_calc_method=VOLUME_CALC_BY_CONC, make_pools=True,
+                                     engine=self.engine)
 
     def test_single_pool_creation(self):
         def pooled_analyte_set():
@@ -441,3 +448,8 @@ def post_validate_dilution(dilution_scheme):
             yield ValidationException("{}, volume has been scaled up due to "
                                       "the min pipetting volume of 2 ul ({}).".format(
                 g[0].target_aliquot_name, pos_str(g[0])), ValidationType.WARNING)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestLibraryPoolingNumpyEngine(TestLibraryPooling):
+    engine = ENGINE_NUMPY
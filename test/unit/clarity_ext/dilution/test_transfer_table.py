@@ -0,0 +1,140 @@
+import unittest
+from mock import MagicMock, patch
+from clarity_ext.dilution import TransferTable, DilutionScheme, RobotDeckPositioner, CONCENTRATION_REF_NGUL, \
+    VOLUME_CALC_BY_CONC
+from clarity_ext.service.artifact_service import ArtifactPair
+from test.unit.clarity_ext.helpers import fake_analyte
+
+
+def fake_pair(name, well_key, concentration=None, requested_volume=20, is_control=False):
+    return ArtifactPair(
+        fake_analyte("cont1", "in-" + name, name, name, well_key, True, is_control=is_control,
+                     concentration_ngul=concentration, volume=30),
+        fake_analyte("cont2", "out-" + name, name, name, well_key, False, is_control=is_control,
+                     requested_concentration_ngul=10, requested_volume=requested_volume))
+
+
+class TestTransferTable(unittest.TestCase):
+
+    def setUp(self):
+        self.pairs = [fake_pair("s1", "A:1", 100), fake_pair("s2", "B:1"), fake_pair("blank", "C:1", is_control=True)]
+        self.table = TransferTable.create(self.pairs, CONCENTRATION_REF_NGUL, include_blanks=False)
+
+    def test_rows_read_from_pairs(self):
+        self.assertEqual(["s1", "s2"], [row.aliquot_name for row in self.table.rows])
+        row = self.table.rows[0]
+        self.assertEqual(100.0, row.source_concentration)
+        self.assertEqual(20.0, row.requested_volume)
+        self.assertEqual("A:1", repr(row.target_well.position))
+        self.assertEqual(id(self.pairs[0]), row.pair_id)
+
+    def test_missing_values_are_none(self):
+        row = self.table.rows[1]
+        self.assertIsNone(row.source_concentration)
+        self.assertIsNone(row.sample_volume)
+        self.assertEqual([100.0, None], self.table.values("source_concentration"))
+
+    def test_setting_attributes_of_row_sets_column(self):
+        row = self.table.rows[0]
+        row.sample_volume = 2.5
+        row.scaled_up = True
+        row.has_to_evaporate = False
+        self.assertEqual([2.5, None], self.table.values("sample_volume"))
+        self.assertEqual([True, False], self.table.values("scaled_up"))
+        row.sample_volume = None
+        self.assertIsNone(row.sample_volume)
+
+    def test_values_read_back_with_the_type_they_were_set_with(self):
+        row = self.table.rows[0]
+        row.sample_volume = 0
+        row.buffer_volume = 2.5
+        self.assertEqual("0 2.5", "{} {}".format(row.sample_volume, row.buffer_volume))
+        self.assertEqual([0, None], self.table.values("sample_volume"))
+        self.table.set_row_values("sample_volume", [1], [30])
+        self.assertEqual("[0, 30]", str(self.table.row_values("sample_volume", [0, 1])))
+        copy_ix = self.table.append_copies([1])[0]
+        self.assertEqual("30", str(self.table.rows[copy_ix].sample_volume))
+
+    def test_copies_are_independent_rows(self):
+        self.table.rows[0].sample_volume = 60
+        copies = self.table.append_copies([0, 0])
+        self.assertEqual([2, 3], copies)
+        copy = self.table.rows[2]
+        self.assertEqual("s1", copy.aliquot_name)
+        self.assertEqual(60, copy.sample_volume)
+        copy.sample_volume = 30
+        self.assertEqual(60, self.table.rows[0].sample_volume)
+
+    def test_other_attributes_can_be_set_on_rows(self):
+        row = self.table.rows[0]
+        self.assertFalse(hasattr(row, "comment"))
+        row.comment = "Diluted twice"
+        row.sample_volume = 2.5
+        self.assertEqual("Diluted twice", row.comment)
+        self.assertEqual(2.5, self.table.rows[0].sample_volume)
+        self.assertEqual({"comment": "Diluted twice"}, self.table.columns["extras"][0])
+        self.assertIsNone(getattr(self.table.rows[1], "comment", None))
+        del row.comment
+        self.assertRaises(AttributeError, getattr, row, "comment")
+
+    def test_copies_have_their_own_other_attributes(self):
+        self.table.rows[0].comment = "original"
+        copy = self.table.rows[self.table.append_copies([0])[0]]
+        self.assertEqual("original", copy.comment)
+        copy.comment = "copy"
+        self.assertEqual("original", self.table.rows[0].comment)
+
+    def test_one_view_per_row(self):
+        rows = {row: row.aliquot_name for row in self.table.rows}
+        self.assertEqual("s2", rows[self.table.rows[1]])
+
+
+class TestDilutionSchemeTransferTable(unittest.TestCase):
+
+    def test_split_rows_mapped_to_their_pair(self):
+        pairs = [fake_pair("s1", "A:1", 5, requested_volume=100), fake_pair("s2", "B:1", 100)]
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        dilution_scheme = DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                                volume_calc_method=VOLUME_CALC_BY_CONC)
+        # The sample volume of s1 is 200 ul, which is split on 4 rows
+        self.assertEqual(5, len(dilution_scheme.transfers))
+        self.assertEqual([50.0] * 4, [t.sample_volume for t in dilution_scheme.transfers[:4]])
+        for transfer in dilution_scheme.transfers:
+            pair = dilution_scheme.aliquot_pair_by_transfer[transfer]
+            self.assertEqual(transfer.aliquot_name, pair.input_artifact.name)
+        self.assertEqual([4, 1], [len(group) for group in dilution_scheme.grouped_transfers])
+
+    def test_split_rows_rendered_as_before(self):
+        pairs = [fake_pair("s1", "A:1", 100, requested_volume=120)]
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        dilution_scheme = DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                                volume_calc_method=VOLUME_CALC_BY_CONC)
+        # The buffer volume of 108 ul is split on 3 rows, and only the first row has sample
+        self.assertEqual(["12.0 36.0", "0 36.0", "0 36.0"],
+                         ["{} {}".format(t.sample_volume, t.buffer_volume) for t in dilution_scheme.transfers])
+        self.assertEqual("source(Container(id=cont1)/cont1(A1), conc=100.0) => "
+                         "target(Container(id=cont2)/cont2(A1), conc=10.0, vol=120.0)",
+                         str(dilution_scheme.transfers[0]))
+
+    def test_sort_keys_calculated_once_per_transfer(self):
+        pairs = [fake_pair("s1", "B:1", 100), fake_pair("s2", "A:1", 100)]
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        dilution_scheme = DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                                volume_calc_method=VOLUME_CALC_BY_CONC)
+        self.assertEqual(["s2", "s1"], [t.aliquot_name for t in dilution_scheme.transfers])
+        # Source plate rank, source well indexed down first and negative pipetting volume
+        self.assertEqual([(1, 1, -20.0), (1, 2, -20.0)], [t.sort_key for t in dilution_scheme.transfers])
+
+    def test_sort_key_function_of_robot_used(self):
+        pairs = [fake_pair("s1", "A:1", 100), fake_pair("s2", "B:1", 100), fake_pair("s3", "A:2", 100)]
+        svc = MagicMock()
+        svc.all_aliquot_pairs.return_value = pairs
+        right_first = {"Hamilton": lambda plate_rank, well, volume: (
+            plate_rank, well.position.row, well.position.col, -volume)}
+        with patch.dict(RobotDeckPositioner.SORT_KEY_FUNCTIONS, right_first):
+            dilution_scheme = DilutionScheme.create(svc, "Hamilton", concentration_ref=CONCENTRATION_REF_NGUL,
+                                                    volume_calc_method=VOLUME_CALC_BY_CONC)
+        self.assertEqual(["s1", "s3", "s2"], [t.aliquot_name for t in dilution_scheme.transfers])
@@ -0,0 +1,55 @@
+import unittest
+from clarity_ext.dilution import WellIndexLayouts, EndpointPositioner
+from clarity_ext.domain.container import Container, ContainerLayout, PlateSize
+
+SIZE = PlateSize(height=2, width=3)
+
+
+class TestWellIndexLayouts(unittest.TestCase):
+
+    def setUp(self):
+        self.layouts = WellIndexLayouts()
+        self.layout = ContainerLayout.get(SIZE)
+
+    def indexes_by_position(self, robot_name):
+        indexes = self.layouts.indexes(robot_name, self.layout)
+        return {repr(position): indexes[slot] for slot, position in enumerate(self.layout.positions)}
+
+    def test_indexes_in_order(self):
+        self.layouts.register("down", Container.DOWN_FIRST)
+        self.layouts.register("right", Container.RIGHT_FIRST)
+        self.assertEqual([1, 2, 3, 4, 5, 6], list(self.layouts.indexes("down", self.layout)))
+        self.assertEqual({"A:1": 1, "A:2": 2, "A:3": 3, "B:1": 4, "B:2": 5, "B:3": 6},
+                         self.indexes_by_position("right"))
+
+    def test_indexes_from_table_for_plate_size(self):
+        table = {"A:1": 6, "B:1": 5, "A:2": 4, "B:2": 3, "A:3": 2, "B:3": 1}
+        self.layouts.register("robot", Container.DOWN_FIRST)
+        self.layouts.register("robot", table, plate_size=SIZE)
+        self.assertEqual(table, self.indexes_by_position("robot"))
+        other_size = ContainerLayout.get(PlateSize(height=8, width=12))
+        self.assertEqual(96, self.layouts.indexes("robot", other_size)[-1])
+
+    def test_table_not_covering_plate_raises(self):
+        self.layouts.register("robot", {"A:1": 1, "B:1": 2}, plate_size=SIZE)
+        self.assertRaises(ValueError, self.layouts.indexes, "robot", self.layout)
+
+    def test_unknown_robot_raises(self):
+        self.assertNotIn("robot", self.layouts)
+        self.assertRaises(KeyError, self.layouts.indexes, "robot", self.layout)
+
+
+class TestEndpointPositioner(unittest.TestCase):
+
+    def setUp(self):
+        self.container = Container(size=SIZE)
+        self.container.id = "cont1"
+        self.positioner = EndpointPositioner("Hamilton", [self.container], SIZE, "DNA")
+
+    def test_well_indexes_of_hamilton_down_first(self):
+        wells = [self.container["A:2"], self.container["B:1"]]
+        self.assertEqual([3, 2], self.positioner.well_indexes(wells))
+        self.assertEqual(3, self.positioner.indexer(wells[0]))
+
+    def test_str(self):
+        self.assertEqual("<EndpointPositioner Hamilton 2x3>", str(self.positioner))
@@ -2,6 +2,7 @@ import unittest
 from test.unit.clarity_ext.helpers import fake_analyte, fake_result_file
 from test.unit.clarity_ext.helpers import fake_shared_result_file
 from test.unit.clarity_ext.helpers import fake_container
+from test.unit.clarity_ext.helpers import fake_full_container
 from mock import MagicMock
 from clarity_ext.unit_conversion import UnitConversion
 from clarity_ext.domain import Artifact
@@ -57,6 +58,17 @@ class TestArtifact(unittest.TestCase):
         analytes = two_identical_analytes()
         self.assertNotEqual(analytes[0], analytes[1])
 
+    def test_equality_of_containers_with_artifacts_in_all_wells(self):
+        self.assertEqual(fake_full_container("cont1"), fake_full_container("cont1"))
+
+    def test_inequality_of_containers_differing_in_one_well(self):
+        container = fake_full_container("cont1")
+        container["H:12"].artifact.volume = 10
+        self.assertNotEqual(fake_full_container("cont1"), container)
+        differing_fields = container["H:12"].artifact.differing_fields(fake_full_container("cont1")["H:12"].artifact)
+        self.assertIn("volume", differing_fields)
+        self.assertNotIn("concentration_ngul", differing_fields)
+
     def test_backward_udf_map_empty_if_no_udf_map(self):
         artifact = Artifact()
         self.assertEqual(artifact.udf_backward_map, dict())
@@ -73,6 +85,25 @@ class TestArtifact(unittest.TestCase):
         artifact.set_udf('test_udf', 1234, units.PICO, units.NANO)
         self.assertEqual(artifact.api_resource.udf['test_udf'], 1.234)
 
+    def test_fields_set_on_creation_are_not_updated(self):
+        analyte = fake_analyte("cont1", "art1", "sample1", "art1", "A:1", True, concentration_ngul=10)
+        analyte.reset_updated_fields()
+        self.assertEqual([], analyte.updated_fields())
+
+    def test_updated_fields_tracked_on_assignment(self):
+        analyte = fake_analyte("cont1", "art1", "sample1", "art1", "A:1", True, concentration_ngul=10, volume=5)
+        analyte.reset_updated_fields()
+        analyte.concentration_ngul = 11
+        analyte.set_udf("Current sample volume (ul)", 6)
+        self.assertEqual(set(["concentration_ngul", "volume"]), set(analyte.updated_fields()))
+
+    def test_field_set_back_to_original_value_not_updated(self):
+        analyte = fake_analyte("cont1", "art1", "sample1", "art1", "A:1", True, concentration_ngul=10)
+        analyte.reset_updated_fields()
+        analyte.concentration_ngul = 11
+        analyte.concentration_ngul = 10
+        self.assertEqual([], analyte.updated_fields())
+
     def test_updated_rest_resource_analyte(self):
         def fake_analyte(artifact_id=None, is_input=None, **kwargs):
             udf_map = {"target_concentration": "Target Concentration"}
@@ -85,10 +116,10 @@ class TestArtifact(unittest.TestCase):
         analyte1 = fake_analyte("art1", is_input=True, target_concentration=10)
         analyte2 = fake_analyte("art2", is_input=False)
         step_repo = StepRepository(session=None, udf_map=None)
-        step_repo._add_to_orig_state_cache([(analyte1, analyte2)])
+        step_repo._reset_updated_fields([(analyte1, analyte2)])
         analyte1.target_concentration = 11
         analyte1.set_udf("Not mapped udf", 2)
-        updated_fields = step_repo._retrieve_updated_fields(analyte1)
+        updated_fields = analyte1.updated_fields()
         updated_rest_resource, log = analyte1.updated_rest_resource(
             analyte1.api_resource, updated_fields)
 
@@ -155,10 +186,10 @@ class TestArtifact(unittest.TestCase):
         result_file1 = fake_result_file(artifact_id="art1", future_field=10)
         analyte2 = fake_result_file("art2")
         step_repo = StepRepository(session=None, udf_map=None)
-        step_repo._add_to_orig_state_cache([(result_file1, analyte2)])
+        step_repo._reset_updated_fields([(result_file1, analyte2)])
         result_file1.future_field = 11
         result_file1.set_udf("Not mapped udf", 2)
-        updated_fields = step_repo._retrieve_updated_fields(result_file1)
+        updated_fields = result_file1.updated_fields()
         updated_rest_resource, log = result_file1.updated_rest_resource(
             result_file1.api_resource, updated_fields)
 
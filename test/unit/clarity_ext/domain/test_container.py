@@ -0,0 +1,106 @@
+import unittest
+from clarity_ext.domain.container import Container, ContainerPosition, PlateSize
+
+
+class TestContainer(unittest.TestCase):
+
+    def setUp(self):
+        self.container = Container(container_type=Container.CONTAINER_TYPE_96_WELLS_PLATE)
+
+    def test_wells_created_on_first_use(self):
+        self.assertEqual(0, sum(1 for well in self.container._views if well is not None))
+        well = self.container["B:2"]
+        self.assertEqual(ContainerPosition(2, 2), well.position)
+        self.assertIs(well, self.container[(2, 2)])
+        self.assertIs(well, self.container.wells[ContainerPosition(2, 2)])
+        self.assertEqual(10, well.index_down_first)
+
+    def test_positions_in_all_formats(self):
+        well = self.container["C:4"]
+        for key in ["3:4", "c:4", (3, 4), ContainerPosition(3, 4)]:
+            self.assertIs(well, self.container[key])
+        self.assertIn("H:12", self.container)
+        self.assertNotIn("I:1", self.container)
+
+    def test_set_well_outside_container_raises_key_error(self):
+        self.assertRaises(KeyError, self.container.set_well, "A:13", artifact="art")
+        self.assertRaises(KeyError, self.container.__getitem__, "I:1")
+
+    def test_artifact_of_well_set_in_container(self):
+        well = self.container["A:1"]
+        well.artifact = "art1"
+        self.container["A:2"] = "art2"
+        self.assertEqual("art1", self.container._artifacts[0])
+        self.assertEqual("art2", self.container["A:2"].artifact)
+        self.assertEqual(bytearray([1, 0, 0, 0, 0, 0, 0, 0, 1]), self.container._occupied[:9])
+        well.artifact = None
+        self.assertTrue(well.is_empty)
+        self.assertEqual(0, self.container._occupied[0])
+
+    def test_artifact_name_and_id_default_to_none(self):
+        self.container["A:1"] = "art"
+        self.assertIsNone(self.container["A:1"].artifact_name)
+        self.assertIsNone(self.container["A:1"].artifact_id)
+        self.container.set_well("A:2", artifact_name="name", artifact_id="id")
+        self.assertEqual(("name", "id"), (self.container["A:2"].artifact_name, self.container["A:2"].artifact_id))
+
+    def test_containers_compared_without_creating_wells(self):
+        other = Container(container_type=Container.CONTAINER_TYPE_96_WELLS_PLATE)
+        self.container["A:1"] = "art"
+        other.set_well("A:1", artifact="art")
+        self.assertEqual(self.container, other)
+        other["B:1"] = "art2"
+        self.assertNotEqual(self.container, other)
+        self.assertEqual(["artifacts"], self.container.differing_fields(other))
+        self.assertEqual(0, sum(1 for well in self.container._views if well is not None))
+
+    def test_wells_listed_in_order(self):
+        container = Container(size=PlateSize(height=2, width=3))
+        self.assertEqual(["A:1", "B:1", "A:2"], [repr(well.position) for well in container.list_wells()][:3])
+        self.assertEqual(["A:1", "A:2", "A:3"], [repr(well.position) for well in
+                                                 container.list_wells(Container.RIGHT_FIRST)][:3])
+
+    def test_rows_after_z_have_two_letters(self):
+        container = Container(size=PlateSize(height=32, width=48))
+        well = container["AF:48"]
+        self.assertEqual(ContainerPosition(32, 48), well.position)
+        self.assertEqual("AF:48", repr(well.position))
+        self.assertEqual(1536, well.index_down_first)
+
+
+class TestContainerOccupancy(unittest.TestCase):
+
+    def setUp(self):
+        self.container = Container(size=PlateSize(height=3, width=4))
+        for key in ["B:1", "A:2", "C:3"]:
+            self.container[key] = "art-" + key
+
+    def positions(self, wells):
+        return [repr(well.position) for well in wells]
+
+    def test_occupied_wells_in_order(self):
+        self.assertEqual(["B:1", "A:2", "C:3"], self.positions(self.container.occupied_wells()))
+        self.assertEqual(["A:2", "B:1", "C:3"],
+                         self.positions(self.container.occupied_wells(Container.RIGHT_FIRST)))
+        self.assertEqual(3, self.container.occupied_count)
+
+    def test_occupied_wells_follow_changes(self):
+        self.container["B:1"] = None
+        self.container["C:4"] = "art"
+        self.assertEqual(["A:2", "C:3", "C:4"], self.positions(self.container.occupied_wells()))
+        self.assertEqual(self.positions(self.container.occupied_wells()),
+                         self.positions(well for well in self.container.list_wells() if not well.is_empty))
+
+    def test_first_free_well(self):
+        self.assertEqual("A:1", repr(self.container.first_free_well().position))
+        self.container["A:1"] = "art"
+        self.assertEqual("C:1", repr(self.container.first_free_well().position))
+        self.assertEqual("A:3", repr(self.container.first_free_well(Container.RIGHT_FIRST).position))
+        for well in self.container.list_wells():
+            well.artifact = "art"
+        self.assertIsNone(self.container.first_free_well())
+
+    def test_wells_in_range(self):
+        self.assertEqual(["B:2", "C:2", "B:3", "C:3"], self.positions(self.container.wells_in_range("B:2", "C:3")))
+        self.assertEqual(["B:2", "B:3", "C:2", "C:3"],
+                         self.positions(self.container.wells_in_range("C:3", "B:2", Container.RIGHT_FIRST)))
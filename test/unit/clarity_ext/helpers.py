@@ -6,6 +6,7 @@ from clarity_ext.service import ArtifactService, FileService
 from clarity_ext.domain.analyte import Analyte
 from clarity_ext.domain.container import Well
 from clarity_ext.domain.container import ContainerPosition
+from clarity_ext.domain.container import PlateSize
 from clarity_ext.domain.aliquot import Sample
 from clarity_ext.domain.artifact import Artifact
 from clarity_ext.domain.result_file import ResultFile
@@ -79,6 +80,21 @@ def fake_container(container_id):
     return container
 
 
+def fake_full_container(container_id, size=PlateSize(height=8, width=12)):
+    """Creates a container with an analyte in every well"""
+    container = Container(container_type=Container.CONTAINER_TYPE_96_WELLS_PLATE, size=size)
+    container.id = container_id
+    container.name = container_id
+    for ix, well in enumerate(container.list_wells()):
+        artifact_id = "{}-art{}".format(container_id, ix)
+        analyte = Analyte(api_resource=None, is_input=True, id=artifact_id, name=artifact_id, well=well,
+                          samples=[Sample("sample{}".format(ix), "sample{}".format(ix), None)],
+                          artifact_specific_udf_map=DEFAULT_UDF_MAP["Analyte"],
+                          concentration_ngul=ix, volume=20)
+        analyte.generation_type = Artifact.PER_INPUT
+    return container
+
+
 def mock_artifact_resource(resouce_id=None, sample_name=None, well_position=None):
     api_resource = MagicMock()
     if well_position:
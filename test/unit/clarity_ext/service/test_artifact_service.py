@@ -1,4 +1,6 @@
 import unittest
+from mock import MagicMock
+from clarity_ext.service import ArtifactService
 from test.unit.clarity_ext import helpers
 
 
@@ -31,3 +33,34 @@ class TestArtifactService(unittest.TestCase):
         # Expecting AnalytePair objects, correctly mapped:
         self.assertTrue(all(pair.input_artifact.is_input and
                             not pair.output_artifact.is_input for pair in analytes))
+
+    def test_parent_input_artifact_fetched_for_all_parents_at_once(self):
+        artifact_set = helpers.two_containers_artifact_set()
+        parent_processes = [MagicMock(), MagicMock(), None, MagicMock()]
+        parent_processes[3] = parent_processes[0]
+        for (input, output), process in zip(artifact_set, parent_processes):
+            input.parent_process = process
+            output.input = input
+        repo = MagicMock()
+        repo.all_artifacts.return_value = artifact_set
+        resources = [fake_parent_resource("parent-art{}".format(ix), "sample{}".format(ix)) for ix in range(1, 5)]
+        repo.parent_input_artifact_resources.return_value = resources
+        repo.wrap_parent_input_artifact.side_effect = lambda resource: "wrapped-" + resource.id
+        svc = ArtifactService(repo)
+
+        sample = artifact_set[1][1].sample
+        self.assertEqual("wrapped-parent-art2", svc.get_parent_input_artifact(sample))
+        self.assertEqual("wrapped-parent-art2", svc.get_parent_input_artifact(sample))
+
+        repo.parent_input_artifact_resources.assert_called_once_with(
+            set([parent_processes[0], parent_processes[1]]))
+        repo.wrap_parent_input_artifact.assert_called_once_with(resources[1])
+
+
+def fake_parent_resource(artifact_id, sample_id):
+    resource = MagicMock()
+    resource.id = artifact_id
+    sample = MagicMock()
+    sample.id = sample_id
+    resource.samples = [sample]
+    return resource
@@ -0,0 +1,104 @@
+import unittest
+from StringIO import StringIO
+from clarity_ext.service.file_service import Csv, CsvReader
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+CONTENT = "\n".join([
+    "Well,Sample,Conc,Volume",
+    "A:1,sample1,10.5,20",
+    'B:1,"sample2, diluted",,30',
+    "",
+    "C:1,sample3,1.25,40",
+])
+
+
+class TestCsvReader(unittest.TestCase):
+
+    def test_quoted_values_can_contain_the_delimiter(self):
+        rows = list(CsvReader(StringIO(CONTENT)))
+        self.assertEqual("sample2, diluted", rows[1]["Sample"])
+
+    def test_blank_lines_are_skipped(self):
+        self.assertEqual(3, len(list(CsvReader(StringIO(CONTENT)))))
+
+    def test_only_the_projected_columns_are_read(self):
+        reader = CsvReader(StringIO(CONTENT), columns=["Volume", "Well"], types={"Volume": int})
+        rows = list(reader)
+        self.assertEqual([20, "A:1"], rows[0].values)
+        self.assertEqual(40, rows[2]["Volume"])
+        self.assertRaises(KeyError, lambda: rows[0]["Sample"])
+
+    def test_short_rows_are_padded(self):
+        content = "Well,Sample,Conc\nA:1,sample1\nB:1\n"
+        rows = list(CsvReader(StringIO(content), columns=["Well", "Conc"]))
+        self.assertEqual([["A:1", ""], ["B:1", ""]], [row.values for row in rows])
+        self.assertEqual(["B:1", "", ""], list(CsvReader(StringIO(content)))[1].values)
+        self.assertEqual(None, rows[1].get_float("Conc"))
+
+    def test_projecting_an_unknown_column_fails(self):
+        self.assertRaises(ValueError, CsvReader, StringIO(CONTENT), columns=["Well", "Missing"])
+
+    def test_typed_access_with_default_for_empty_values(self):
+        rows = list(CsvReader(StringIO(CONTENT)))
+        self.assertEqual(10.5, rows[0].get_float("Conc"))
+        self.assertEqual(0.0, rows[1].get_float("Conc", 0.0))
+        self.assertEqual(30, rows[1].get_int("Volume"))
+
+    def test_index_by_key_column(self):
+        index = CsvReader(StringIO(CONTENT)).index("Well")
+        self.assertEqual("sample3", index["C:1"]["Sample"])
+
+    def test_index_fails_on_duplicate_keys(self):
+        content = "Well,Sample\nA:1,s1\nA:1,s2\n"
+        self.assertRaises(ValueError, CsvReader(StringIO(content)).index, "Well")
+
+    def test_to_columns(self):
+        columns = CsvReader(StringIO(CONTENT), columns=["Well", "Volume"]).to_columns(numeric=["Volume"])
+        self.assertEqual(["A:1", "B:1", "C:1"], columns["Well"])
+        self.assertEqual([20.0, 30.0, 40.0], list(columns["Volume"]))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numeric_columns_are_arrays(self):
+        columns = CsvReader(StringIO(CONTENT)).to_columns(numeric=["Volume"])
+        self.assertTrue(isinstance(columns["Volume"], numpy.ndarray))
+
+
+class TestCsv(unittest.TestCase):
+
+    def test_lines_can_be_read_and_changed(self):
+        csv = Csv(StringIO(CONTENT))
+        self.assertEqual(["Well", "Sample", "Conc", "Volume"], csv.header.values)
+        lines = list(csv)
+        self.assertEqual("10.5", lines[0]["Conc"])
+        lines[0]["Conc"] = "11"
+        self.assertEqual(["A:1", "sample1", "11", "20"], csv.data[0].values)
+
+    def test_blank_lines_are_skipped(self):
+        self.assertEqual(["A:1", "B:1", "C:1"], [line["Well"] for line in Csv(StringIO(CONTENT))])
+
+    def test_lines_are_stripped(self):
+        csv = Csv(StringIO("Well,Conc \r\nA:1,10.5 \r\n"))
+        self.assertEqual(["Well", "Conc"], csv.header.values)
+        self.assertEqual("10.5", csv.data[0]["Conc"])
+
+    def test_quotes_are_kept(self):
+        csv = Csv(StringIO('Well,Sample\nA:1,"sample1"\n'))
+        self.assertEqual('"sample1"', csv.data[0]["Sample"])
+
+    def test_index_is_built_once(self):
+        csv = Csv(StringIO(CONTENT))
+        index = csv.index("Well")
+        self.assertEqual("sample3", index["C:1"]["Sample"])
+        self.assertTrue(index is csv.index("Well"))
+
+    def test_index_is_rebuilt_when_a_line_is_changed(self):
+        csv = Csv(StringIO(CONTENT))
+        csv.index("Well")
+        csv.data[0]["Well"] = "D:1"
+        index = csv.index("Well")
+        self.assertEqual("sample1", index["D:1"]["Sample"])
+        self.assertNotIn("A:1", index)
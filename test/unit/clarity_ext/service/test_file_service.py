@@ -1,9 +1,15 @@
 import unittest
 from mock import MagicMock
-from clarity_ext.driverfile import DriverFileService, ResponseFileService
+from clarity_ext.driverfile import DriverFileService, ResponseFileService, OSService
 from clarity_ext.domain.artifact import Artifact
+from clarity_ext.service.file_service import FileService, SharedFileNotFound, Csv, CsvReader
+from clarity_ext.repository.file_cache import FileCache
 import logging
 import os
+import shutil
+import hashlib
+import io
+import tempfile
 
 
 class TestGeneralFileService(unittest.TestCase):
@@ -30,6 +36,30 @@ class TestGeneralFileService(unittest.TestCase):
                                                 ".{sep}uploaded{sep}step1_response.txt".format(sep=os.sep))
 
 
+class TestOSService(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_relative_paths_resolved_in_working_dir(self):
+        os_service = OSService(self.working_dir)
+        with os_service.open_file("file1.txt", "w") as f:
+            f.write("content")
+        self.assertTrue(os.path.exists(os.path.join(self.working_dir, "file1.txt")))
+        self.assertFalse(os.path.exists(os.path.join(os.getcwd(), "file1.txt")))
+
+    def test_attach_file_copies_to_working_dir(self):
+        os_service = OSService(self.working_dir)
+        with os_service.open_file("file1.txt", "w") as f:
+            f.write("content")
+        attached = os_service.attach_file_for_epp("file1.txt", fake_artifact("art1", "file1.txt"))
+        self.assertEqual(os.path.join(self.working_dir, "art1_file1.txt"), attached)
+        self.assertTrue(os.path.exists(attached))
+
+
 def fake_artifact(id, name):
     artifact = Artifact()
     artifact.name = name
@@ -56,3 +86,110 @@ def fake_extension(file_name=None, context=None):
     extension.execute.return_value = []
     extension.content.return_value = "content"
     return extension
+
+
+class TestFileServicePrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.artifact_service = MagicMock()
+        self.artifact_service.shared_files.return_value = [
+            fake_shared_file("92-1", "Plate reader 1"), fake_shared_file("92-2", "Plate reader 2")]
+        self.file_repo = MagicMock()
+        self.file_repo.copy_remote_file.side_effect = write_remote_file
+        self.file_repo.open_local_file.side_effect = open
+        self.file_service = FileService(self.artifact_service, self.file_repo, False, OSService(self.working_dir))
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def test_prefetched_files_not_downloaded_again(self):
+        self.file_service.prefetch(["Plate reader 1", "Plate reader 2"])
+        with self.file_service.local_shared_file("Plate reader 1") as f:
+            self.assertEqual("content of 92-1-file", f.read())
+        with self.file_service.local_shared_file("Plate reader 2") as f:
+            self.assertEqual("content of 92-2-file", f.read())
+        self.assertEqual(2, self.file_repo.copy_remote_file.call_count)
+        self.artifact_service.shared_files.assert_called_once_with()
+
+    def test_cached_file_not_downloaded(self):
+        cache = FileCache(os.path.join(self.working_dir, "file_cache"))
+        file_service = FileService(self.artifact_service, self.file_repo, False,
+                                   OSService(self.working_dir), file_cache=cache)
+        file_service.local_shared_file("Plate reader 1").close()
+        file_service.cleanup()
+        with file_service.local_shared_file("Plate reader 1") as f:
+            self.assertEqual("content of 92-1-file", f.read())
+        self.assertEqual(1, self.file_repo.copy_remote_file.call_count)
+
+    def test_unknown_file_skipped_by_prefetch(self):
+        self.file_service.prefetch(["Plate reader 1", "Unknown"])
+        with self.assertRaises(SharedFileNotFound):
+            self.file_service.local_shared_file("Unknown")
+
+    def test_prefetched_files_cleaned_up(self):
+        self.file_service.prefetch(["Plate reader 1"])
+        self.file_service.cleanup()
+        self.assertEqual([], os.listdir(self.working_dir))
+
+
+def fake_shared_file(artifact_id, name):
+    shared_file = MagicMock()
+    shared_file.id = artifact_id
+    shared_file.name = name
+    remote_file = MagicMock()
+    remote_file.id = "{}-file".format(artifact_id)
+    shared_file.api_resource.files = [remote_file]
+    return shared_file
+
+
+def write_remote_file(remote_file_id, local_path):
+    content = "content of {}".format(remote_file_id)
+    with open(local_path, "w") as f:
+        f.write(content)
+    return hashlib.sha256(content).hexdigest()
+
+
+class TestFileServiceIterparseXml(unittest.TestCase):
+    XML = ('<Result xmlns="http://example.com/reader"><Header><Name>Run 1</Name></Header>'
+           '<Plate id="p1"><Well pos="A1"><Value>1.5</Value></Well><Well pos="B1"><Value>2.5</Value></Well></Plate>'
+           '<Plate id="p2"><Well pos="A1"><Value>3.5</Value></Well></Plate>'
+           '<Summary><Well pos="A1"/></Summary></Result>')
+
+    def setUp(self):
+        self.file_service = FileService(MagicMock(), MagicMock(), False, MagicMock())
+
+    def records(self, path):
+        return self.file_service.iterparse_xml(io.BytesIO(self.XML), path)
+
+    def test_records_selected_by_path(self):
+        values = [(well.getparent().get("id"), well.get("pos"), well.findtext("{*}Value"))
+                  for well in self.records("Plate/Well")]
+        self.assertEqual([("p1", "A1", "1.5"), ("p1", "B1", "2.5"), ("p2", "A1", "3.5")], values)
+
+    def test_records_selected_by_tag(self):
+        self.assertEqual(4, len(list(self.records("Well"))))
+
+    def test_processed_records_removed_from_tree(self):
+        for well in self.records("Plate/Well"):
+            # Elements after the record may already have been parsed, but none before it remain
+            self.assertIsNone(well.getprevious())
+            self.assertIsNone(well.getparent().getprevious())
+
+
+class TestFileServiceParseCsv(unittest.TestCase):
+    CSV = "Well,Conc\nA:1,1.5\nB:1,2.5\n"
+
+    def setUp(self):
+        self.file_service = FileService(MagicMock(), MagicMock(), False, MagicMock())
+
+    def test_csv_read_into_memory(self):
+        f = io.BytesIO(self.CSV)
+        csv = self.file_service.parse_csv(f)
+        self.assertTrue(isinstance(csv, Csv))
+        self.assertTrue(f.closed)
+
+    def test_csv_read_one_row_at_a_time(self):
+        reader = self.file_service.parse_csv(io.BytesIO(self.CSV), columns=["Conc"], types={"Conc": float})
+        self.assertTrue(isinstance(reader, CsvReader))
+        self.assertEqual([[1.5], [2.5]], [row.values for row in reader])
@@ -0,0 +1,38 @@
+import unittest
+from mock import MagicMock, patch
+from clarity_ext.clarity import ClaritySessionFactory, PooledLims
+
+
+@patch("clarity_ext.clarity.Process", MagicMock())
+@patch("clarity_ext.clarity.PooledLims.check_version")
+class TestClaritySessionFactory(unittest.TestCase):
+
+    def test_sessions_share_connection_pool(self, check_version):
+        factory = ClaritySessionFactory("http://clarity", "user", "password")
+        first = factory.create("24-1")
+        second = factory.create("24-2")
+        self.assertTrue(first.api.request_session is second.api.request_session)
+        self.assertFalse(first.api is second.api)
+
+    def test_version_checked_once_per_server(self, check_version):
+        factory = ClaritySessionFactory("http://clarity", "user", "password")
+        for pid in ["24-1", "24-2", "24-3"]:
+            factory.create(pid)
+        check_version.assert_called_once()
+
+    def test_explicit_request_session_is_used(self, check_version):
+        factory = ClaritySessionFactory("http://clarity", "user", "password")
+        request_session = MagicMock()
+        session = factory.create("24-1", request_session=request_session)
+        self.assertTrue(session.api.request_session is request_session)
+
+
+class TestPooledLims(unittest.TestCase):
+
+    @patch("clarity_ext.clarity.requests.Session")
+    def test_no_request_session_created(self, session_class):
+        request_session = MagicMock()
+        api = PooledLims("http://clarity/", "user", "password", request_session)
+        session_class.assert_not_called()
+        self.assertTrue(api.request_session is request_session)
+        self.assertEqual("http://clarity/api/v2/artifacts", api.get_uri("artifacts"))
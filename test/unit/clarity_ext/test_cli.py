@@ -0,0 +1,26 @@
+import sys
+import subprocess
+import unittest
+
+# Modules that should only be imported when a feature that needs them is used
+OPTIONAL_MODULES = ["requests_cache", "jinja2", "yaml", "PyPDF2", "numpy", "test.integration"]
+
+LOADED_MODULES = """
+import sys
+import {module}
+print(",".join(name for name in {optional} if name in sys.modules))
+"""
+
+
+class TestStartup(unittest.TestCase):
+
+    def loaded_optional_modules(self, module):
+        script = LOADED_MODULES.format(module=module, optional=OPTIONAL_MODULES)
+        output = subprocess.check_output([sys.executable, "-c", script]).strip()
+        return [name for name in output.split(",") if name]
+
+    def test_cli_imports_no_optional_modules(self):
+        self.assertEqual([], self.loaded_optional_modules("clarity_ext.cli"))
+
+    def test_extensions_import_no_optional_modules(self):
+        self.assertEqual([], self.loaded_optional_modules("clarity_ext.extensions"))
@@ -0,0 +1,70 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import unittest
+from clarity_ext.repository.file_cache import FileCache
+
+
+class TestFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def local_file(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        return path, hashlib.sha256(content).hexdigest()
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_cached_file_copied_to_local_path(self):
+        cache = FileCache(self.cache_dir)
+        path, digest = self.local_file("file.csv", b"content")
+        cache.put("40-1", path, digest)
+
+        target = os.path.join(self.directory, "copy.csv")
+        self.assertEqual(digest, cache.get("40-1", target))
+        self.assertEqual(b"content", self.read(target))
+
+    def test_missing_file_not_cached(self):
+        cache = FileCache(self.cache_dir)
+        self.assertIsNone(cache.get("40-1", os.path.join(self.directory, "copy.csv")))
+
+    def test_same_content_stored_once(self):
+        cache = FileCache(self.cache_dir)
+        path, digest = self.local_file("file.csv", b"content")
+        cache.put("40-1", path, digest)
+        cache.put("40-2", path, digest)
+        self.assertEqual([digest], os.listdir(cache.objects_dir))
+
+    def test_least_recently_used_file_evicted(self):
+        cache = FileCache(self.cache_dir, max_size=10)
+        first, first_digest = self.local_file("first.csv", b"12345")
+        second, second_digest = self.local_file("second.csv", b"67890")
+        third, third_digest = self.local_file("third.csv", b"abcde")
+        cache.put("40-1", first, first_digest)
+        cache.put("40-2", second, second_digest)
+        # Make sure the first file is used more recently than the second one
+        os.utime(cache._object_path(second_digest), (time.time() - 60, time.time() - 60))
+        cache.get("40-1", os.path.join(self.directory, "copy.csv"))
+        cache.put("40-3", third, third_digest)
+
+        target = os.path.join(self.directory, "copy.csv")
+        self.assertIsNotNone(cache.get("40-1", target))
+        self.assertIsNone(cache.get("40-2", target))
+        self.assertIsNotNone(cache.get("40-3", target))
+        self.assertEqual(set(["40-1", "40-3"]), set(os.listdir(cache.index_dir)))
+
+    def test_created_from_config(self):
+        self.assertIsNone(FileCache.create_from_config(dict()))
+        cache = FileCache.create_from_config({"file_cache_path": self.cache_dir, "file_cache_max_mb": 5})
+        self.assertEqual(5 * 2**20, cache.max_size)
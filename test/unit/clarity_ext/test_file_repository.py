@@ -0,0 +1,98 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+from mock import MagicMock
+from clarity_ext.repository.file_repository import FileRepository, DownloadIncomplete, ChecksumMismatch
+
+CONTENT = b"0123456789" * 100
+
+
+class TestFileRepository(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.local_path = os.path.join(self.directory, "file.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read_local(self):
+        with open(self.local_path, "rb") as f:
+            return f.read()
+
+    def test_file_streamed_in_chunks(self):
+        session = fake_session(CONTENT)
+        repo = FileRepository(session, chunk_size=64)
+        digest = repo.copy_remote_file("40-1", self.local_path)
+
+        self.assertEqual(CONTENT, self.read_local())
+        self.assertEqual(hashlib.sha256(CONTENT).hexdigest(), digest)
+        self.assertEqual(True, session.get.call_args[1]["stream"])
+        self.assertFalse(os.path.exists(self.local_path + FileRepository.PARTIAL_SUFFIX))
+
+    def test_incomplete_download_is_resumed(self):
+        repo = FileRepository(fake_session(CONTENT[:300], content_length=len(CONTENT)))
+        with self.assertRaises(DownloadIncomplete):
+            repo.copy_remote_file("40-1", self.local_path)
+
+        session = fake_session(CONTENT[300:], status_code=206)
+        repo = FileRepository(session)
+        digest = repo.copy_remote_file("40-1", self.local_path)
+
+        self.assertEqual({"Range": "bytes=300-", "Accept-Encoding": "identity"}, session.get.call_args[1]["headers"])
+        self.assertEqual(CONTENT, self.read_local())
+        self.assertEqual(hashlib.sha256(CONTENT).hexdigest(), digest)
+
+    def test_whole_file_downloaded_if_server_does_not_resume(self):
+        with open(self.local_path + FileRepository.PARTIAL_SUFFIX, "wb") as f:
+            f.write(b"garbage")
+        repo = FileRepository(fake_session(CONTENT))
+        repo.copy_remote_file("40-1", self.local_path)
+        self.assertEqual(CONTENT, self.read_local())
+
+    def test_compressed_download_not_checked_against_content_length(self):
+        session = fake_session(CONTENT, content_length=200)
+        session.get.return_value.headers["Content-Encoding"] = "gzip"
+        digest = FileRepository(session).copy_remote_file("40-1", self.local_path)
+        self.assertEqual(CONTENT, self.read_local())
+        self.assertEqual(hashlib.sha256(CONTENT).hexdigest(), digest)
+
+    def test_complete_partial_file_used_when_range_not_satisfiable(self):
+        with open(self.local_path + FileRepository.PARTIAL_SUFFIX, "wb") as f:
+            f.write(CONTENT)
+        session = fake_session(b"", status_code=416)
+        session.get.return_value.raise_for_status.side_effect = AssertionError("Not checked for 416")
+        digest = FileRepository(session).copy_remote_file("40-1", self.local_path,
+                                                          sha256=hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(CONTENT, self.read_local())
+        self.assertEqual(hashlib.sha256(CONTENT).hexdigest(), digest)
+        self.assertFalse(os.path.exists(self.local_path + FileRepository.PARTIAL_SUFFIX))
+
+    def test_partial_file_downloaded_again_when_range_not_satisfiable_and_checksum_differs(self):
+        with open(self.local_path + FileRepository.PARTIAL_SUFFIX, "wb") as f:
+            f.write(b"garbage")
+        not_satisfiable = fake_session(b"", status_code=416).get.return_value
+        session = fake_session(CONTENT)
+        session.get.side_effect = [not_satisfiable, session.get.return_value]
+        FileRepository(session).copy_remote_file("40-1", self.local_path, sha256=hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(CONTENT, self.read_local())
+        self.assertEqual(dict(), session.get.call_args[1]["headers"])
+
+    def test_checksum_mismatch(self):
+        repo = FileRepository(fake_session(CONTENT))
+        with self.assertRaises(ChecksumMismatch):
+            repo.copy_remote_file("40-1", self.local_path, sha256=hashlib.sha256(b"other").hexdigest())
+        self.assertFalse(os.path.exists(self.local_path))
+
+
+def fake_session(content, status_code=200, content_length=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.headers = {"Content-Length": str(content_length or len(content))}
+    response.iter_content.side_effect = lambda chunk_size: (
+        content[ix:ix + chunk_size] for ix in range(0, len(content), chunk_size))
+    session = MagicMock()
+    session.get.return_value = response
+    return session
@@ -0,0 +1,21 @@
+import unittest
+from mock import patch
+from clarity_ext.integration import IntegrationTestService
+
+
+class TestIntegrationTestService(unittest.TestCase):
+
+    @patch("clarity_ext.integration.ConfigFromConventionProvider.get_extension_config")
+    @patch("clarity_ext.integration.IntegrationTestService._integration_tests")
+    @patch("clarity_ext.integration.validate_integration_test")
+    def test_validate_runs_every_integration_test_and_counts_errors(
+            self, validate_integration_test, integration_tests, get_extension_config):
+        get_extension_config.return_value = [{"module": "ext.a"}, {"module": "ext.b"}]
+        integration_tests.side_effect = lambda module: ["24-1", "24-2"] if module == "ext.a" else ["24-3"]
+        validate_integration_test.side_effect = lambda job: (job[0], job[1], "diff" if job[1] == 1 else None)
+
+        exception_count = IntegrationTestService().validate("ext", dict())
+
+        self.assertEqual(1, exception_count)
+        self.assertEqual([("ext.a", 0, {}), ("ext.a", 1, {}), ("ext.b", 0, {})],
+                         [call[0][0] for call in validate_integration_test.call_args_list])
@@ -0,0 +1,50 @@
+import unittest
+from mock import MagicMock
+from clarity_ext.repository.sample_repository import SampleRepository
+
+
+class TestSampleRepository(unittest.TestCase):
+
+    def test_creating_samples_requires_no_requests(self):
+        session = MagicMock()
+        sample_repo = SampleRepository(session)
+        samples = sample_repo.get_samples([fake_sample_resource("s1"), fake_sample_resource("s2")])
+        self.assertEqual(["s1", "s2"], [sample.id for sample in samples])
+        session.api.get_batch.assert_not_called()
+
+    def test_all_samples_loaded_in_one_batch(self):
+        session = MagicMock()
+        project = fake_project_resource("project1")
+        resources = [fake_sample_resource("s{}".format(ix), project) for ix in range(5)]
+        sample_repo = SampleRepository(session)
+        samples = sample_repo.get_samples(resources)
+
+        self.assertEqual("name-s3", samples[3].name)
+        self.assertEqual("name-s0", samples[0].name)
+        session.api.get_batch.assert_called_once()
+        self.assertEqual(set(resources), set(session.api.get_batch.call_args[0][0]))
+        self.assertTrue(samples[0].project is samples[4].project)
+        self.assertEqual("project1", samples[4].project.name)
+
+    def test_same_sample_is_created_once(self):
+        sample_repo = SampleRepository(MagicMock())
+        resource = fake_sample_resource("s1")
+        first = sample_repo.get_sample(resource)
+        second = sample_repo.get_sample(resource)
+        self.assertTrue(first is second)
+
+
+def fake_sample_resource(sample_id, project=None):
+    resource = MagicMock()
+    resource.id = sample_id
+    resource.uri = "samples/{}".format(sample_id)
+    resource.name = "name-{}".format(sample_id)
+    resource.project = project
+    return resource
+
+
+def fake_project_resource(name):
+    resource = MagicMock()
+    resource.uri = "projects/{}".format(name)
+    resource.name = name
+    return resource
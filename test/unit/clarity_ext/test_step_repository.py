@@ -17,7 +17,7 @@ class TestStepRepository(unittest.TestCase):
         step_repo = StepRepository(session=session, udf_map=udf_map)
         artifacts = artifact_set(udf_map=udf_map)
         artifacts = list(artifacts[0])
-        step_repo._add_to_orig_state_cache(artifact_set(udf_map=udf_map))
+        step_repo._reset_updated_fields([tuple(artifacts)])
         response = step_repo.update_artifacts(artifacts)
         self.assertEqual([], response)
 
@@ -31,12 +31,71 @@ class TestStepRepository(unittest.TestCase):
         step_repo = StepRepository(session=session, udf_map=udf_map)
         artifacts = artifact_set(udf_map=udf_map)
         artifacts = list(artifacts[0])
-        step_repo._add_to_orig_state_cache(artifact_set(udf_map=udf_map))
+        step_repo._reset_updated_fields([tuple(artifacts)])
         updated_artifact = artifacts[0]
         updated_artifact.concentration_ngul = 99
         response = step_repo.update_artifacts(artifacts)
         self.assertEqual([('Analyte', 'art1', 'conc', '99')], response)
 
+    def test_committed_fields_not_updated_again(self):
+        session = MagicMock()
+        udf_map = {
+            "concentration_ngul": "conc",
+            "requested_concentration_ngul": "rconc",
+        }
+        step_repo = StepRepository(session=session, udf_map=udf_map)
+        artifacts = list(artifact_set(udf_map=udf_map)[0])
+        step_repo._reset_updated_fields([tuple(artifacts)])
+        artifacts[0].concentration_ngul = 99
+        step_repo.update_artifacts(artifacts)
+        response = step_repo.update_artifacts(artifacts)
+        self.assertEqual([], response)
+
+    def test_prefetch_containers_in_one_batch(self):
+        session = MagicMock()
+        plate_type = MagicMock()
+        plate_type.uri = "containertypes/1"
+        plates = [MagicMock(), MagicMock()]
+        for ix, plate in enumerate(plates):
+            plate.uri = "containers/{}".format(ix)
+            plate.type = plate_type
+        session.api.get_batch.return_value = plates
+        artifacts = [fake_artifact_resource(plates[0], "A:1"), fake_artifact_resource(plates[0], "B:1"),
+                     fake_artifact_resource(plates[1], "A:1"), fake_artifact_resource(None, None)]
+        step_repo = StepRepository(session=session)
+        step_repo._prefetch_containers(artifacts)
+
+        session.api.get_batch.assert_called_once()
+        requested = session.api.get_batch.call_args[0][0]
+        self.assertEqual(set(plates), set(requested))
+        plate_type.get.assert_called_once_with()
+
+    def test_parent_input_artifacts_in_one_batch(self):
+        session = MagicMock()
+        shared = fake_io_map_entry("art-shared")
+        processes = [MagicMock(), MagicMock()]
+        processes[0].input_output_maps = [(fake_io_map_entry("art1"), None), (shared, None)]
+        processes[1].input_output_maps = [(fake_io_map_entry("art2"), None), (shared, None)]
+        step_repo = StepRepository(session=session)
+        step_repo.parent_input_artifact_resources(processes)
+
+        session.api.get_batch.assert_called_once()
+        requested = session.api.get_batch.call_args[0][0]
+        self.assertEqual(set(["artifacts/art1", "artifacts/art2", "artifacts/art-shared"]),
+                         set(artifact.uri for artifact in requested))
+
+
+def fake_io_map_entry(artifact_id):
+    artifact = MagicMock()
+    artifact.uri = "artifacts/{}".format(artifact_id)
+    return {"uri": artifact}
+
+
+def fake_artifact_resource(container, well):
+    resource = MagicMock()
+    resource.location = (container, well)
+    return resource
+
 
 def artifact_set(udf_map=None):
     api_resource = MagicMock()
@@ -0,0 +1,79 @@
+import os
+import sys
+import stat
+import socket
+import shutil
+import tempfile
+import threading
+import subprocess
+import unittest
+from mock import patch
+from clarity_ext import worker
+from clarity_ext.worker import ExtensionWorker
+
+
+@patch("clarity_ext.extensions.ExtensionService.execute")
+class TestExtensionWorker(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, "run", "worker.sock")
+        self.server = ExtensionWorker({"exec_root_path": "."}, socket_path=self.socket_path, threads=2)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def test_extension_executed_relative_to_client_directory(self, execute):
+        response = worker.execute("ext.module", "exec", "pid=24-1", socket_path=self.socket_path)
+        self.assertEqual({"status": worker.STATUS_OK}, response)
+        args, kwargs = execute.call_args
+        self.assertEqual(("ext.module", "exec", "pid=24-1"), args[0:3])
+        self.assertEqual(os.path.join(os.getcwd(), "."), args[3]["exec_root_path"])
+
+    def test_exception_reported_to_client(self, execute):
+        execute.side_effect = ValueError("Unexpected volume")
+        response = worker.execute("ext.module", "exec", "pid=24-1", socket_path=self.socket_path)
+        self.assertEqual(worker.STATUS_ERROR, response["status"])
+        self.assertEqual("ValueError: Unexpected volume", response["message"])
+
+    def test_socket_only_accessible_by_owner(self, execute):
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.socket_path).st_mode))
+        self.assertEqual(0o700, stat.S_IMODE(os.stat(os.path.dirname(self.socket_path)).st_mode))
+
+    def test_directory_outside_root_refused(self, execute):
+        self.server.cwd_root = self.directory
+        response = worker.execute("ext.module", "exec", "pid=24-1", socket_path=self.socket_path)
+        self.assertEqual(worker.STATUS_ERROR, response["status"])
+        execute.assert_not_called()
+        self.assertTrue(self.server.allows_cwd(os.path.join(self.directory, "run")))
+        self.assertFalse(self.server.allows_cwd(self.directory + "-other"))
+        self.assertFalse(self.server.allows_cwd(None))
+
+    @patch("clarity_ext.worker.peer_credentials", return_value=(1, os.getuid() + 1, os.getgid() + 1))
+    def test_other_users_refused(self, peer_credentials, execute):
+        response = worker.execute("ext.module", "exec", "pid=24-1", socket_path=self.socket_path)
+        self.assertEqual(worker.STATUS_ERROR, response["status"])
+        execute.assert_not_called()
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "Peer credentials are only read on Linux")
+    def test_peer_credentials_of_own_process(self, execute):
+        client, server = socket.socketpair()
+        try:
+            self.assertEqual((os.getpid(), os.getuid(), os.getgid()), worker.peer_credentials(server))
+        finally:
+            client.close()
+            server.close()
+
+
+class TestClient(unittest.TestCase):
+
+    def test_client_imports_no_clarity_dependencies(self):
+        script = ("import sys\nimport clarity_ext_client\n"
+                  "print(','.join(name for name in sys.modules if name.split('.')[0] in "
+                  "['clarity_ext', 'genologics', 'requests']))")
+        self.assertEqual("", subprocess.check_output([sys.executable, "-c", script]).strip())
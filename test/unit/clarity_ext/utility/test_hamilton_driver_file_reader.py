@@ -4,7 +4,12 @@
 import unittest
 import os
 import inspect
+from array import array
 from clarity_ext.utility.hamilton_driver_file_reader import HamiltonReader, HamiltonColumnReference
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # TODO: Move the resource file closer to the corresponding test
 DRIVER_FILE_RELATIVE_PATH = os.path.join(os.path.dirname(__file__),
@@ -114,5 +119,36 @@ class HamiltonDriverFileTests(unittest.TestCase):
         self.assertEqual(contents, "END1",
                          "Target plate pos reference not right")
 
+    def test_volume_columns(self):
+        self.assertEqual(29, len(self.file_reader.volume_sample))
+        self.assertEqual(4.0, self.file_reader.volume_sample[0])
+        self.assertEqual(4.5, self.file_reader.volume_buffer[0])
+        self.assertTrue(isinstance(self.file_reader.volume_sample, array))
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_volume_columns_as_numpy(self):
+        volumes = self.file_reader.volumes(HamiltonColumnReference.VOLUME_BUFFER, as_numpy=True)
+        self.assertTrue(isinstance(volumes, numpy.ndarray))
+        self.assertEqual(list(self.file_reader.volume_buffer), list(volumes))
+
+    def test_reference_by_target(self):
+        row = self.file_reader.row_by_target("END1", 16)
+        self.assertEqual("SX614_T11.v1", row[self.column_ref.sample])
+
+    def test_reference_by_source(self):
+        rows = self.file_reader.rows_by_source("DNA1", 67)
+        self.assertEqual(["SX614_T11.v1"], [row[self.column_ref.sample] for row in rows])
+        self.assertEqual([], self.file_reader.rows_by_source("DNA1", 1000))
+
+    def test_memory_mapped_file_read_as_contents(self):
+        file_reader = HamiltonReader.create_from_path(DRIVER_FILE_RELATIVE_PATH)
+        self.assertEqual(self.file_reader.matrix, file_reader.matrix)
+
+    def test_rows_streamed(self):
+        rows = HamiltonReader.iter_rows(DRIVER_FILE_RELATIVE_PATH)
+        self.assertEqual(self.file_reader.matrix[0], next(rows))
+        self.assertEqual(28, len(list(rows)))
+
+
 if __name__ == "__main__":
     unittest.main()